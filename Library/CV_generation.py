@@ -1,13 +1,150 @@
 
+import io
+import json
 import os
-from dotenv import load_dotenv
+import re
+from concurrent.futures import ProcessPoolExecutor
 from colorama import Fore, Style, init
-import pandas as pd
 from docx import Document
-import yaml
-from sqlalchemy import create_engine
 import subprocess
 from datetime import datetime
+try:
+    from Library.data_layer import DATA_LAYER
+    from Library.date_locale import LOCALE_TABLE
+    from Library.docx_package import TEMPLATE_PACKAGE
+    from Library.instrumentation import span
+    from Library.settings import get_settings, normalize_tenant, tenant_schema
+    from Library.template_registry import TEMPLATE_REGISTRY
+except ModuleNotFoundError:
+    # fallback if running inside the Library folder
+    from data_layer import DATA_LAYER
+    from date_locale import LOCALE_TABLE
+    from docx_package import TEMPLATE_PACKAGE
+    from instrumentation import span
+    from settings import get_settings, normalize_tenant, tenant_schema
+    from template_registry import TEMPLATE_REGISTRY
+
+
+
+def render_docx(template_doc, record, output_file):
+    """Reemplaza los {placeholders} de un template con un registro y guarda el .docx.
+
+    Las partes que no cambian (imágenes, estilos, temas, fuentes) se toman ya
+    comprimidas de TEMPLATE_PACKAGE; sólo se serializa word/document.xml.
+    """
+    job = str(record.get("job", "Unknown"))
+    template_name = os.path.basename(template_doc) if isinstance(template_doc, str) else "template_registry"
+    package = TEMPLATE_PACKAGE.get(template_doc)
+    if package is not None:
+        with span("cv.template_load", template=template_name, shared=True):
+            doc = package.document()
+        substitute_placeholders(doc, record, job)
+        with span("cv.save", output=output_name_of(output_file), shared=True):
+            if package.write(doc, output_file):
+                return
+        # La sustitución agregó partes o relaciones: se renderiza con el paquete completo
+
+    with span("cv.template_load", template=template_name):
+        if hasattr(template_doc, "seek"):
+            template_doc.seek(0)  # BytesIO desde template_registry
+        doc = Document(template_doc)
+    substitute_placeholders(doc, record, job)
+    with span("cv.save", output=output_name_of(output_file)):
+        doc.save(output_file)
+
+
+def output_name_of(output_file):
+    return os.path.basename(output_file) if isinstance(output_file, str) else "memory"
+
+
+def substitute_placeholders(doc, record, job):
+    # 🔹 Reemplazar placeholders en párrafos con soporte para saltos de línea y bullets
+    with span("cv.substitute", job=job):
+        for p in doc.paragraphs:
+            for key in record:
+                placeholder = f"{{{key}}}"
+                if placeholder in p.text:
+                    value = str(record.get(key, "")).replace('\\n', '\n')
+                    parts = value.split('\n')
+
+                    # Reemplaza el placeholder por la primera línea
+                    p.text = p.text.replace(placeholder, parts[0])
+
+                    # Si hay más líneas, las inserta como nuevos párrafos con el mismo estilo
+                    if len(parts) > 1:
+                        p_element = p._element
+                        body_element = doc._body._element
+                        index = list(body_element).index(p_element)
+
+                        for part in parts[1:]:
+                            new_p = doc.add_paragraph(part, style=p.style.name)
+                            new_p_element = new_p._element
+                            body_element.remove(new_p_element)
+                            body_element.insert(index + 1, new_p_element)
+                            index += 1
+
+
+NULL_TEXTS = ("na", "Null", "None", "NULL")
+
+
+def clean_record_sql(alias):
+    """Subconsulta que convierte la fila `alias` en un objeto JSON de textos limpios.
+
+    NULL y las cadenas 'na'/'Null'/'None'/'NULL' quedan como '' (COALESCE en SQL),
+    así el render recibe un dict listo sin pasar por pandas.
+    """
+    null_texts = ", ".join(f"'{text}'" for text in NULL_TEXTS)
+    return f"""(
+        SELECT jsonb_object_agg(
+            e.key,
+            CASE WHEN e.value IN ({null_texts}) THEN '' ELSE COALESCE(e.value, '') END
+        )
+        FROM jsonb_each_text(to_jsonb({alias})) AS e
+    )"""
+
+
+def bundle_stem(job, company_name, lang, several_companies):
+    """Nombre de los documentos de una variante dentro del bundle de su job."""
+    return safe_filename(f"{job}_{company_name}_{lang}" if several_companies else f"{job}_{lang}")
+
+
+def clean_record(row):
+    """Lo mismo que clean_record_sql, en Python (réplica local SQLite, sin jsonb)."""
+    def as_text(value):
+        # Mismo texto que jsonb_each_text: true/false y arreglos como JSON
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if isinstance(value, (list, dict)):
+            return json.dumps(value, ensure_ascii=False)
+        return str(value)
+    return {key: "" if value is None or str(value) in NULL_TEXTS else as_text(value) for key, value in row.items()}
+
+
+APPLICATION_RECORD_QUERY = f"""
+    SELECT {clean_record_sql('a')} AS cv, {clean_record_sql('c')} AS cover_letter
+    FROM applications a
+    LEFT JOIN cover_letters c
+      ON c.job = a.job AND c.lang = a.lang AND c.company_name = a.company_name
+"""
+
+
+def safe_filename(name):
+    """Quita los caracteres que no se permiten en nombres de archivo/carpeta."""
+    return re.sub(r'[\\/:*?"<>|]+', '-', str(name)).strip() or "Unknown"
+
+
+def _render_variant(task):
+    """Worker de ProcessPoolExecutor: renderiza los documentos de un idioma."""
+    outputs = []
+    try:
+        for template, record, output_file in task["documents"]:
+            if isinstance(template, bytes):
+                template = io.BytesIO(template)  # template_registry
+            render_docx(template, record, output_file)
+            outputs.append(output_file)
+        return task["lang"], outputs, None
+    except Exception as e:
+        return task["lang"], outputs, str(e)
 
 
 class CV_GENERATION():
@@ -20,102 +157,139 @@ class CV_GENERATION():
         else:  # Linux or other
             subprocess.call(['xdg-open', folder_path])
         
-    def get_cv_files(self):
-        cv_files = [f for f in os.listdir(self.templates_path) if f.startswith('Curriculum') and f.endswith('.docx')]
-        print(cv_files)
-        connexion = self.sql_conexion(self.data_access['DB_URL']).connect()
-        query_langes = "SELECT lang FROM career_accelerator.languages"
-        df_languages = pd.read_sql(query_langes, connexion)
-        languages = list(df_languages['lang'].unique())
-        lenguages_cv = {}
-        # Detectar idioma de cada archivo basado en el nombre
-        for cv_file in cv_files:
-            # Extraer la parte del idioma: después de 'Curriculum_' y antes de '.docx'
-            parts = cv_file.replace('Curriculum_', '').replace('.docx', '').split('_')
-            detected_lang = parts[0]  # Toma la primera parte (e.g., 'French', 'English')
-  
-            # Verificar si el idioma detectado está en la lista de idiomas válidos
-            if detected_lang in languages:
-                lenguages_cv[cv_file] = detected_lang
-            else:
-                print(f"⚠️ Idioma '{detected_lang}' no encontrado en la lista de idiomas válidos para {cv_file}. Omitiendo.")
-        print(lenguages_cv)
-        # Insertar en la tabla career_accelerator.cv_files
-        if lenguages_cv:
-            try:
-                with connexion.connection.cursor() as cur:
-                    # Usar ON CONFLICT para evitar duplicados (asumiendo que cv_file es único)
-                    cur.executemany(
-                        """
-                        INSERT INTO career_accelerator.cv_files (cv_file, lang)
-                        VALUES (%s, %s)
-                        ON CONFLICT (cv_file) DO NOTHING;
-                        """,
-                        [(file, lang) for file, lang in lenguages_cv.items()]
-                    )
-                    connexion.commit()
-                print(f"✅ Insertados {len(lenguages_cv)} archivos en cv_files.")
-            except Exception as e:
-                print(f"❌ Error al insertar en cv_files: {e}")
-        else:
-            print("⚠️ No hay archivos válidos para insertar.")
-
-        connexion.close()
+    def get_cv_files(self, store_content=None):
+        """Sincroniza CV Templates con template_registry (y cv_files) de forma incremental."""
+        os.makedirs(self.templates_path, exist_ok=True)
+        try:
+            return self.template_registry.sync(store_content=store_content)
+        except Exception as e:
+            print(f"❌ Error al sincronizar templates: {e}")
+            return None
 
-    def postgre_to_docx(self):
+    def postgre_to_docx(self, input_date=None, application_id=None):
+        """Genera CV y carta de una aplicación; input_date es la fecha de la carta (hoy si es None)."""
         init(autoreset=True)
         print(f"{Fore.BLUE}CARRIER MANAGEMENT{Style.RESET_ALL}")
         
         os.makedirs(self.templates_path, exist_ok=True)
 
-        query = "SELECT * FROM career_accelerator.applications"
-        
-        connexion = self.sql_conexion(self.data_access['DB_URL']).connect()
-        if connexion is None:
-            print("❌ No se pudo establecer conexión con SQL Server.")
-            return False
-
         try:
-            self.df_applications = pd.read_sql(query, connexion)
-            self.df_cover_letters = pd.read_sql("SELECT * FROM career_accelerator.cover_letters", connexion)
-            connexion.close()
-            print(f"✅ Loaded applications: {len(self.df_applications)} registros.")
+            if application_id is None:
+                application_id = self.select_application()
+            if application_id is None:
+                return
         except Exception as e:
             print(f"❌ Error ejecutando la consulta SQL: {e}")
             return
+        self.render_application(application_id, input_date, open_files=True)
 
-        df_cv, df_cl = self.get_desired_row(self.df_applications, self.df_cover_letters)
-        lang = df_cv['lang'].values[0]
-        job = df_cv['job'].values[0]
-        if df_cv['cv_files'].values[0] is not None and df_cv['cv_files'].values[0] != '':
-            print(df_cv['cv_files'].head())
-            print(f"Generando CV con archivo vinculado...")
-            cv_file = df_cv['cv_files'].values[0]
-            cv_path = os.path.join(self.templates_path, cv_file)
-        else: 
-            cv_path = os.path.join(self.templates_path, f"Curriculum_{lang}.docx")
-        cover_letter_path = os.path.join(self.templates_path, f"Cover_letter_{lang}.docx")
-        output_cv = os.path.join(self.output_path, f"{job}_JACJ_CV.docx")
-        output_cl = os.path.join(self.output_path, f"{job}_JACJ_CLetter.docx")
-        if not os.path.exists(cv_path):
-            print(f"{Fore.RED}❌ No se encontró el template en: {cv_path}{Style.RESET_ALL}")
-            return
+    def render_application(self, application_id, input_date=None, documents=("cv", "cover_letter"), open_files=False):
+        """Genera los documentos pedidos de una aplicación en Output CVs; devuelve las rutas generadas."""
+        try:
+            cv_record, cl_record = self.fetch_application(application_id, input_date)
+        except Exception as e:
+            print(f"❌ Error ejecutando la consulta SQL: {e}")
+            return []
+        if cv_record is None:
+            print(f"❌ No existe la aplicación {application_id}.")
+            return []
 
-        if not os.path.exists(cover_letter_path):
-            print(f"{Fore.RED}❌ No se encontró el template en: {cover_letter_path}{Style.RESET_ALL}")
-            return
-        
-        # Selecciona template según modo
-        print(f"{Fore.CYAN}📄 Generando currículum...{Style.RESET_ALL}")
+        job = cv_record['job']
+        if cv_record.get('cv_files'):
+            print(f"Generando CV con archivo vinculado {cv_record['cv_files']}...")
+        # Mismo lugar y nombre que render_all_languages: una variante no pisa a otra del mismo job
+        bundle_path = os.path.join(self.output_path, safe_filename(job))
+        os.makedirs(bundle_path, exist_ok=True)
+        stem = self.application_stem(cv_record)
+        records = {"cv": cv_record, "cover_letter": cl_record}
+        suffixes = {"cv": "CV", "cover_letter": "CLetter"}
+        generated = []
+        for document in documents:
+            record = records[document]
+            if record is None:
+                print("⚠️ La aplicación no tiene carta registrada.")
+                continue
+            template_file = self.template_file(cv_record, document)
+            # Ruta local, o los bytes guardados en template_registry si no hay archivo
+            template = self.template_registry.open_template(template_file)
+            if template is None:
+                print(f"{Fore.RED}❌ No se encontró el template en: {os.path.join(self.templates_path, template_file)}{Style.RESET_ALL}")
+                return generated
+            label = "currículum" if document == "cv" else "carta"
+            print(f"{Fore.CYAN}📄 Generando {label}...{Style.RESET_ALL}")
+            output_file = os.path.join(bundle_path, f"{stem}_JACJ_{suffixes[document]}.docx")
+            if self.populate_document(template, record, output_file):
+                generated.append(output_file)
+                if open_files:
+                    self.open_word_path(output_file)
+        return generated
 
+    def render_all_languages(self, job, company_name=None, input_date=None, max_workers=None):
+        """Renderiza todas las variantes de idioma de un job en procesos paralelos.
+
+        Una sola consulta trae las aplicaciones del job (una por idioma) con su
+        carta; cada idioma se renderiza en un worker y todo queda en un bundle
+        (carpeta) por job dentro de Output CVs. Devuelve la ruta del bundle.
+        """
+        where = """
+            WHERE a.job = %(job)s
+              AND (%(company_name)s IS NULL OR a.company_name = %(company_name)s)
+            ORDER BY a.company_name, a.lang;
+        """
+        with span("cv.query", table="applications", mode="all_languages"):
+            variants = self.fetch_records(where, {"job": job, "company_name": company_name})
+        if not variants:
+            print(f"{Fore.RED}❌ No hay aplicaciones para '{job}'.{Style.RESET_ALL}")
+            return None
+
+        bundle_path = os.path.join(self.output_path, safe_filename(job))
+        os.makedirs(bundle_path, exist_ok=True)
+        several_companies = len({cv["company_name"] for cv, _ in variants}) > 1
+
+        def template_arg(template_file):
+            # Los BytesIO del registro viajan a los workers como bytes
+            template = self.template_registry.open_template(template_file)
+            return template.getvalue() if isinstance(template, io.BytesIO) else template
+
+        # Todas las variantes llevan la misma fecha: se formatea una vez por idioma
+        dates_issued = {lang: self.format_date_issued(lang, input_date) for lang in {cv["lang"] for cv, _ in variants}}
+        tasks = []
+        for variant, cover_letter in variants:
+            lang = variant["lang"]
+            date_issued = dates_issued[lang]
+            stem = bundle_stem(job, variant["company_name"], lang, several_companies)
+
+            cv_template = template_arg(self.template_file(variant))
+            if cv_template is None:
+                print(f"{Fore.RED}❌ No se encontró el template de CV para {lang}. Omitiendo.{Style.RESET_ALL}")
+                continue
+            documents = [(cv_template, {**variant, "date_issued": date_issued},
+                          os.path.join(bundle_path, f"{stem}_JACJ_CV.docx"))]
+
+            cl_template = template_arg(self.template_file(variant, "cover_letter"))
+            if cover_letter and cl_template is not None:
+                documents.append((cl_template, {**cover_letter, "date_issued": date_issued},
+                                  os.path.join(bundle_path, f"{stem}_JACJ_CLetter.docx")))
+            elif cover_letter:
+                print(f"⚠️ No se encontró Cover_letter_{lang}.docx; se genera sólo el CV.")
+            tasks.append({"lang": lang, "documents": documents})
+
+        workers = min(len(tasks), max_workers or os.cpu_count() or 1)
+        with span("cv.render_all_languages", job=job, languages=len(tasks), workers=workers):
+            if workers <= 1:
+                results = [_render_variant(task) for task in tasks]
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    results = list(executor.map(_render_variant, tasks))
+
+        for lang, outputs, error in results:
+            if error:
+                print(f"{Fore.RED}❌ Error generando {job} ({lang}): {error}{Style.RESET_ALL}")
+            for output_file in outputs:
+                print(f"{Fore.GREEN}✅ {lang}: {os.path.basename(output_file)}{Style.RESET_ALL}")
+        print(f"{Fore.CYAN}📦 Bundle de '{job}': {bundle_path}{Style.RESET_ALL}")
+        return bundle_path
 
-        self.populate_document(cv_path, df_cv, output_cv)
-        self.open_word_path(output_cv)
-        print(f"{Fore.CYAN}📄 Generando carta...{Style.RESET_ALL}")
-        
-        self.populate_document(cover_letter_path, df_cl, output_cl)
-        self.open_word_path(output_cl)
-        
     def open_word_path(self, path):
         """Open a file in the default application, cross-platform."""
         if os.name == 'nt':
@@ -125,47 +299,30 @@ class CV_GENERATION():
         else:
             subprocess.call(['xdg-open', path])
 
-    def populate_document(self, template_doc, df, output_file):
-        for _, row in df.iterrows():
-            job = str(row.get("job", "Unknown"))
-            try:
-                doc = Document(template_doc)
-
-                # 🔹 Reemplazar placeholders en párrafos con soporte para saltos de línea y bullets
-                for p in doc.paragraphs:
-                    for key in df.columns:
-                        placeholder = f"{{{key}}}"
-                        if placeholder in p.text:
-                            value = str(row.get(key, "")).replace('\\n', '\n')
-                            parts = value.split('\n')
-
-                            # Reemplaza el placeholder por la primera línea
-                            p.text = p.text.replace(placeholder, parts[0])
-
-                            # Si hay más líneas, las inserta como nuevos párrafos con el mismo estilo
-                            if len(parts) > 1:
-                                p_element = p._element
-                                body_element = doc._body._element
-                                index = list(body_element).index(p_element)
-
-                                for part in parts[1:]:
-                                    new_p = doc.add_paragraph(part, style=p.style.name)
-                                    new_p_element = new_p._element
-                                    body_element.remove(new_p_element)
-                                    body_element.insert(index + 1, new_p_element)
-                                    index += 1
-                doc.save(output_file)
-                doc_type = "Carta" if "CLetter" in output_file else "Curriculum"
-                print(f"{Fore.GREEN}✅ {doc_type} generado: {output_file}{Style.RESET_ALL}")
-
-            except Exception as e:
-                print(f"{Fore.RED}❌ Error generando {job}: {e}{Style.RESET_ALL}")
+    def populate_document(self, template_doc, record, output_file):
+        job = str(record.get("job", "Unknown"))
+        try:
+            render_docx(template_doc, record, output_file)
+            doc_type = "Carta" if "CLetter" in output_file else "Curriculum"
+            print(f"{Fore.GREEN}✅ {doc_type} generado: {output_file}{Style.RESET_ALL}")
+            return True
+        except Exception as e:
+            print(f"{Fore.RED}❌ Error generando {job}: {e}{Style.RESET_ALL}")
+            return False
          
-    def get_desired_row(self, df_cv, df_cl):
-        columns_pk = ['job', 'lang', 'company_name']
-        max_length = len(df_cv)
-        for index, row in df_cv.iterrows():
-            print(f"{index} - {row[columns_pk]}")
+    def select_application(self):
+        """Lista las aplicaciones (sólo su llave) y pide cuál generar; devuelve application_id."""
+        with span("cv.query", table="applications", mode="keys"):
+            with self.db.cursor() as cur:
+                cur.execute("SELECT application_id, job, lang, company_name FROM applications ORDER BY application_id;")
+                keys = cur.fetchall()
+        if not keys:
+            print("⚠️ No hay aplicaciones registradas.")
+            return None
+        print(f"✅ Loaded applications: {len(keys)} registros.")
+        for index, (_, job, lang, company_name) in enumerate(keys):
+            print(f"{index} - {job} | {lang} | {company_name}")
+        max_length = len(keys)
         while True:
             selected_indices = input("Ingrese la fila que requieres para generar el cv")
             try:
@@ -176,98 +333,99 @@ class CV_GENERATION():
                     print(f"Por favor, ingrese un número entre 0 y {max_length - 1}")
             except ValueError:
                 print("Por favor, ingrese un número entero válido")
-        selected_row = df_cv.iloc[[selected_index]]
-        # 🔹 Filtrar df_cl donde job, lang y company_name coincidan
-        match_mask = (
-            (df_cl["job"] == selected_row["job"].values[0]) &
-            (df_cl["lang"] == selected_row["lang"].values[0]) &
-            (df_cl["company_name"] == selected_row["company_name"].values[0])
-        )
-        df_cl_match = df_cl.loc[match_mask]
-
-        print("Ingresa la fecha que quieras que aparezca en la carta (formato DD/MM/AAAA): \n")
-        str_date = input('DD/MM/AAAA: ')
-        input_date = datetime.strptime(str_date, '%d/%m/%Y') if str_date else None
-        lang = selected_row['lang'].values[0]
-        if input_date:
-            day = input_date.day
-            month_num = input_date.month
-            year = input_date.year
-
-            months = {
-                'English': ["January", "February", "March", "April", "May", "June",
-                            "July", "August", "September", "October", "November", "December"],
-                'Spanish': ["enero", "febrero", "marzo", "abril", "mayo", "junio",
-                            "julio", "agosto", "septiembre", "octubre", "noviembre", "diciembre"],
-                'French': ["janvier", "février", "mars", "avril", "mai", "juin",
-                        "juillet", "août", "septembre", "octobre", "novembre", "décembre"]
-            }
-            
-            if lang == 'English':
-                suffix = 'th'
-                if day in [1, 21, 31]:
-                    suffix = 'st'
-                elif day in [2, 22]:
-                    suffix = 'nd'
-                elif day in [3, 23]:
-                    suffix = 'rd'
-                date_issued = f"Mexico City, {months['English'][month_num-1]} {day}{suffix}, {year}"
-
-            elif lang == 'Spanish':
-                date_issued = f"Ciudad de México, {day} de {months['Spanish'][month_num-1].capitalize()} de {year}"
-
-            elif lang == 'French':
-                date_issued = f"Mexico, le {day} {months['French'][month_num-1].capitalize()} {year}"
+        return keys[selected_index][0]
 
-            else:
-                date_issued = input_date.strftime('%d/%m/%Y')
-        else:
-            date_issued = datetime.today().strftime('%d/%m/%Y')
+    def fetch_application(self, application_id, input_date=None):
+        """(cv_record, cl_record) de una aplicación como dicts, con NULLs ya normalizados."""
+        with span("cv.query", table="applications", mode="by_pk"):
+            rows = self.fetch_records(" WHERE a.application_id = %s;", (application_id,))
+        if not rows:
+            return None, None
+        cv_record, cl_record = rows[0]
+        date_issued = self.format_date_issued(cv_record['lang'], input_date)
+        cv_record['date_issued'] = date_issued
+        if cl_record is not None:
+            cl_record['date_issued'] = date_issued
+        return cv_record, cl_record
+
+    def fetch_records(self, where, params):
+        """[(cv_record, cl_record)] de las aplicaciones que cumplen `where` (WHERE ... sobre `a`)."""
+        if not self.db.local_ready():
+            with self.db.cursor() as cur:
+                cur.execute(APPLICATION_RECORD_QUERY + where, params)
+                return cur.fetchall()
+        # Réplica local: misma consulta sin funciones jsonb; la limpieza se hace en Python
+        records = []
+        with self.db.cursor() as cur:
+            cur.execute("SELECT a.* FROM applications a" + where, params)
+            columns = [column.name for column in cur.description]
+            applications = [dict(zip(columns, row)) for row in cur.fetchall()]
+            for application in applications:
+                cur.execute(
+                    "SELECT * FROM cover_letters WHERE job = %s AND lang = %s AND company_name = %s;",
+                    (application["job"], application["lang"], application["company_name"]),
+                )
+                row = cur.fetchone()
+                letter = dict(zip([column.name for column in cur.description], row)) if row else None
+                records.append((clean_record(application), clean_record(letter) if letter else None))
+        return records
 
+    def application_stem(self, cv_record):
+        """bundle_stem de una aplicación; incluye la company si el job tiene varias (como render_all_languages)."""
+        with self.db.read_cursor() as cur:
+            cur.execute("SELECT count(DISTINCT company_name) FROM applications WHERE job = %s;", (cv_record["job"],))
+            several_companies = cur.fetchone()[0] > 1
+        return bundle_stem(cv_record["job"], cv_record["company_name"], cv_record["lang"], several_companies)
+
+    def rendered_file(self, cv_record, document="cv"):
+        """.docx ya generado para esta aplicación (job, company e idioma) en su bundle, o None."""
+        suffix = "CLetter" if document == "cover_letter" else "CV"
+        bundle_path = os.path.join(self.output_path, safe_filename(cv_record["job"]))
+        for several_companies in (True, False):
+            stem = bundle_stem(cv_record["job"], cv_record["company_name"], cv_record["lang"], several_companies)
+            path = os.path.join(bundle_path, f"{stem}_JACJ_{suffix}.docx")
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def template_file(self, cv_record, document="cv"):
+        """Template de la aplicación: su cv_files vinculado o el default del idioma."""
+        if document == "cover_letter":
+            return f"Cover_letter_{cv_record['lang']}.docx"
+        return cv_record.get('cv_files') or f"Curriculum_{cv_record['lang']}.docx"
+
+    def format_date_issued(self, lang, input_date=None):
+        """Fecha de la carta según el formato del idioma en la tabla languages."""
+        return LOCALE_TABLE.get(self.db, lang).format(input_date or datetime.today())
 
-        # Agregar al DataFrame
-        selected_row['date_issued'] = date_issued
-        df_cl_match['date_issued'] = date_issued
-        selected_row = selected_row.fillna('').replace({'na': '', 'Null': '', 'None': '', 'NULL': ''})
-        df_cl_match = df_cl_match.fillna('').replace({'na': '', 'Null': '', 'None': '', 'NULL': ''})
-        return selected_row, df_cl_match
-    
     def sql_conexion(self, sql_url):
         try:
-            engine = create_engine(sql_url)
-            return engine
+            # Engine compartido por tenant (pool + search_path del schema)
+            return DATA_LAYER(sql_url, self.schema).engine()
         except Exception as e:
             print(f"❌ Error connecting to database: {e}")
             return None
     # Initialize the main components
-    def __init__(self, working_folder, data_access):
+    def __init__(self, working_folder, data_access, tenant=None, offline=False, session=None):
         self.working_folder = working_folder
         os.makedirs(self.working_folder, exist_ok=True)
         self.data_access = data_access
-        self.output_path = os.path.join(self.working_folder, "Output CVs")
+        self.tenant = normalize_tenant(tenant)
+        self.schema = tenant_schema(data_access['db_structure']['schema_name'], self.tenant)
+        # Cada tenant tiene sus propias carpetas de templates y salidas
+        tenant_parts = [self.tenant] if self.tenant else []
+        self.output_path = os.path.join(self.working_folder, "Output CVs", *tenant_parts)
         os.makedirs(self.output_path, exist_ok=True)
-        self.templates_path = os.path.join(self.working_folder, "CV Templates")
+        self.templates_path = os.path.join(self.working_folder, "CV Templates", *tenant_parts)
+        # offline=True (sólo Streamlit): con CAREER_LOCAL_REPLICA las consultas van a la réplica SQLite
+        # session: la de Streamlit, para que la página lea sus propias escrituras (réplicas)
+        self.db = DATA_LAYER.for_tenant(data_access, self.tenant, session=session, offline=offline)
+        self.template_registry = TEMPLATE_REGISTRY(self.db, self.templates_path)
         
 if __name__ == "__main__":
-    env_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    env_file = os.path.join(env_path, '.env')
-    folder_name = "MAIN_PATH"
-    db_key = "DB_URL"
-    
-    working_folder = "."
-    pg_dict = {}
-
-    if os.path.exists(env_file):
-        load_dotenv(dotenv_path=env_file)
-        working_folder = os.getenv(folder_name)
-        pg_dict = {"DB_URL": os.getenv(db_key)} 
-
-    yaml_path = os.path.join(env_path, 'config', 'config.yml')
-    with open(yaml_path, 'r') as file:
-        data_access = yaml.safe_load(file)
-        if data_access is None:
-            data_access = {}
-        data_access.update(pg_dict)  # ⚠️ Esto solo funciona si data_access es una lista
-
-    app = CV_GENERATION(working_folder, data_access)
+    settings = get_settings()
+    working_folder = str(settings.working_folder or ".")
+    data_access = settings.data_access
+
+    app = CV_GENERATION(working_folder, data_access, settings.default_tenant)
     app.postgre_to_docx()
\ No newline at end of file
@@ -1,5 +1,4 @@
 import os
-from dotenv import load_dotenv
 from colorama import Fore, Style, init
 from sqlalchemy import create_engine, text
 from datetime import date
@@ -8,12 +7,111 @@ from urllib.parse import urlparse
 import psycopg2
 import sys
 import subprocess
+try:
+    from Library.instrumentation import span
+    from Library.settings import resolve_structure, tenant_schema
+except ModuleNotFoundError:
+    # fallback if running inside the Library folder
+    from instrumentation import span
+    from settings import resolve_structure, tenant_schema
+
+SQL_PATH = os.path.join(os.path.dirname(__file__), "..", "SQL")
+MIGRATIONS_PATH = os.path.join(SQL_PATH, "migrations")
+
+
+def split_sql(sql_content):
+    """Divide un script en sentencias respetando los bloques $$ y saltando comentarios."""
+    statements = []
+    current_stmt = []
+    inside_function = False
+    for line in sql_content.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("--"):
+            continue
+        if "$$" in stripped:
+            inside_function = not inside_function
+            current_stmt.append(line)
+            # '$$ LANGUAGE plpgsql;' cierra la función y la sentencia
+            if not inside_function and stripped.endswith(";"):
+                statements.append("\n".join(current_stmt).strip())
+                current_stmt = []
+            continue
+        if not inside_function and stripped.endswith(";"):
+            current_stmt.append(line)
+            statements.append("\n".join(current_stmt).strip())
+            current_stmt = []
+        else:
+            current_stmt.append(line)
+    if current_stmt:
+        statements.append("\n".join(current_stmt).strip())
+    return statements
+
+
+def render_sql(statements, resolved):
+    """Reemplaza los placeholders {key} resueltos de db_structure."""
+    rendered_statements = []
+    for stmt in statements:
+        for key, value in resolved.items():
+            stmt = stmt.replace(f"{{{key}}}", value)
+        rendered_statements.append(stmt)
+    return rendered_statements
+
+
+def read_sql_file(path, resolved):
+    with open(path, "r", encoding="utf-8") as f:
+        return render_sql(split_sql(f.read()), resolved)
+
+
+def apply_migrations(conn, resolved, schema_name):
+    """Aplica en orden los SQL/migrations/*.sql pendientes del schema.
+
+    Cada migración corre en su propia transacción: si una sentencia falla no
+    queda a medias y no se aplican las siguientes. Devuelve las aplicadas.
+    """
+    if not os.path.isdir(MIGRATIONS_PATH):
+        return []
+    autocommit = conn.autocommit
+    conn.autocommit = False
+    applied = []
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"CREATE TABLE IF NOT EXISTS {schema_name}.schema_migrations ("
+                "version TEXT PRIMARY KEY, applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);"
+            )
+            cur.execute(f"SELECT version FROM {schema_name}.schema_migrations;")
+            done = {row[0] for row in cur.fetchall()}
+        conn.commit()
+        for filename in sorted(os.listdir(MIGRATIONS_PATH)):
+            version = os.path.splitext(filename)[0]
+            if not filename.endswith(".sql") or version in done:
+                continue
+            statements = read_sql_file(os.path.join(MIGRATIONS_PATH, filename), resolved)
+            print(f"{Fore.YELLOW}🔀 Aplicando migración {version} ({len(statements)} sentencias)...{Style.RESET_ALL}")
+            try:
+                with conn.cursor() as cur:
+                    with span("init.migration", version=version):
+                        for stmt in statements:
+                            cur.execute(stmt)
+                    cur.execute(f"INSERT INTO {schema_name}.schema_migrations (version) VALUES (%s);", (version,))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"{Fore.RED}❌ La migración {version} falló y se revirtió: {e}{Style.RESET_ALL}")
+                break
+            applied.append(version)
+            print(f"{Fore.GREEN}✅ Migración {version} aplicada.{Style.RESET_ALL}")
+    finally:
+        conn.autocommit = autocommit
+    return applied
+
 
 class INITIALIZE:
     def __init__(self):
         print(f"{Fore.BLUE}CLASS INITIALIZE{Style.RESET_ALL}")
 
-    def initialize_postgres_db(self, data_access, working_folder):
+    def initialize_postgres_db(self, data_access, working_folder, tenant=None, launch_streamlit=True):
+        """Crea el schema (el del tenant si se indica) y sus tablas."""
         print(f"{Fore.BLUE}INICIALIZANDO BASE DE DATOS PostgreSQL{Style.RESET_ALL}")
         self.today = date.today()
 
@@ -42,7 +140,7 @@ class INITIALIZE:
 
         # Leer el resto del script
         file_path = os.path.dirname(__file__)
-        sql_path = os.path.join(file_path, "..", "SQL", "initializing.sql")
+        sql_path = os.path.join(SQL_PATH, "initializing.sql")
 
         if not os.path.exists(sql_path):
             print(f"❌ SQL file not found: {sql_path}")
@@ -50,46 +148,18 @@ class INITIALIZE:
             return False
 
         try:
-            with open(sql_path, "r", encoding="utf-8") as f:
-                sql_content = f.read()
             # Diccionario db_structure del yaml 
             dict_db = data_access['db_structure']
-            # Extracción de los placeholders anidados
-            resolved = {}
-            for key, value in dict_db.items():
-                if isinstance(value, str):
-                    temp = value
-                    for inner_key, inner_value in dict_db.items():
-                        if isinstance(inner_value, str):
-                            temp = temp.replace(f"{{{inner_key}}}", inner_value)
-                    resolved[key] = temp.strip()
-            # Dividir respetando $$, ignorar comentarios
-            statements = []
-            current_stmt = []
-            inside_function = False
-            for line in sql_content.splitlines():
-                stripped = line.strip()
-                if not stripped or stripped.startswith("--"):
-                    continue
-                if "$$" in stripped:
-                    inside_function = not inside_function
-                    current_stmt.append(line)
-                    continue
-                if not inside_function and stripped.endswith(";"):
-                    current_stmt.append(line)
-                    statements.append("\n".join(current_stmt).strip())
-                    current_stmt = []
-                else:
-                    current_stmt.append(line)
-            if current_stmt:
-                statements.append("\n".join(current_stmt).strip())
-            # después, reemplazar todos los placeholders del SQL
-            rendered_statements = []
-            for stmt in statements:
-                for key, value in resolved.items():
-                    stmt = stmt.replace(f"{{{key}}}", value)
-                rendered_statements.append(stmt)
-            statements = rendered_statements
+            schema_name = tenant_schema(dict_db['schema_name'], tenant)
+            if schema_name == dict_db['schema_name'] and data_access.get("resolved_structure"):
+                # Placeholders anidados ya resueltos (cacheados en Settings)
+                resolved = data_access["resolved_structure"]
+            else:
+                # Tenant: cada usuario tiene su propio schema
+                dict_db = {**dict_db, 'schema_name': schema_name}
+                resolved = resolve_structure(dict_db)
+            # Dividir respetando $$, ignorar comentarios; después reemplazar placeholders
+            statements = read_sql_file(sql_path, resolved)
             print(f"🛠️ Executing {len(statements)} statements from {os.path.basename(sql_path)} ...")
 
 
@@ -98,12 +168,22 @@ class INITIALIZE:
                     print(f"{Fore.YELLOW}▶️  Executing statement {i}/{len(statements)}...{Style.RESET_ALL}")
                     print(f"🧾  {stmt[:60].replace(chr(10),' ')}...")  # muestra inicio del query
                     print(stmt)
-                    cur.execute(stmt)
+                    with span("init.statement", index=i, total=len(statements)):
+                        cur.execute(stmt)
                 except Exception as e:
                     print(f"{Fore.RED}❌ Error in statement {i}: {e}{Style.RESET_ALL}")
                     print(f"--- SQL ---\n{stmt[:400]}...\n")
                     continue
 
+            # Migraciones pendientes y, al final, los triggers sobre las tablas base
+            apply_migrations(raw_conn, resolved, schema_name)
+            for i, stmt in enumerate(read_sql_file(os.path.join(SQL_PATH, "triggers.sql"), resolved), 1):
+                try:
+                    with span("init.statement", index=i, script="triggers.sql"):
+                        cur.execute(stmt)
+                except Exception as e:
+                    print(f"{Fore.RED}❌ Error conectando triggers: {e}{Style.RESET_ALL}")
+
             # Listar tablas creadas
             print(f"{Fore.CYAN}📋 Current tables in '{dict_db['schema_name']}':{Style.RESET_ALL}")
             cur.execute(f"SELECT tablename FROM pg_tables WHERE schemaname = '{dict_db['schema_name']}';")
@@ -118,6 +198,9 @@ class INITIALIZE:
         raw_conn.close()
         print(f"{Fore.GREEN}🎯 Initialization complete and connection closed.{Style.RESET_ALL}")
 
+        if not launch_streamlit:
+            return True
+
         streamlit_path = os.path.join(file_path, "concept_filing.py")
         try:
             subprocess.run([sys.executable, "-m", "streamlit", "run", streamlit_path], check=True)
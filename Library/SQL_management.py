@@ -1,6 +1,4 @@
 import os
-from sqlalchemy import create_engine
-import yaml
 from datetime import date, datetime
 import pandas as pd
 import glob
@@ -12,15 +10,18 @@ from dateutil.relativedelta import relativedelta
 
 try:
     from Library.SQL_initialize import INITIALIZE
+    from Library.data_layer import DATA_LAYER
+    from Library.settings import get_settings, normalize_tenant, tenant_schema
 except ModuleNotFoundError:
     # fallback if running inside the Library folder
     from SQL_initialize import INITIALIZE
-from dotenv import load_dotenv
+    from data_layer import DATA_LAYER
+    from settings import get_settings, normalize_tenant, tenant_schema
 
 
 class CSV_TO_SQL:
     def csv_to_sql_process(self):
-        query = "SELECT * FROM carrier_accelerator.companies" # Query inicial
+        query = "SELECT * FROM companies" # Query inicial (schema del tenant vía search_path)
         # 1️⃣ Conectar
         connexion = self.sql_conexion(self.data_access['DB_URL']).connect()
         if connexion is None:
@@ -38,10 +39,11 @@ class CSV_TO_SQL:
 
             # Si la tabla no existe
             if "UndefinedTable" in error_msg or "does not exist" in error_msg:
-                print("⚠️ Table 'banorte_load.accounts' not found.")
+                print(f"⚠️ Table '{self.schema}.companies' not found.")
                 print("🛠️ Running INITIALIZE().initialize_postgres_db() to create schema and tables...")
                 initializer = INITIALIZE()
-                initializer.initialize_postgres_db(self.data_access, self.working_folder)
+                initializer.initialize_postgres_db(self.data_access, self.working_folder, tenant=self.tenant)
+                self.db.note_write()
 
                 # Reintento
                 try:
@@ -53,10 +55,11 @@ class CSV_TO_SQL:
 
             # Si el esquema no existe
             elif "InvalidSchemaName" in error_msg or "schema" in error_msg.lower():
-                print("⚠️ Schema 'banorte_load' not found.")
+                print(f"⚠️ Schema '{self.schema}' not found.")
                 print("🛠️ Running INITIALIZE().initialize_postgres_db() to create schema and tables...")
                 initializer = INITIALIZE()
-                initializer.initialize_postgres_db(self.data_access, self.working_folder)
+                initializer.initialize_postgres_db(self.data_access, self.working_folder, tenant=self.tenant)
+                self.db.note_write()
 
                 # Reintento
                 try:
@@ -76,36 +79,27 @@ class CSV_TO_SQL:
 
     def sql_conexion(self, sql_url):
         try:
-            engine = create_engine(sql_url)
-            return engine
+            # Engine compartido por tenant (pool + search_path del schema)
+            return DATA_LAYER(sql_url, self.schema).engine()
         except Exception as e:
             print(f"❌ Error connecting to database: {e}")
             return None
         
-    def __init__(self, working_folder, data_access):
+    def __init__(self, working_folder, data_access, tenant=None, session=None):
         self.today = date.today()
         self.working_folder = working_folder
         self.data_access = data_access
+        self.tenant = normalize_tenant(tenant)
+        self.schema = tenant_schema(data_access['db_structure']['schema_name'], self.tenant)
+        # Las escrituras (INITIALIZE) se registran en `session` para leerlas después del primario
+        self.db = DATA_LAYER.for_tenant(data_access, self.tenant, session=session)
         self.current_folder = os.path.join(self.working_folder,'Info Bancaria', f'{self.today.year}-{self.today.month:02d}')
         self.closed_folder = os.path.join(self.working_folder,'Info Bancaria', 'Meses cerrados', 'Repositorio por mes')
         
 if __name__ == "__main__":
-    env_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    env_file = os.path.join(env_path, '.env')
-    folder_name = "MAIN_PATH"
-    db_key = "DB_URL"
-    
-    if os.path.exists(env_file):
-        load_dotenv(dotenv_path=env_file)
-        working_folder = os.getenv(folder_name)
-        pg_dict = {"DB_URL": os.getenv(db_key)}  # ✅ dict correcto, no set
+    settings = get_settings()
+    working_folder = str(settings.working_folder or ".")
+    data_access = settings.data_access
 
-    yaml_path = os.path.join(env_path, 'config', 'config.yml')
-    with open(yaml_path, 'r') as file:
-        data_access = yaml.safe_load(file)
-        if data_access is None:
-            data_access = {}
-        data_access.update(pg_dict)  # ⚠️ Esto solo funciona si data_access es una lista
-
-    app = CSV_TO_SQL(working_folder, data_access)
+    app = CSV_TO_SQL(working_folder, data_access, settings.default_tenant)
     app.csv_to_sql_process()
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""Regenera documentos cuando cambian applications / cover_letters (LISTEN/NOTIFY).
+
+Uso:
+    python -m Library.cdc_listener                 # todos los tenants
+    python -m Library.cdc_listener --tenant ana --debounce 3
+
+Los triggers de SQL/initializing.sql publican cada cambio en el canal
+'career_changes'. El daemon junta los eventos de una misma aplicación durante
+la ventana de debounce y regenera sólo los documentos afectados en Output CVs.
+Sin cambios pendientes se queda bloqueado en select() sin consultar la base.
+"""
+import argparse
+import json
+import os
+import select
+import time
+
+from colorama import Fore, Style, init
+
+try:
+    from Library.CV_generation import CV_GENERATION
+    from Library.instrumentation import span
+    from Library.settings import bootstrap, normalize_tenant
+except ModuleNotFoundError:
+    # fallback if running inside the Library folder
+    from CV_generation import CV_GENERATION
+    from instrumentation import span
+    from settings import bootstrap, normalize_tenant
+
+CHANNEL = "career_changes"
+DEBOUNCE_ENV = "CAREER_CDC_DEBOUNCE"
+DEFAULT_DEBOUNCE_S = 2.0
+RECONNECT_MAX_S = 60.0
+# Tabla que cambió -> documento que hay que regenerar
+TABLE_DOCUMENTS = {"applications": "cv", "cover_letters": "cover_letter"}
+
+
+class CDC_LISTENER:
+    """Daemon LISTEN/NOTIFY con debounce por aplicación."""
+
+    def __init__(self, settings, tenant=None, debounce_s=None):
+        self.settings = settings
+        self.base_schema = settings.schema_name
+        # None = escucha todos los tenants de la base
+        self.only_schema = settings.schema_for(tenant) if tenant else None
+        self.debounce_s = debounce_s if debounce_s is not None else float(os.getenv(DEBOUNCE_ENV, DEFAULT_DEBOUNCE_S))
+        # {(schema, application_id) o (schema, job, lang, company_name): [deadline, {documentos}]}
+        self.pending = {}
+        self._generators = {}
+        self.conn = None
+
+    def tenant_of(self, schema):
+        """Tenant dueño de un schema; False si el schema no es de esta app."""
+        if schema == self.base_schema:
+            return None
+        prefix = f"{self.base_schema}_"
+        if schema.startswith(prefix):
+            try:
+                return normalize_tenant(schema[len(prefix):])
+            except ValueError:
+                return False
+        return False
+
+    def generator(self, tenant):
+        if tenant not in self._generators:
+            self._generators[tenant] = CV_GENERATION(str(self.settings.working_folder), self.settings.data_access, tenant)
+        return self._generators[tenant]
+
+    # ===== Conexión =====
+    def connect(self):
+        import psycopg2
+        # Conexión dedicada (no del pool): LISTEN vive mientras viva la sesión
+        self.conn = psycopg2.connect(self.settings.db_url)
+        self.conn.autocommit = True
+        with self.conn.cursor() as cur:
+            cur.execute(f"LISTEN {CHANNEL};")
+        print(f"{Fore.GREEN}👂 Escuchando '{CHANNEL}' (debounce {self.debounce_s:g}s){Style.RESET_ALL}")
+
+    def close(self):
+        if self.conn is not None and not self.conn.closed:
+            self.conn.close()
+        self.conn = None
+
+    # ===== Eventos =====
+    def queue_event(self, payload):
+        try:
+            event = json.loads(payload)
+        except json.JSONDecodeError:
+            print(f"⚠️ Aviso ignorado (payload inválido): {payload[:80]}")
+            return
+        schema = event.get("schema")
+        if self.only_schema and schema != self.only_schema:
+            return
+        if self.tenant_of(schema) is False:
+            return
+        document = TABLE_DOCUMENTS.get(event.get("table"))
+        if document is None:
+            return
+        if event.get("op") == "DELETE":
+            print(f"🗑️ {event['table']} borrada: {event.get('job')} ({event.get('lang')}); no se regenera.")
+            return
+        if event.get("application_id") is not None:
+            key = (schema, event["application_id"])
+        else:
+            # cover_letters con llaves TEXT (antes de la migración 001)
+            key = (schema, event.get("job"), event.get("lang"), event.get("company_name"))
+        deadline = time.monotonic() + self.debounce_s
+        entry = self.pending.setdefault(key, [deadline, set()])
+        entry[0] = deadline  # cada evento nuevo reinicia la ventana
+        entry[1].add(document)
+
+    def drain_notifies(self):
+        self.conn.poll()
+        while self.conn.notifies:
+            self.queue_event(self.conn.notifies.pop(0).payload)
+
+    def next_timeout(self):
+        """Segundos hasta el próximo debounce vencido; None = bloquear sin límite."""
+        if not self.pending:
+            return None
+        return max(0.0, min(entry[0] for entry in self.pending.values()) - time.monotonic())
+
+    def flush_due(self):
+        now = time.monotonic()
+        due = [key for key, entry in self.pending.items() if entry[0] <= now]
+        for key in due:
+            _, documents = self.pending.pop(key)
+            self.regenerate(key, documents)
+
+    def application_id_of(self, generator, key):
+        if len(key) == 2:
+            return key[1]
+        _, job, lang, company_name = key
+        with generator.db.cursor() as cur:
+            cur.execute(
+                "SELECT application_id FROM applications WHERE job = %s AND lang = %s AND company_name = %s;",
+                (job, lang, company_name),
+            )
+            row = cur.fetchone()
+        return row[0] if row else None
+
+    def regenerate(self, key, documents):
+        schema = key[0]
+        generator = self.generator(self.tenant_of(schema))
+        with span("cdc.regenerate", schema=schema, documents=len(documents)):
+            try:
+                application_id = self.application_id_of(generator, key)
+            except Exception as e:
+                print(f"{Fore.RED}❌ Error buscando la aplicación {key[1:]}: {e}{Style.RESET_ALL}")
+                return
+            if application_id is None:
+                return  # se borró dentro de la ventana de debounce
+            # Orden estable: CV antes que la carta
+            ordered = [doc for doc in ("cv", "cover_letter") if doc in documents]
+            outputs = generator.render_application(application_id, documents=ordered)
+        for output in outputs:
+            print(f"{Fore.GREEN}🔄 Regenerado: {output}{Style.RESET_ALL}")
+
+    # ===== Loop =====
+    def run(self):
+        init(autoreset=True)
+        backoff = 1.0
+        while True:
+            try:
+                if self.conn is None:
+                    self.connect()
+                    backoff = 1.0
+                readable, _, _ = select.select([self.conn], [], [], self.next_timeout())
+                if readable:
+                    self.drain_notifies()
+                self.flush_due()
+            except KeyboardInterrupt:
+                print("👋 Listener detenido.")
+                self.close()
+                return
+            except Exception as e:
+                # Conexión caída: reconectar con backoff; los pendientes se conservan
+                print(f"{Fore.RED}❌ Listener desconectado: {e}. Reintentando en {backoff:g}s{Style.RESET_ALL}")
+                self.close()
+                time.sleep(backoff)
+                backoff = min(backoff * 2, RECONNECT_MAX_S)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tenant", default=None, help="escuchar sólo el schema de este tenant")
+    parser.add_argument("--debounce", type=float, default=None, help="segundos de espera tras el último cambio")
+    args = parser.parse_args()
+    CDC_LISTENER(bootstrap(), tenant=args.tenant, debounce_s=args.debounce).run()
@@ -1,3 +1,27 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    from Library.instrumentation import span
+except ModuleNotFoundError:
+    # fallback if running inside the Library folder
+    from instrumentation import span
+
+# Binarios ya instalados (servidores / CI): se saltan la instalación interactiva
+CHROME_BINARY_ENV = "CAREER_CHROME_BINARY"
+CHROMEDRIVER_ENV = "CAREER_CHROMEDRIVER"
+# Tamaño del pool y límites de reciclado de cada sesión
+POOL_SIZE_ENV = "CAREER_CHROME_POOL"
+MAX_PAGES_ENV = "CAREER_CHROME_MAX_PAGES"
+MAX_RSS_ENV = "CAREER_CHROME_MAX_RSS_MB"
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_PAGES = 50
+DEFAULT_MAX_RSS_MB = 1024
+
+
 class CHROME_HELPER:
     @staticmethod
     def install_chromedriver():
@@ -35,6 +59,12 @@ class CHROME_HELPER:
                 "MacOS",
                 "Google Chrome for Testing",
             ]
+        elif system == "Linux":
+            target_dir = os.path.join(home, "chrome_testing")
+            chromedriver_prefix = "chromedriver-linux64"
+            chrome_prefix = "chrome-linux64"
+            chromedriver_exe = "chromedriver"
+            chrome_relative_parts = [chrome_prefix, "chrome"]
         else:
             print(f"❌ Unsupported OS: {system}")
             return None, None
@@ -61,6 +91,9 @@ class CHROME_HELPER:
                 subprocess.run(["open", target_dir], check=False)
             elif system == "Windows":
                 subprocess.run(["explorer", target_dir], check=False)
+            elif system == "Linux":
+                subprocess.run(["xdg-open", target_dir], check=False,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         except Exception as e:
             print(f"(⚠️ No se pudo abrir la carpeta automáticamente: {e})")
 
@@ -168,24 +201,29 @@ class CHROME_HELPER:
 
         return chrome_binary_path, chromedriver_path
 
-    @staticmethod
-    def chrome_driver_load(directory):
-        """Launch Chrome with OS-specific paths and consistent configuration."""
+    # Rutas de Chrome/Chromedriver resueltas una sola vez por proceso
+    _binaries = None
+    _binaries_lock = threading.Lock()
+
+    @classmethod
+    def provision(cls):
+        """(chrome, chromedriver) listos para usar; instala sólo la primera vez."""
+        if cls._binaries is None:
+            with cls._binaries_lock:
+                if cls._binaries is None:
+                    chrome, driver = os.getenv(CHROME_BINARY_ENV), os.getenv(CHROMEDRIVER_ENV)
+                    if not (chrome and driver and os.path.exists(chrome) and os.path.exists(driver)):
+                        chrome, driver = cls.install_chromedriver()
+                    if not chrome or not driver:
+                        return None, None  # no se cachea: se puede reintentar
+                    cls._binaries = (chrome, driver)
+        return cls._binaries
 
-        import os
+    @staticmethod
+    def chrome_options(chrome_binary_path, directory, headless=False):
         import platform
-        from selenium import webdriver
-        from selenium.common.exceptions import SessionNotCreatedException, WebDriverException
-        from selenium.webdriver.chrome.service import Service
         from selenium.webdriver.chrome.options import Options
 
-        os.makedirs(os.path.abspath(directory), exist_ok=True)
-
-        chrome_binary_path, chromedriver_path = Helper.install_chromedriver()
-        if not chrome_binary_path or not chromedriver_path:
-            print("❌ No fue posible obtener los binarios de Chrome.")
-            return None
-
         system = platform.system()
 
         chrome_options = Options()
@@ -201,12 +239,32 @@ class CHROME_HELPER:
         chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
         chrome_options.add_argument("--window-size=1920x1080")
         chrome_options.add_argument("--remote-allow-origins=*")
+        if headless:
+            chrome_options.add_argument("--headless=new")
 
         if system == "Linux":
             chrome_options.add_argument("--disable-dev-shm-usage")
             chrome_options.add_argument("--no-sandbox")
         elif system == "Windows":
             chrome_options.add_argument("--disable-gpu")
+        return chrome_options
+
+    @staticmethod
+    def chrome_driver_load(directory, headless=False):
+        """Launch Chrome with OS-specific paths and consistent configuration."""
+
+        from selenium import webdriver
+        from selenium.common.exceptions import SessionNotCreatedException, WebDriverException
+        from selenium.webdriver.chrome.service import Service
+
+        os.makedirs(os.path.abspath(directory), exist_ok=True)
+
+        chrome_binary_path, chromedriver_path = CHROME_HELPER.provision()
+        if not chrome_binary_path or not chromedriver_path:
+            print("❌ No fue posible obtener los binarios de Chrome.")
+            return None
+
+        chrome_options = CHROME_HELPER.chrome_options(chrome_binary_path, directory, headless)
 
         try:
             service = Service(chromedriver_path)
@@ -220,4 +278,197 @@ class CHROME_HELPER:
         except Exception as exc:
             print(f"❌ Error inesperado al iniciar ChromeDriver: {exc}")
 
-        return None
\ No newline at end of file
+        return None
+
+
+def process_tree_rss_mb(pid):
+    """RSS (MB) de un proceso y sus hijos; None si no se puede medir en este sistema."""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            return sum(p.memory_info().rss for p in [root, *root.children(recursive=True)]) / 1024 / 1024
+        except psutil.Error:
+            return None
+    if not os.path.isdir(f"/proc/{pid}"):
+        return None
+    # Linux sin psutil: recorre /proc/<pid>/task/*/children
+    total_kb, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                total_kb += next((int(line.split()[1]) for line in f if line.startswith("VmRSS:")), 0)
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024
+
+
+class _PooledDriver:
+    __slots__ = ("driver", "pages", "started")
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.started = time.monotonic()
+
+
+class CHROME_DRIVER_POOL:
+    """Sesiones headless de Chrome precalentadas, prestadas con lease().
+
+    Cada lease cuenta como una página; una sesión se recicla (quit + nueva)
+    al llegar a max_pages, al pasar max_rss_mb o si falla el chequeo de salud.
+    """
+
+    def __init__(self, size=None, max_pages=None, max_rss_mb=None, directory=None, headless=True):
+        self.size = size or int(os.getenv(POOL_SIZE_ENV, DEFAULT_POOL_SIZE))
+        self.max_pages = max_pages or int(os.getenv(MAX_PAGES_ENV, DEFAULT_MAX_PAGES))
+        self.max_rss_mb = max_rss_mb or float(os.getenv(MAX_RSS_ENV, DEFAULT_MAX_RSS_MB))
+        self.directory = directory or os.path.join(os.path.expanduser("~"), "chrome_testing", "downloads")
+        self.headless = headless
+        self._idle = queue.LifoQueue()  # LIFO: la sesión más caliente sale primero
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    # ===== Ciclo de vida =====
+    def start(self):
+        """Provisiona binarios y arranca las `size` sesiones de una vez."""
+        chrome, driver = CHROME_HELPER.provision()
+        if not chrome or not driver:
+            raise RuntimeError("❌ No fue posible obtener los binarios de Chrome.")
+        while self._reserve():
+            self._idle.put(self._launch())
+        return self
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(entry)
+
+    def _reserve(self):
+        with self._lock:
+            if self._created >= self.size:
+                return False
+            self._created += 1
+            return True
+
+    def _launch(self):
+        """Arranca una sesión en un lugar ya reservado; si falla, el lugar se libera."""
+        try:
+            with span("chrome.launch", headless=self.headless):
+                driver = CHROME_HELPER.chrome_driver_load(self.directory, headless=self.headless)
+        except Exception:
+            driver = None
+        if driver is None:
+            with self._lock:
+                self._created -= 1
+            raise RuntimeError("❌ No se pudo iniciar una sesión de Chrome para el pool.")
+        return _PooledDriver(driver)
+
+    def _quit(self, entry):
+        with self._lock:
+            self._created -= 1
+        try:
+            entry.driver.quit()
+        except Exception:
+            pass
+
+    # ===== Préstamo =====
+    def healthy(self, entry):
+        try:
+            return entry.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def rss_mb(self, entry):
+        process = getattr(getattr(entry.driver, "service", None), "process", None)
+        return process_tree_rss_mb(process.pid) if process is not None else None
+
+    def worn_out(self, entry):
+        if entry.pages >= self.max_pages:
+            return True
+        rss = self.rss_mb(entry)
+        return rss is not None and rss > self.max_rss_mb
+
+    def acquire(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self._closed:
+                raise RuntimeError("El pool de Chrome ya se cerró.")
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                if self._reserve():
+                    return self._launch()
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                entry = self._idle.get(timeout=remaining)
+            if self.healthy(entry):
+                return entry
+            # Se libera su lugar; la siguiente vuelta lanza otra sesión o espera una libre
+            print("⚠️ Sesión de Chrome sin respuesta; se reemplaza.")
+            self._quit(entry)
+
+    def release(self, entry):
+        """Devuelve la sesión al pool; nunca lanza (corre en el finally de lease)."""
+        entry.pages += 1
+        if self._closed:
+            self._quit(entry)
+        elif not self.worn_out(entry):
+            self._idle.put(entry)
+        else:
+            with span("chrome.recycle", pages=entry.pages):
+                self._quit(entry)
+                if self._reserve():
+                    try:
+                        self._idle.put(self._launch())
+                    except RuntimeError as e:
+                        # El lugar quedó libre: acquire() lanzará otra sesión cuando haga falta
+                        print(f"⚠️ No se pudo reciclar la sesión de Chrome: {e}")
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """Presta un driver; queue.Empty si no se libera ninguno en `timeout` segundos."""
+        entry = self.acquire(timeout)
+        try:
+            yield entry.driver
+        finally:
+            self.release(entry)
+
+    def fetch(self, url, timeout=None):
+        """HTML de `url` ya renderizado (JavaScript incluido) con una sesión del pool."""
+        with span("chrome.fetch"):
+            with self.lease(timeout) as driver:
+                driver.get(url)
+                return driver.page_source
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Descarga URLs con el pool headless de Chrome.")
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("--size", type=int, default=None, help=f"sesiones en el pool (default {DEFAULT_POOL_SIZE})")
+    args = parser.parse_args()
+    with CHROME_DRIVER_POOL(size=args.size) as pool:
+        for url in args.urls:
+            start = time.perf_counter()
+            html = pool.fetch(url)
+            print(f"✅ {url}: {len(html):,} caracteres en {time.perf_counter() - start:.2f}s")
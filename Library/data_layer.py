@@ -0,0 +1,460 @@
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from urllib.parse import urlsplit
+
+try:
+    from Library.instrumentation import span
+    from Library.settings import READ_URLS_KEY, tenant_schema
+except ModuleNotFoundError:
+    # fallback if running inside the Library folder
+    from instrumentation import span
+    from settings import READ_URLS_KEY, tenant_schema
+
+POOL_MAX_ENV = "CAREER_POOL_MAX"
+POOL_WAIT_ENV = "CAREER_POOL_WAIT_S"
+DEFAULT_POOL_WAIT_S = 30.0
+# Filas por viaje de red de los cursores server-side
+STREAM_ITERSIZE = 2000
+MAX_LAG_ENV = "CAREER_REPLICA_MAX_LAG_S"
+DEFAULT_MAX_LAG_S = 10.0
+REPLICA_CHECK_S = 2.0          # cada cuánto se vuelve a medir una réplica
+REPLICA_RETRY_S = 30.0         # réplica caída: no se vuelve a probar antes
+REPLICA_CONNECT_TIMEOUT_S = 3
+WRITE_LSN_QUERY = "SELECT (pg_current_wal_lsn() - '0/0'::pg_lsn)::bigint;"
+# Réplica física: LSN aplicado y segundos de atraso (0 si ya aplicó todo lo recibido).
+# Un servidor que no está en recovery (p. ej. replicación lógica) no tiene LSN comparable.
+REPLICA_STATUS_QUERY = """
+    SELECT pg_is_in_recovery(),
+           (pg_last_wal_replay_lsn() - '0/0'::pg_lsn)::bigint,
+           CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END;
+"""
+
+
+def url_host(url):
+    """host:puerto de una URL de conexión, sin credenciales (para logs)."""
+    parts = urlsplit(url)
+    return f"{parts.hostname}:{parts.port or 5432}" if parts.hostname else "(dsn)"
+
+
+class BLOCKING_POOL:
+    """ThreadedConnectionPool que espera una conexión libre en vez de fallar con PoolError.
+
+    psycopg2 lanza PoolError en cuanto se piden más de maxconn conexiones; aquí
+    un semáforo hace esperar hasta `timeout` segundos a que se devuelva una.
+    """
+
+    def __init__(self, pool, size, timeout):
+        self._pool = pool
+        self._slots = threading.BoundedSemaphore(size)
+        self.size = size
+        self.timeout = timeout
+
+    def getconn(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            from psycopg2.pool import PoolError
+            raise PoolError(f"❌ Ninguna de las {self.size} conexiones del pool se liberó en {self.timeout:g}s ({POOL_MAX_ENV}).")
+        try:
+            return self._pool.getconn()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn, close=False):
+        try:
+            self._pool.putconn(conn, close=close)
+        finally:
+            self._slots.release()
+
+    def closeall(self):
+        self._pool.closeall()
+
+
+class DATA_LAYER:
+    """Acceso a datos de un tenant a través de pools de conexiones compartidos.
+
+    Cada tenant vive en su propio schema ('<schema_name>_<tenant>', o el schema
+    base si no hay tenant). Las conexiones de su pool fijan el search_path al
+    conectarse, así que las consultas usan nombres de tabla sin calificar.
+    Los pools (psycopg2 y SQLAlchemy) se comparten por proceso: un mismo
+    despliegue atiende a muchos usuarios sin un proceso por usuario.
+
+    Con réplicas (DB_READ_URLS) las lecturas (read_frame, read_cursor, ventanas
+    y conteos) van a una réplica con poco atraso; cursor() y lo que se lea
+    después de escribir siguen en el primario. `session` guarda el LSN del
+    último commit con escrituras, así una réplica sólo atiende a la sesión
+    cuando ya aplicó sus cambios. Sin session se usa una compartida por proceso.
+
+    Con `local` (LOCAL_REPLICA, modo sin conexión) cursor(), read_cursor() y
+    las lecturas usan el archivo SQLite; las escrituras quedan en su outbox.
+    """
+    _pools = {}
+    _engines = {}
+    _lock = threading.Lock()
+    # {url de réplica: (medido_en, ok, lsn_aplicado, atraso_s)}
+    _replicas = {}
+    _process_session = {}
+
+    def __init__(self, db_url, schema, read_urls=(), session=None, local=None):
+        self.db_url = db_url
+        self.schema = schema
+        self.search_path_option = f"-c search_path={schema},public"
+        self.read_urls = tuple(url for url in read_urls if url and url != db_url)
+        # {db_url del primario: (lsn, monotonic)} del último commit con escrituras
+        self.session = session if session is not None else self._process_session
+        # Servidor de lecturas de esta instancia; una vez en el primario no vuelve a una réplica
+        self._read_url = None
+        self.local = local
+
+    @classmethod
+    def for_tenant(cls, data_access, tenant=None, session=None, offline=False):
+        """`offline=True`: usar la réplica SQLite si CAREER_LOCAL_REPLICA está activo."""
+        schema = tenant_schema(data_access["db_structure"]["schema_name"], tenant)
+        local = None
+        if offline:
+            try:
+                from Library.local_replica import LOCAL_REPLICA
+            except ModuleNotFoundError:
+                # fallback if running inside the Library folder
+                from local_replica import LOCAL_REPLICA
+            local = LOCAL_REPLICA.from_env(schema)
+        return cls(data_access["DB_URL"], schema, data_access.get(READ_URLS_KEY, ()), session, local)
+
+    def remote(self):
+        """La misma capa sin réplica local (para sincronizar o para lo que sólo existe en Postgres)."""
+        return DATA_LAYER(self.db_url, self.schema, self.read_urls, self.session)
+
+    def local_ready(self):
+        return self.local is not None and self.local.pulled()
+
+    @contextmanager
+    def _local_cursor(self, commit):
+        with ExitStack() as stack:
+            remote = []
+
+            def open_remote():
+                conn = stack.enter_context(self.connection())
+                remote.append(conn)
+                return stack.enter_context(conn.cursor())
+
+            conn = self.local.connection()
+            with conn:  # commit (o rollback) de SQLite al salir
+                yield self.local.cursor(fallback=open_remote)
+            if commit and remote:
+                remote[0].commit()
+
+    # ===== psycopg2 =====
+    def pool(self, dsn=None):
+        dsn = dsn or self.db_url
+        key = (dsn, self.schema)
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    from psycopg2.pool import ThreadedConnectionPool
+                    extra = {"connect_timeout": REPLICA_CONNECT_TIMEOUT_S} if dsn != self.db_url else {}
+                    size = int(os.getenv(POOL_MAX_ENV, "5"))
+                    pool = BLOCKING_POOL(
+                        ThreadedConnectionPool(1, size, dsn=dsn, options=self.search_path_option, **extra),
+                        size,
+                        float(os.getenv(POOL_WAIT_ENV, DEFAULT_POOL_WAIT_S)),
+                    )
+                    self._pools[key] = pool
+        return pool
+
+    @staticmethod
+    def _release(pool, conn):
+        try:
+            if not conn.closed:
+                conn.rollback()  # no dejar transacciones abiertas en el pool
+        except Exception:
+            conn.close()  # conexión rota: se descarta
+        pool.putconn(conn, close=bool(conn.closed))
+
+    @contextmanager
+    def connection(self, dsn=None):
+        """Presta una conexión del pool del tenant y la devuelve al terminar."""
+        pool = self.pool(dsn)
+        conn = pool.getconn()
+        try:
+            yield conn
+        finally:
+            self._release(pool, conn)
+
+    @contextmanager
+    def cursor(self):
+        """Cursor dentro de una transacción: commit al salir, rollback si falla."""
+        if self.local_ready():
+            with self._local_cursor(commit=True) as cur:
+                yield cur
+            return
+        with self.connection() as conn:
+            wrote = False
+            with conn.cursor() as cur:
+                yield cur
+                if self.read_urls:
+                    from psycopg2.extensions import TRANSACTION_STATUS_INTRANS
+                    wrote = conn.get_transaction_status() == TRANSACTION_STATUS_INTRANS
+                if wrote:
+                    cur.execute("SELECT txid_current_if_assigned() IS NOT NULL;")
+                    wrote = cur.fetchone()[0]
+            conn.commit()
+            if wrote:
+                self.record_write(conn)
+
+    # ===== Réplicas de lectura =====
+    def record_write(self, conn):
+        """Guarda en la sesión el LSN del primario tras un commit con escrituras."""
+        with conn.cursor() as cur:
+            cur.execute(WRITE_LSN_QUERY)
+            self.session[self.db_url] = (cur.fetchone()[0], time.monotonic())
+        self._read_url = self.db_url
+
+    def note_write(self):
+        """Registra en la sesión las escrituras hechas por fuera de cursor() (engine(), INITIALIZE)."""
+        if self.read_urls:
+            with self.connection() as conn:
+                self.record_write(conn)
+
+    def replica_status(self, url):
+        """(ok, lsn aplicado o None, atraso en segundos), medido cada REPLICA_CHECK_S."""
+        now = time.monotonic()
+        cached = self._replicas.get(url)
+        if cached is not None and now - cached[0] < (REPLICA_CHECK_S if cached[1] else REPLICA_RETRY_S):
+            return cached[1:]
+        try:
+            with self.connection(url) as conn:
+                with conn.cursor() as cur:
+                    cur.execute(REPLICA_STATUS_QUERY)
+                    in_recovery, replay_lsn, lag = cur.fetchone()
+            status = (True, replay_lsn if in_recovery else None, float(lag or 0))
+        except Exception as e:
+            self.mark_down(url, e)
+            return self._replicas[url][1:]
+        self._replicas[url] = (now,) + status
+        return status
+
+    def mark_down(self, url, error):
+        print(f"⚠️ Réplica {url_host(url)} no disponible ({error}); se lee del primario.")
+        self._replicas[url] = (time.monotonic(), False, None, float("inf"))
+
+    def read_url(self):
+        """Servidor para las lecturas de esta instancia: una réplica al día con la sesión, o el primario."""
+        if self._read_url is None:
+            self._read_url = self._pick_replica() or self.db_url
+        return self._read_url
+
+    def _pick_replica(self):
+        if not self.read_urls:
+            return None
+        max_lag = float(os.getenv(MAX_LAG_ENV, DEFAULT_MAX_LAG_S))
+        written = self.session.get(self.db_url)
+        candidates = []
+        for url in self.read_urls:
+            ok, replay_lsn, lag = self.replica_status(url)
+            if not ok or lag > max_lag:
+                continue
+            if written is not None:
+                lsn, written_at = written
+                # Sin LSN comparable se espera el atraso máximo desde la última escritura
+                if replay_lsn is None and time.monotonic() - written_at < max_lag:
+                    continue
+                if replay_lsn is not None and replay_lsn < lsn:
+                    continue
+            candidates.append(url)
+        return random.choice(candidates) if candidates else None
+
+    @contextmanager
+    def read_connection(self):
+        """Conexión para consultas de sólo lectura (réplica elegida por read_url)."""
+        url = self.read_url()
+        try:
+            pool = self.pool(url)
+            conn = pool.getconn()
+        except Exception as e:
+            if url == self.db_url:
+                raise
+            self.mark_down(url, e)
+            self._read_url = self.db_url
+            pool = self.pool()
+            conn = pool.getconn()
+        try:
+            yield conn
+        finally:
+            self._release(pool, conn)
+
+    @contextmanager
+    def read_cursor(self):
+        """Cursor de sólo lectura; no hace commit."""
+        if self.local_ready():
+            with self._local_cursor(commit=False) as cur:
+                yield cur
+            return
+        with self.read_connection() as conn:
+            with conn.cursor() as cur:
+                yield cur
+
+    def _local_frame(self, query, params=None):
+        """DataFrame desde la réplica SQLite; None si la consulta no se puede resolver ahí."""
+        import pandas as pd
+        try:
+            from Library.local_replica import to_sqlite_query
+        except ModuleNotFoundError:
+            # fallback if running inside the Library folder
+            from local_replica import to_sqlite_query
+        sql, values = to_sqlite_query(query, params)
+        try:
+            return pd.read_sql(sql, self.local.connection(), params=values)
+        except Exception:
+            return None
+
+    def read_frame(self, query, params=None, label=None):
+        import pandas as pd
+        if self.local_ready():
+            with span("db.read", schema=self.schema, table=label or "", local=True):
+                frame = self._local_frame(query, params)
+            if frame is not None:
+                return frame
+        with span("db.read", schema=self.schema, table=label or "") as current:
+            url = self.read_url()
+            current.set(replica=url != self.db_url)
+            try:
+                with self.read_connection() as conn:
+                    return pd.read_sql(query, conn, params=params)
+            except Exception as e:
+                if url == self.db_url:
+                    raise
+                # Réplica caída o consulta cancelada por recovery: se repite en el primario
+                self._read_url = self.db_url
+                with self.connection() as conn:
+                    frame = pd.read_sql(query, conn, params=params)
+                self.mark_down(url, e)
+                return frame
+
+    @contextmanager
+    def server_cursor(self, name="stream", itersize=None):
+        """Cursor con nombre (server-side): las filas se quedan en Postgres hasta pedirlas."""
+        with self.read_connection() as conn:
+            with conn.cursor(name=f"{name}_{uuid.uuid4().hex[:8]}", scrollable=True) as cur:
+                cur.itersize = itersize or STREAM_ITERSIZE
+                yield cur
+
+    def iter_frames(self, query, params=None, chunksize=None, label=None):
+        """Genera DataFrames de `chunksize` filas sin materializar todo el resultado.
+
+        Equivale a pd.read_sql(chunksize=...), pero con un cursor server-side:
+        con el cursor normal de psycopg2 el resultado completo ya viajó al cliente.
+        """
+        import pandas as pd
+        chunksize = chunksize or STREAM_ITERSIZE
+        if self.local_ready():
+            with self.read_cursor() as cur:
+                cur.execute(query, params)
+                while True:
+                    rows = cur.fetchmany(chunksize)
+                    if not rows:
+                        return
+                    yield pd.DataFrame.from_records(rows, columns=[c.name for c in cur.description])
+        with self.server_cursor(itersize=chunksize) as cur:
+            with span("db.stream", schema=self.schema, table=label or ""):
+                cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(chunksize)
+                if not rows:
+                    break
+                yield pd.DataFrame.from_records(rows, columns=[c.name for c in cur.description])
+
+    def read_window(self, query, params=None, offset=0, limit=100, label=None):
+        """Filas [offset, offset + limit) de la consulta; las anteriores no viajan al cliente."""
+        import pandas as pd
+        if self.local_ready():
+            window = f"SELECT * FROM ({query.strip().rstrip(';')}) AS w LIMIT {int(limit)} OFFSET {int(offset)};"
+            frame = self._local_frame(window, params)
+            if frame is not None:
+                return frame
+        with span("db.window", schema=self.schema, table=label or "", offset=offset, limit=limit):
+            with self.server_cursor(itersize=limit) as cur:
+                cur.execute(query, params)
+                if offset:
+                    cur.scroll(offset, mode="absolute")  # MOVE en el servidor
+                rows = cur.fetchmany(limit)
+                columns = [c.name for c in cur.description or ()]
+        return pd.DataFrame.from_records(rows, columns=columns)
+
+    def count(self, query, params=None):
+        """Total de filas de una consulta (envuelta en count(*))."""
+        with self.read_cursor() as cur:
+            cur.execute(f"SELECT count(*) FROM ({query.strip().rstrip(';')}) AS counted;", params)
+            return cur.fetchone()[0]
+
+    # ===== Escrituras por lote =====
+    def update_rows(self, table, key, changes, types=None):
+        """Aplica {llave: {columna: valor}} con un solo UPDATE ... FROM (VALUES ...).
+
+        Sólo se escriben las celdas que vienen en `changes`: cada columna va en
+        VALUES con una bandera `<columna>__changed`, y una fila que no la tocó
+        conserva el valor del servidor. `types` ({columna: tipo de Postgres})
+        castea los valores (por defecto text). Devuelve las filas actualizadas.
+        """
+        if not changes:
+            return 0
+        types = types or {}
+        columns = sorted({column for values in changes.values() for column in values})
+        with span("db.update_rows", schema=self.schema, table=table, rows=len(changes), columns=len(columns)):
+            if self.local_ready():
+                # SQLite (réplica local): un UPDATE por fila, cada uno queda en el outbox
+                updated = 0
+                with self.cursor() as cur:
+                    for pk, values in changes.items():
+                        assignments = ", ".join(f'"{column}" = %s' for column in values)
+                        cur.execute(f'UPDATE {table} SET {assignments} WHERE "{key}" = %s;', [*values.values(), pk])
+                        updated += cur.rowcount
+                return updated
+
+            from psycopg2.extras import execute_values
+            assignments = ", ".join(
+                f'"{column}" = CASE WHEN v."{column}__changed" THEN v."{column}" ELSE t."{column}" END'
+                for column in columns
+            )
+            aliases = ", ".join(f'"{column}__changed", "{column}"' for column in columns)
+            template = "(" + ", ".join(
+                [f"%s::{types.get(key, 'integer')}"]
+                + [f"%s, %s::{types.get(column, 'text')}" for column in columns]
+            ) + ")"
+            rows = [
+                (pk, *(item for column in columns for item in (column in values, values.get(column))))
+                for pk, values in changes.items()
+            ]
+            with self.cursor() as cur:
+                # page_size = todas las filas: una sola sentencia, un solo viaje
+                execute_values(
+                    cur,
+                    f'UPDATE {table} AS t SET {assignments} FROM (VALUES %s) AS v ("{key}", {aliases}) '
+                    f'WHERE t."{key}" = v."{key}";',
+                    rows,
+                    template=template,
+                    page_size=len(rows),
+                )
+                return cur.rowcount
+
+    # ===== SQLAlchemy (CV_GENERATION, CSV_TO_SQL) =====
+    def engine(self):
+        key = (self.db_url, self.schema)
+        engine = self._engines.get(key)
+        if engine is None:
+            with self._lock:
+                engine = self._engines.get(key)
+                if engine is None:
+                    from sqlalchemy import create_engine
+                    engine = create_engine(
+                        self.db_url,
+                        pool_pre_ping=True,
+                        connect_args={"options": self.search_path_option},
+                    )
+                    self._engines[key] = engine
+        return engine
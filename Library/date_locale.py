@@ -0,0 +1,130 @@
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    from Library.instrumentation import span
+except ModuleNotFoundError:
+    # fallback if running inside the Library folder
+    from instrumentation import span
+
+# Formato para idiomas sin patrón en la tabla languages (equivale a '%d/%m/%Y')
+FALLBACK_PATTERN = "{dd}/{mm}/{year}"
+LOCALE_TTL_SECONDS = 300
+TOKEN_RE = re.compile(r"(\{\w+\})")
+
+
+class DATE_LOCALE:
+    """Formateador de fechas de un idioma, precalculado a partir de la tabla languages.
+
+    El patrón admite {city}, {day}, {dd}, {ordinal}, {month}, {mm} y {year}.
+    format_series() formatea una Series completa con operaciones vectorizadas.
+    """
+
+    def __init__(self, lang, date_pattern=None, city=None, month_names=None,
+                 ordinal_style=None, capitalize_month=True):
+        self.lang = lang
+        self.city = city or ""
+        self.ordinal_style = ordinal_style
+        months = list(month_names or [])
+        if len(months) != 12:
+            months, date_pattern = [f"{m:02d}" for m in range(1, 13)], None
+        if capitalize_month:
+            months = [m[:1].upper() + m[1:] for m in months]
+        self.months = np.array(months, dtype=object)
+        self.pattern = date_pattern or FALLBACK_PATTERN
+        # El patrón se tokeniza una sola vez: literales y {campos}
+        self.tokens = [t for t in TOKEN_RE.split(self.pattern) if t]
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            row["lang"],
+            date_pattern=row.get("date_pattern"),
+            city=row.get("city"),
+            month_names=row.get("month_names"),
+            ordinal_style=row.get("ordinal_style"),
+            capitalize_month=row.get("capitalize_month", True) is not False,
+        )
+
+    def _ordinals(self, day):
+        if self.ordinal_style == "english":
+            # 11, 12 y 13 llevan 'th' aunque terminen en 1, 2 o 3
+            teens = (day % 100 >= 11) & (day % 100 <= 13)
+            last = day % 10
+            suffix = np.select([last == 1, last == 2, last == 3], ["st", "nd", "rd"], "th")
+            return np.where(teens, "th", suffix).astype(object)
+        if self.ordinal_style == "french":
+            return np.where(day == 1, "er", "").astype(object)
+        return np.full(day.shape, "", dtype=object)
+
+    def format_series(self, dates):
+        """Formatea una Series de fechas en una sola pasada vectorizada."""
+        dates = pd.to_datetime(pd.Series(dates), errors="coerce")
+        if dates.empty:
+            # np.char.zfill falla con arreglos vacíos
+            return pd.Series([], index=dates.index, dtype=object)
+        valid = dates.notna().to_numpy()
+        day = dates.dt.day.fillna(1).astype(int).to_numpy()
+        month = dates.dt.month.fillna(1).astype(int).to_numpy()
+        year = dates.dt.year.fillna(0).astype(int).to_numpy()
+
+        fields = {
+            "city": self.city,
+            "day": day.astype(str).astype(object),
+            "dd": np.char.zfill(day.astype(str), 2).astype(object),
+            "month": self.months[month - 1],
+            "mm": np.char.zfill(month.astype(str), 2).astype(object),
+            "year": year.astype(str).astype(object),
+        }
+        if "{ordinal}" in self.tokens:
+            fields["ordinal"] = self._ordinals(day)
+
+        result = np.full(len(dates), "", dtype=object)
+        for token in self.tokens:
+            if token.startswith("{") and token[1:-1] in fields:
+                result = result + fields[token[1:-1]]
+            else:
+                result = result + token
+        result[~valid] = ""
+        return pd.Series(result, index=dates.index, dtype=object)
+
+    def format(self, value):
+        return self.format_series([value]).iloc[0]
+
+
+class LOCALE_TABLE:
+    """Formateadores por idioma leídos de la tabla languages (cache por schema)."""
+    _cache = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def load(cls, db, refresh=False):
+        key = (db.db_url, db.schema)
+        cached = cls._cache.get(key)
+        if cached and not refresh and time.monotonic() - cached[0] < LOCALE_TTL_SECONDS:
+            return cached[1]
+        with span("locale.load", schema=db.schema):
+            try:
+                # read_cursor: también funciona con la réplica local (LOCAL_REPLICA)
+                with db.read_cursor() as cur:
+                    cur.execute(
+                        "SELECT lang, date_pattern, city, month_names, ordinal_style, capitalize_month "
+                        "FROM languages;"
+                    )
+                    columns = [column.name for column in cur.description]
+                    rows = [dict(zip(columns, row)) for row in cur.fetchall()]
+            except Exception as e:
+                print(f"⚠️ No se pudieron leer los formatos de fecha de languages: {e}")
+                rows = []
+        locales = {row["lang"]: DATE_LOCALE.from_row(row) for row in rows}
+        with cls._lock:
+            cls._cache[key] = (time.monotonic(), locales)
+        return locales
+
+    @classmethod
+    def get(cls, db, lang):
+        return cls.load(db).get(lang) or DATE_LOCALE(lang)
@@ -0,0 +1,220 @@
+"""Recordatorios de next_stage_deadline y reach_out_day de job_tracker.
+
+Uso:
+    python -m Library.deadline_scheduler                  # tenant por defecto
+    python -m Library.deadline_scheduler --tenant ana --hour 8
+
+Carga los vencimientos próximos con una consulta de rango (índices parciales
+de SQL/initializing.sql) en un heap y duerme en select() hasta el siguiente.
+Un trigger avisa por NOTIFY cuando cambia job_tracker y el heap se recarga;
+entre eventos no consulta la base. Cada recordatorio se agrega al outbox
+(reminders_outbox.jsonl en la carpeta de trabajo) y se muestra como
+notificación local cuando el sistema lo permite.
+"""
+import argparse
+import heapq
+import json
+import os
+import platform
+import select
+import shutil
+import subprocess
+import time
+from datetime import date, datetime, timedelta
+from datetime import time as day_time
+
+from colorama import Fore, Style, init
+
+try:
+    from Library.data_layer import DATA_LAYER
+    from Library.instrumentation import span
+    from Library.settings import bootstrap
+except ModuleNotFoundError:
+    # fallback if running inside the Library folder
+    from data_layer import DATA_LAYER
+    from instrumentation import span
+    from settings import bootstrap
+
+CHANNEL = "career_deadlines"
+HOUR_ENV = "CAREER_REMINDER_HOUR"
+DEFAULT_HOUR = 9
+HORIZON_DAYS = 7       # vencimientos que se cargan hacia adelante
+LOOKBACK_DAYS = 7      # vencidos sin recordatorio que todavía se avisan
+OUTBOX_FILE = "reminders_outbox.jsonl"
+RECONNECT_MAX_S = 60.0
+KIND_LABELS = {"next_stage_deadline": "Deadline de la siguiente etapa", "reach_out_day": "Día de contacto"}
+
+
+def due_items(db, start, end):
+    """Vencimientos de job_tracker con fecha en [start, end), ordenados por fecha."""
+    with db.cursor() as cur:
+        cur.execute(
+            """
+            SELECT application_id, company, position, 'next_stage_deadline' AS kind, next_stage_deadline AS due
+            FROM job_tracker
+            WHERE next_stage_deadline IS NOT NULL AND next_stage_deadline >= %s AND next_stage_deadline < %s
+            UNION ALL
+            SELECT application_id, company, position, 'reach_out_day', reach_out_day
+            FROM job_tracker
+            WHERE reach_out_day IS NOT NULL AND reach_out_day >= %s AND reach_out_day < %s
+            ORDER BY due, company;
+            """,
+            (start, end, start, end),
+        )
+        columns = [column.name for column in cur.description]
+        return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+
+def notify_desktop(title, message):
+    """Notificación local (notify-send / osascript); False si no hay cómo mostrarla."""
+    system = platform.system()
+    try:
+        if system == "Linux" and shutil.which("notify-send"):
+            subprocess.run(["notify-send", title, message], check=False, timeout=5)
+            return True
+        if system == "Darwin":
+            script = f"display notification {json.dumps(message)} with title {json.dumps(title)}"
+            subprocess.run(["osascript", "-e", script], check=False, timeout=5)
+            return True
+    except Exception:
+        pass
+    return False
+
+
+class DEADLINE_SCHEDULER:
+    """Heap de vencimientos que despierta sólo en el próximo recordatorio o con NOTIFY."""
+
+    def __init__(self, settings, tenant=None, hour=None, outbox_path=None):
+        self.settings = settings
+        self.db = DATA_LAYER.for_tenant(settings.data_access, tenant)
+        self.hour = hour if hour is not None else int(os.getenv(HOUR_ENV, DEFAULT_HOUR))
+        self.outbox_path = outbox_path or os.path.join(str(settings.working_folder), OUTBOX_FILE)
+        self.heap = []
+        self.sent = self.load_sent()
+        self.horizon_end = None
+        self.conn = None
+
+    # ===== Outbox =====
+    def reminder_key(self, item):
+        return f"{self.db.schema}:{item['application_id']}:{item['kind']}:{item['due']}"
+
+    def load_sent(self):
+        """Llaves ya escritas en el outbox, para no repetir recordatorios al reiniciar."""
+        sent = set()
+        if os.path.exists(self.outbox_path):
+            with open(self.outbox_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        sent.add(json.loads(line)["key"])
+                    except (ValueError, KeyError):
+                        continue
+        return sent
+
+    def write_outbox(self, item):
+        record = {
+            "key": self.reminder_key(item),
+            "schema": self.db.schema,
+            "application_id": item["application_id"],
+            "company": item["company"],
+            "position": item["position"],
+            "kind": item["kind"],
+            "due": str(item["due"]),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        with open(self.outbox_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    # ===== Heap =====
+    def fire_at(self, due):
+        return max(datetime.now(), datetime.combine(due, day_time(self.hour)))
+
+    def reload(self):
+        """Reconstruye el heap con una sola consulta de rango por índice."""
+        today = date.today()
+        self.horizon_end = today + timedelta(days=HORIZON_DAYS)
+        with span("deadlines.reload", schema=self.db.schema):
+            items = due_items(self.db, today - timedelta(days=LOOKBACK_DAYS), self.horizon_end)
+        self.heap = [
+            (self.fire_at(item["due"]), index, item)
+            for index, item in enumerate(items)
+            if self.reminder_key(item) not in self.sent
+        ]
+        heapq.heapify(self.heap)
+        print(f"📅 {len(self.heap)} recordatorio(s) pendientes hasta {self.horizon_end}.")
+
+    def next_timeout(self):
+        """Segundos hasta el próximo recordatorio o hasta extender el horizonte a medianoche."""
+        midnight = datetime.combine(date.today() + timedelta(days=1), day_time(0))
+        wake = min(self.heap[0][0], midnight) if self.heap else midnight
+        return max(0.0, (wake - datetime.now()).total_seconds())
+
+    def fire_due(self):
+        now = datetime.now()
+        while self.heap and self.heap[0][0] <= now:
+            _, _, item = heapq.heappop(self.heap)
+            key = self.reminder_key(item)
+            if key in self.sent:
+                continue
+            self.write_outbox(item)
+            self.sent.add(key)
+            label = KIND_LABELS.get(item["kind"], item["kind"])
+            message = f"{item['company']} — {item['position']}: {label} ({item['due']})"
+            notify_desktop("⏰ Career Manager", message)
+            print(f"{Fore.YELLOW}⏰ {message}{Style.RESET_ALL}")
+
+    # ===== Conexión =====
+    def connect(self):
+        import psycopg2
+        # Conexión dedicada (no del pool): LISTEN vive mientras viva la sesión
+        self.conn = psycopg2.connect(self.settings.db_url)
+        self.conn.autocommit = True
+        with self.conn.cursor() as cur:
+            cur.execute(f"LISTEN {CHANNEL};")
+        print(f"{Fore.GREEN}👂 Esperando vencimientos de '{self.db.schema}' (aviso a las {self.hour}:00){Style.RESET_ALL}")
+
+    def close(self):
+        if self.conn is not None and not self.conn.closed:
+            self.conn.close()
+        self.conn = None
+
+    def changed(self):
+        """True si algún NOTIFY pendiente es de este schema."""
+        self.conn.poll()
+        mine = False
+        while self.conn.notifies:
+            mine = self.conn.notifies.pop(0).payload == self.db.schema or mine
+        return mine
+
+    def run(self):
+        init(autoreset=True)
+        backoff = 1.0
+        while True:
+            try:
+                if self.conn is None:
+                    self.connect()
+                    self.reload()  # lo que cambió mientras no escuchábamos
+                    backoff = 1.0
+                readable, _, _ = select.select([self.conn], [], [], self.next_timeout())
+                if (readable and self.changed()) or date.today() + timedelta(days=HORIZON_DAYS) != self.horizon_end:
+                    self.reload()
+                self.fire_due()
+            except KeyboardInterrupt:
+                print("👋 Scheduler detenido.")
+                self.close()
+                return
+            except Exception as e:
+                print(f"{Fore.RED}❌ Scheduler desconectado: {e}. Reintentando en {backoff:g}s{Style.RESET_ALL}")
+                self.close()
+                time.sleep(backoff)
+                backoff = min(backoff * 2, RECONNECT_MAX_S)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tenant", default=None)
+    parser.add_argument("--hour", type=int, default=None, help=f"hora del aviso el día del vencimiento (default {DEFAULT_HOUR})")
+    args = parser.parse_args()
+    settings = bootstrap()
+    DEADLINE_SCHEDULER(settings, tenant=args.tenant or settings.default_tenant, hour=args.hour).run()
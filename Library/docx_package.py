@@ -0,0 +1,152 @@
+import hashlib
+import io
+import os
+import struct
+import threading
+import zipfile
+import zlib
+from collections import OrderedDict
+
+from docx import Document
+
+SHARED_PARTS_ENV = "CAREER_SHARED_TEMPLATE_PARTS"
+MAX_CACHED_TEMPLATES = 16
+# Partes que python-docx necesita parsear; el resto (media, fuentes, embebidos) sólo se copia
+XML_SUFFIXES = (".xml", ".rels")
+
+
+def shared_parts_enabled():
+    return os.getenv(SHARED_PARTS_ENV, "1").strip().lower() not in ("0", "false", "no")
+
+
+def _dos_datetime(date_time):
+    year, month, day, hour, minute, second = date_time
+    return (hour << 11) | (minute << 5) | (second // 2), ((year - 1980) << 9) | (month << 5) | day
+
+
+class _Entry:
+    """Entrada del zip ya comprimida: se copia tal cual en cada documento."""
+    __slots__ = ("name", "method", "crc", "compressed", "file_size", "dos_time", "dos_date")
+
+    def __init__(self, name, method, crc, compressed, file_size, dos_time, dos_date):
+        self.name = name
+        self.method = method
+        self.crc = crc
+        self.compressed = compressed
+        self.file_size = file_size
+        self.dos_time = dos_time
+        self.dos_date = dos_date
+
+
+class TEMPLATE_PACKAGE:
+    """Partes de un template .docx que no cambian entre renders.
+
+    Al cargarlo se guardan los bytes comprimidos de cada entrada y un paquete
+    liviano sólo con las partes XML (media, fuentes y embebidos vacíos). Cada
+    render abre el paquete liviano, y al guardar sólo se vuelve a serializar
+    y comprimir word/document.xml; las demás entradas se copian del template.
+    """
+    _cache = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self, data):
+        self.entries = []
+        light = io.BytesIO()
+        with zipfile.ZipFile(io.BytesIO(data)) as source, zipfile.ZipFile(light, "w", zipfile.ZIP_STORED) as skeleton:
+            for info in source.infolist():
+                if info.flag_bits & 0x1 or info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+                    raise ValueError(f"Entrada no soportada en el template: {info.filename}")
+                # Datos comprimidos tal como están en el template, después del header local
+                name_len, extra_len = struct.unpack("<HH", data[info.header_offset + 26:info.header_offset + 30])
+                start = info.header_offset + 30 + name_len + extra_len
+                self.entries.append(_Entry(info.filename, info.compress_type, info.CRC,
+                                           data[start:start + info.compress_size], info.file_size,
+                                           *_dos_datetime(info.date_time)))
+                if info.filename.endswith(XML_SUFFIXES):
+                    skeleton.writestr(info.filename, source.read(info))
+                else:
+                    skeleton.writestr(info.filename, b"")
+        self.skeleton = light.getvalue()
+        self.partnames = None
+
+    @classmethod
+    def get(cls, template_doc):
+        """Paquete cacheado del template (ruta o BytesIO); None si no se puede compartir."""
+        if not shared_parts_enabled() or not isinstance(template_doc, str) and not hasattr(template_doc, "getvalue"):
+            return None
+        if isinstance(template_doc, str):
+            stat = os.stat(template_doc)
+            key = (os.path.abspath(template_doc), stat.st_mtime, stat.st_size)
+            data = None
+        else:
+            data = template_doc.getvalue()
+            key = hashlib.sha256(data).hexdigest()
+        with cls._lock:
+            package = cls._cache.get(key)
+            if package is not None:
+                cls._cache.move_to_end(key)
+                return package or None
+        if data is None:
+            with open(template_doc, "rb") as f:
+                data = f.read()
+        try:
+            package = cls(data)
+        except (zipfile.BadZipFile, ValueError, KeyError):
+            package = False  # se recuerda para no reintentar; se renderiza por la vía normal
+        with cls._lock:
+            cls._cache[key] = package
+            while len(cls._cache) > MAX_CACHED_TEMPLATES:
+                cls._cache.popitem(last=False)
+        return package or None
+
+    def document(self):
+        doc = Document(io.BytesIO(self.skeleton))
+        if self.partnames is None:
+            self.partnames = self.parts_of(doc)
+        return doc
+
+    @staticmethod
+    def parts_of(doc):
+        return frozenset((str(part.partname), len(part.rels)) for part in doc.part.package.iter_parts())
+
+    def write(self, doc, output_file):
+        """Escribe el .docx con las partes compartidas; False si el render tocó algo más que document.xml."""
+        if self.parts_of(doc) != self.partnames:
+            return False
+        xml = doc.part.blob
+        main_part = str(doc.part.partname).lstrip("/")
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        compressed = compressor.compress(xml) + compressor.flush()
+        entries = [
+            _Entry(main_part, zipfile.ZIP_DEFLATED, zlib.crc32(xml), compressed, len(xml), entry.dos_time, entry.dos_date)
+            if entry.name == main_part else entry
+            for entry in self.entries
+        ]
+        if isinstance(output_file, str):
+            with open(output_file, "wb") as f:
+                write_zip(f, entries)
+        else:
+            write_zip(output_file, entries)
+        return True
+
+
+def write_zip(out, entries):
+    """Arma el zip a partir de entradas ya comprimidas (local headers + directorio central)."""
+    offset = 0
+    central = []
+    for entry in entries:
+        try:
+            name, flags = entry.name.encode("ascii"), 0
+        except UnicodeEncodeError:
+            name, flags = entry.name.encode("utf-8"), 0x800
+        header = struct.pack("<4s5H3L2H", b"PK\x03\x04", 20, flags, entry.method, entry.dos_time, entry.dos_date,
+                             entry.crc, len(entry.compressed), entry.file_size, len(name), 0)
+        out.write(header + name)
+        out.write(entry.compressed)
+        central.append(struct.pack("<4s6H3L5H2L", b"PK\x01\x02", 20, 20, flags, entry.method, entry.dos_time,
+                                   entry.dos_date, entry.crc, len(entry.compressed), entry.file_size, len(name),
+                                   0, 0, 0, 0, 0, offset) + name)
+        offset += len(header) + len(name) + len(entry.compressed)
+    directory = b"".join(central)
+    out.write(directory)
+    out.write(struct.pack("<4s4H2LH", b"PK\x05\x06", 0, 0, len(entries), len(entries), len(directory), offset, 0))
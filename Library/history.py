@@ -0,0 +1,190 @@
+try:
+    from Library.instrumentation import span
+except ModuleNotFoundError:
+    # fallback if running inside the Library folder
+    from instrumentation import span
+
+# Tablas con historial (triggers record_history, SQL/triggers.sql) -> llave primaria
+HISTORY_TABLES = {"applications": "application_id", "cover_letters": "cover_id"}
+# Tabla base tras la migración 001 (applications y cover_letters pasan a ser vistas)
+STORAGE_TABLES = {"applications": "application_data", "cover_letters": "cover_letter_data"}
+SPLICE_KEY = "~splice"
+# Versiones anteriores a la migración 001: llaves TEXT -> id que las reemplazó
+LEGACY_KEYS = {
+    "application_data": {
+        "company_id": ("SELECT company_id FROM companies WHERE company_name = %s;", ("company_name",)),
+        "type_id": ("SELECT type_id FROM company_types WHERE type_business = %s;", ("company_type",)),
+    },
+    "cover_letter_data": {
+        "application_id": (
+            "SELECT a.application_id FROM application_data a JOIN companies c ON c.company_id = a.company_id "
+            "WHERE a.job = %s AND a.lang = %s AND c.company_name = %s;",
+            ("job", "lang", "company_name"),
+        ),
+    },
+}
+
+
+def apply_delta(state, delta):
+    """Aplica un delta inverso a `state` y devuelve la versión anterior (nuevo dict)."""
+    previous = dict(state or {})
+    for column, value in delta.items():
+        if isinstance(value, dict) and SPLICE_KEY in value:
+            # Texto largo: [largo del prefijo común, largo del sufijo común, tramo anterior]
+            prefix, suffix, old_middle = value[SPLICE_KEY]
+            current = previous.get(column) or ""
+            previous[column] = current[:prefix] + old_middle + (current[len(current) - suffix:] if suffix else "")
+        else:
+            previous[column] = value
+    return previous
+
+
+class ROW_HISTORY:
+    """Versiones de applications / cover_letters reconstruidas desde row_history.
+
+    Cada cambio guarda sólo el delta inverso, así que una versión se obtiene
+    partiendo de la fila actual y aplicando los deltas hacia atrás.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._storage = {}
+
+    def storage_table(self, table):
+        """Tabla donde viven las filas (y sus deltas): la base si existe la migración 001."""
+        if table not in self._storage:
+            with self.db.cursor() as cur:
+                cur.execute("SELECT to_regclass(%s) IS NOT NULL;", (STORAGE_TABLES[table],))
+                migrated = cur.fetchone()[0]
+            self._storage[table] = STORAGE_TABLES[table] if migrated else table
+        return self._storage[table]
+
+    @staticmethod
+    def primary_key(table):
+        if table not in HISTORY_TABLES:
+            raise ValueError(f"❌ La tabla '{table}' no tiene historial.")
+        return HISTORY_TABLES[table]
+
+    def rows(self, table):
+        """[(row_id, etiqueta, cambios, borrada)] de las filas con historial, recientes primero."""
+        pk = self.primary_key(table)
+        with self.db.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT h.row_id,
+                       COALESCE(t.job, (array_agg(h.delta ->> 'job' ORDER BY h.history_id DESC)
+                                        FILTER (WHERE h.op = 'DELETE'))[1]) AS job,
+                       COALESCE(t.lang, (array_agg(h.delta ->> 'lang' ORDER BY h.history_id DESC)
+                                         FILTER (WHERE h.op = 'DELETE'))[1]) AS lang,
+                       COALESCE(t.company_name, (array_agg(h.delta ->> 'company_name' ORDER BY h.history_id DESC)
+                                                 FILTER (WHERE h.op = 'DELETE'))[1]) AS company_name,
+                       count(*) AS changes,
+                       t.{pk} IS NULL AS deleted
+                FROM row_history h
+                LEFT JOIN {table} t ON t.{pk} = h.row_id
+                WHERE h.table_name = %s
+                GROUP BY h.row_id, t.{pk}, t.job, t.lang, t.company_name
+                ORDER BY max(h.history_id) DESC;
+                """,
+                (table,),
+            )
+            return [
+                (row_id, f"{job} — {lang} — {company_name}", changes, deleted)
+                for row_id, job, lang, company_name, changes, deleted in cur.fetchall()
+            ]
+
+    def versions(self, table, row_id):
+        """Versiones de una fila, la más reciente primero.
+
+        Cada elemento es un dict con history_id, op, changed_at, columns
+        (columnas que cambió) y state: la fila como quedó tras ese cambio
+        (None si el cambio fue un DELETE).
+        """
+        pk = self.primary_key(table)
+        storage = self.storage_table(table)
+        with span("history.versions", table=table):
+            with self.db.cursor() as cur:
+                cur.execute(f"SELECT to_jsonb(t) FROM {storage} t WHERE t.{pk} = %s;", (row_id,))
+                current = cur.fetchone()
+                cur.execute(
+                    """
+                    SELECT history_id, op, changed_at, delta
+                    FROM row_history
+                    WHERE table_name = %s AND row_id = %s
+                    ORDER BY history_id DESC;
+                    """,
+                    (table, row_id),
+                )
+                entries = cur.fetchall()
+
+        state = current[0] if current else None
+        versions = []
+        for history_id, op, changed_at, delta in entries:
+            versions.append({
+                "history_id": history_id,
+                "op": op,
+                "changed_at": changed_at,
+                "columns": sorted(delta) if op == "UPDATE" else [],
+                "state": state,
+            })
+            if op == "INSERT":
+                state = None
+            elif op == "DELETE":
+                state = dict(delta)  # el DELETE guarda la fila completa
+            else:
+                state = apply_delta(state, delta)
+        return versions
+
+    @staticmethod
+    def fit_columns(cur, table, state):
+        """La versión con las columnas actuales de `table` (deltas viejos pueden traer columnas borradas)."""
+        from psycopg2 import sql
+
+        state = dict(state)
+        for column, (query, sources) in LEGACY_KEYS.get(table, {}).items():
+            if state.get(column) is None and all(state.get(source) is not None for source in sources):
+                cur.execute(query, [state[source] for source in sources])
+                found = cur.fetchone()
+                state[column] = found[0] if found else None
+        cur.execute(sql.SQL("SELECT * FROM {} LIMIT 0;").format(sql.Identifier(table)))
+        current = {column.name for column in cur.description}
+        return {column: value for column, value in state.items() if column in current}
+
+    def restore(self, table, row_id, history_id):
+        """Vuelve la fila a la versión de history_id; la restauración queda en el historial."""
+        from psycopg2 import sql
+        from psycopg2.extras import Json
+
+        pk = self.primary_key(table)
+        version = next((v for v in self.versions(table, row_id) if v["history_id"] == history_id), None)
+        if version is None or version["state"] is None:
+            raise ValueError("❌ Esa versión no tiene una fila que restaurar.")
+        state = version["state"]
+        table = self.storage_table(table)
+
+        with span("history.restore", table=table):
+            with self.db.cursor() as cur:
+                state = self.fit_columns(cur, table, state)
+                columns = [column for column in state if column != pk]
+                cur.execute(sql.SQL("SELECT 1 FROM {} WHERE {} = %s;").format(
+                    sql.Identifier(table), sql.Identifier(pk)), (row_id,))
+                exists = cur.fetchone() is not None
+                if exists:
+                    cur.execute(
+                        sql.SQL("UPDATE {table} AS t SET {assignments} "
+                                "FROM jsonb_populate_record(NULL::{table}, %s) AS r WHERE t.{pk} = %s;").format(
+                            table=sql.Identifier(table),
+                            pk=sql.Identifier(pk),
+                            assignments=sql.SQL(", ").join(
+                                sql.SQL("{col} = r.{col}").format(col=sql.Identifier(column)) for column in columns
+                            ),
+                        ),
+                        (Json(state), row_id),
+                    )
+                else:
+                    cur.execute(
+                        sql.SQL("INSERT INTO {table} SELECT * FROM jsonb_populate_record(NULL::{table}, %s);").format(
+                            table=sql.Identifier(table)),
+                        (Json(state),),
+                    )
+        return state
@@ -0,0 +1,79 @@
+"""Chequeo de regresión del tiempo de importación (python -X importtime).
+
+Uso:
+    python -m Library.import_budget                      # carrier_management, 150 ms
+    python -m Library.import_budget --module pages_mod --budget-ms 300
+
+Falla (exit code 1) si el import acumulado excede el presupuesto o si el
+módulo arrastra alguna de las dependencias pesadas que deben ser diferidas.
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_PATH = Path(__file__).resolve().parent.parent
+
+DEFAULT_MODULE = "carrier_management"
+DEFAULT_BUDGET_MS = 150.0
+# Dependencias que el menú del CLI no debe importar al arrancar
+HEAVY_MODULES = ("pandas", "docx", "sqlalchemy", "psycopg2", "selenium", "streamlit")
+
+
+def measure_import(module):
+    """Importa `module` en un proceso limpio y devuelve {módulo: cumulativo_us}."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BASE_PATH,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        error_lines = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        raise ImportError(f"No se pudo importar {module}:\n" + "\n".join(error_lines[-5:]))
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        timings[name] = max(timings.get(name, 0), int(parts[1].strip()))
+    return timings
+
+
+def check_budget(module=DEFAULT_MODULE, budget_ms=DEFAULT_BUDGET_MS, heavy=HEAVY_MODULES):
+    try:
+        timings = measure_import(module)
+    except ImportError as e:
+        print(f"❌ {e}")
+        return False
+    total_ms = timings.get(module, 0) / 1000.0
+    leaked = sorted(name for name in timings if name in heavy)
+    slowest = sorted(timings.items(), key=lambda item: item[1], reverse=True)[:10]
+
+    print(f"⏱️  import {module}: {total_ms:.1f} ms (presupuesto {budget_ms:.0f} ms)")
+    for name, cumulative in slowest:
+        print(f"   {cumulative / 1000.0:8.1f} ms  {name}")
+
+    ok = True
+    if total_ms > budget_ms:
+        print(f"❌ El import de {module} excede el presupuesto por {total_ms - budget_ms:.1f} ms.")
+        ok = False
+    if leaked:
+        print(f"❌ Dependencias pesadas importadas al arrancar: {', '.join(leaked)}")
+        ok = False
+    if ok:
+        print("✅ Tiempo de importación dentro del presupuesto.")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args()
+    sys.exit(0 if check_budget(args.module, args.budget_ms) else 1)
@@ -0,0 +1,192 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from functools import wraps
+
+# Variables de entorno que controlan la instrumentación:
+#   CAREER_TRACE=1            -> exporta cada span como una línea JSON (logging)
+#   CAREER_TRACE_LOG=<path>   -> manda los logs JSON a un archivo en lugar de stderr
+#   CAREER_TRACE_OTEL=<path>  -> además escribe los spans en formato OTLP/JSON (OpenTelemetry)
+TRACE_ENV = "CAREER_TRACE"
+TRACE_LOG_ENV = "CAREER_TRACE_LOG"
+TRACE_OTEL_ENV = "CAREER_TRACE_OTEL"
+SERVICE_NAME = "career_manager"
+
+
+class _NoopSpan:
+    """Span vacío que se devuelve cuando la instrumentación está apagada."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "attrs", "trace_id", "span_id", "parent_id",
+                 "start_ns", "start_perf", "duration_ms", "error")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.error = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        parent = stack[-1] if stack else None
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.parent_id = parent.span_id if parent else None
+        self.span_id = uuid.uuid4().hex[:16]
+        stack.append(self)
+        self.start_ns = time.time_ns()
+        self.start_perf = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration_ms = (time.perf_counter() - self.start_perf) * 1000.0
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        self.tracer._finish(self, depth=len(stack))
+        return False
+
+
+class TRACER:
+    """Spans ligeros (context manager / decorador) para medir los hot paths."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.configure()
+
+    def configure(self, enabled=None, log_path=None, otel_path=None):
+        if enabled is None:
+            enabled = os.getenv(TRACE_ENV, "").strip().lower() in ("1", "true", "yes", "json")
+        self.enabled = bool(enabled)
+        self.otel_path = otel_path or os.getenv(TRACE_OTEL_ENV) or None
+        log_path = log_path or os.getenv(TRACE_LOG_ENV) or None
+
+        self.logger = logging.getLogger(f"{SERVICE_NAME}.trace")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+        handler = logging.FileHandler(log_path, encoding="utf-8") if log_path else logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self.logger.addHandler(handler)
+
+    # ===== API pública =====
+    def span(self, name, **attrs):
+        if not self.enabled and not getattr(self._local, "collect", False):
+            return _NOOP_SPAN
+        return _Span(self, name, attrs)
+
+    def timed(self, name=None):
+        def decorator(func):
+            span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled and not getattr(self._local, "collect", False):
+                    return func(*args, **kwargs)
+                with _Span(self, span_name, {}):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def start_run(self):
+        """Empieza a acumular los spans del hilo actual (un rerun de Streamlit)."""
+        self._local.collect = True
+        self._local.records = []
+
+    def stop_run(self):
+        """Deja de acumular spans en el hilo actual y descarta los pendientes."""
+        self._local.collect = False
+        self._local.records = []
+
+    def run_records(self):
+        """Devuelve los spans acumulados desde start_run() como lista de dicts."""
+        return list(getattr(self._local, "records", []))
+
+    # ===== Internos =====
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _finish(self, span, depth):
+        record = {
+            "name": span.name,
+            "duration_ms": round(span.duration_ms, 3),
+            "depth": depth,
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "start": span.start_ns / 1e9,
+            "attrs": span.attrs,
+        }
+        if span.error:
+            record["error"] = span.error
+
+        if getattr(self._local, "collect", False):
+            self._local.records.append(record)
+        if not self.enabled:
+            return
+        self.logger.info(json.dumps(record, default=str, ensure_ascii=False))
+        if self.otel_path:
+            self._write_otel(span)
+
+    def _write_otel(self, span):
+        end_ns = span.start_ns + int(span.duration_ms * 1e6)
+        attributes = [
+            {"key": key, "value": {"stringValue": str(value)}}
+            for key, value in span.attrs.items()
+        ]
+        otel_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(end_ns),
+            "attributes": attributes,
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            otel_span["parentSpanId"] = span.parent_id
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": SERVICE_NAME}}
+                ]},
+                "scopeSpans": [{"scope": {"name": SERVICE_NAME}, "spans": [otel_span]}],
+            }]
+        }
+        line = json.dumps(payload, ensure_ascii=False)
+        with self._lock:
+            with open(self.otel_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+# Instancia compartida por todos los módulos
+tracer = TRACER()
+span = tracer.span
+timed = tracer.timed
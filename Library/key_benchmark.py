@@ -0,0 +1,209 @@
+"""Compara llaves TEXT contra llaves enteras (migración 001) con datos sintéticos.
+
+Uso:
+    python -m Library.key_benchmark                    # 50 000 aplicaciones, 2 000 companies
+    python -m Library.key_benchmark --rows 200000 --companies 5000 --repeat 7
+
+Crea tablas TEMP con los dos esquemas (el de antes: job/lang/company_name en
+cada tabla; el de después: company_id, type_id y application_id), mide el
+tamaño de los índices, el tiempo del join cover_letters → applications →
+companies con EXPLAIN ANALYZE y el costo de renombrar una company. Todo corre
+en una transacción que se descarta al final: no toca el schema de la app.
+"""
+import argparse
+import statistics
+import time
+
+from colorama import Fore, Style, init
+
+try:
+    from Library.settings import bootstrap
+except ModuleNotFoundError:
+    # fallback if running inside the Library folder
+    from settings import bootstrap
+
+DEFAULT_ROWS = 50_000
+DEFAULT_COMPANIES = 2_000
+DEFAULT_REPEAT = 5
+
+TEXT_LAYOUT = """
+CREATE TEMP TABLE bench_text_companies (
+    company_name TEXT PRIMARY KEY,
+    company_type TEXT NOT NULL
+);
+CREATE TEMP TABLE bench_text_applications (
+    application_id SERIAL PRIMARY KEY,
+    job TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    company_name TEXT NOT NULL REFERENCES bench_text_companies(company_name) ON UPDATE CASCADE,
+    company_type TEXT NOT NULL,
+    UNIQUE (job, lang, company_name)
+);
+CREATE TEMP TABLE bench_text_letters (
+    cover_id SERIAL PRIMARY KEY,
+    job TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    company_name TEXT NOT NULL,
+    body TEXT,
+    UNIQUE (job, lang, company_name),
+    FOREIGN KEY (job, lang, company_name)
+        REFERENCES bench_text_applications(job, lang, company_name) ON UPDATE CASCADE
+);
+CREATE INDEX ON bench_text_applications (company_name);
+INSERT INTO bench_text_companies
+SELECT format('Company %s Servicios Profesionales S.A. de C.V.', lpad(i::text, 6, '0')),
+       format('Industry type %s', i % 12)
+FROM generate_series(1, {companies}) AS i;
+INSERT INTO bench_text_applications (job, lang, company_name, company_type)
+SELECT format('Senior Data Engineer position %s', i),
+       (ARRAY['en', 'es', 'fr'])[1 + i % 3],
+       format('Company %s Servicios Profesionales S.A. de C.V.', lpad((1 + i % {companies})::text, 6, '0')),
+       format('Industry type %s', (1 + i % {companies}) % 12)
+FROM generate_series(1, {rows}) AS i;
+INSERT INTO bench_text_letters (job, lang, company_name, body)
+SELECT job, lang, company_name, 'Dear hiring manager' FROM bench_text_applications;
+"""
+
+INTEGER_LAYOUT = """
+CREATE TEMP TABLE bench_int_types (
+    type_id SERIAL PRIMARY KEY,
+    company_type TEXT NOT NULL UNIQUE
+);
+CREATE TEMP TABLE bench_int_companies (
+    company_id SERIAL PRIMARY KEY,
+    company_name TEXT NOT NULL UNIQUE,
+    type_id INTEGER NOT NULL REFERENCES bench_int_types(type_id)
+);
+CREATE TEMP TABLE bench_int_applications (
+    application_id SERIAL PRIMARY KEY,
+    job TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    company_id INTEGER NOT NULL REFERENCES bench_int_companies(company_id),
+    type_id INTEGER NOT NULL REFERENCES bench_int_types(type_id),
+    UNIQUE (job, lang, company_id)
+);
+CREATE TEMP TABLE bench_int_letters (
+    cover_id SERIAL PRIMARY KEY,
+    application_id INTEGER NOT NULL UNIQUE REFERENCES bench_int_applications(application_id),
+    body TEXT
+);
+CREATE INDEX ON bench_int_applications (company_id);
+INSERT INTO bench_int_types (company_type)
+SELECT format('Industry type %s', i) FROM generate_series(0, 11) AS i;
+INSERT INTO bench_int_companies (company_name, type_id)
+SELECT format('Company %s Servicios Profesionales S.A. de C.V.', lpad(i::text, 6, '0')), 1 + i % 12
+FROM generate_series(1, {companies}) AS i;
+INSERT INTO bench_int_applications (job, lang, company_id, type_id)
+SELECT format('Senior Data Engineer position %s', i),
+       (ARRAY['en', 'es', 'fr'])[1 + i % 3],
+       1 + i % {companies},
+       1 + (1 + i % {companies}) % 12
+FROM generate_series(1, {rows}) AS i;
+INSERT INTO bench_int_letters (application_id, body)
+SELECT application_id, 'Dear hiring manager' FROM bench_int_applications;
+"""
+
+LAYOUTS = {
+    "TEXT": {
+        "ddl": TEXT_LAYOUT,
+        "tables": ("bench_text_companies", "bench_text_applications", "bench_text_letters"),
+        "join": """
+            SELECT a.job, a.lang, c.company_name, c.company_type, l.body
+            FROM bench_text_letters l
+            JOIN bench_text_applications a
+              ON a.job = l.job AND a.lang = l.lang AND a.company_name = l.company_name
+            JOIN bench_text_companies c ON c.company_name = a.company_name
+        """,
+        "rename": """
+            UPDATE bench_text_companies SET company_name = company_name || ' (renamed)'
+            WHERE company_name = format('Company %s Servicios Profesionales S.A. de C.V.', lpad('1', 6, '0'));
+        """,
+    },
+    "INTEGER": {
+        "ddl": INTEGER_LAYOUT,
+        "tables": ("bench_int_types", "bench_int_companies", "bench_int_applications", "bench_int_letters"),
+        "join": """
+            SELECT a.job, a.lang, c.company_name, t.company_type, l.body
+            FROM bench_int_letters l
+            JOIN bench_int_applications a ON a.application_id = l.application_id
+            JOIN bench_int_companies c ON c.company_id = a.company_id
+            JOIN bench_int_types t ON t.type_id = c.type_id
+        """,
+        "rename": """
+            UPDATE bench_int_companies SET company_name = company_name || ' (renamed)'
+            WHERE company_name = format('Company %s Servicios Profesionales S.A. de C.V.', lpad('1', 6, '0'));
+        """,
+    },
+}
+
+
+def index_bytes(cur, tables):
+    cur.execute("SELECT sum(pg_indexes_size(t::regclass)) FROM unnest(%s::text[]) AS t;", (list(tables),))
+    return int(cur.fetchone()[0] or 0)
+
+
+def join_ms(cur, query, repeat):
+    """Mediana de 'Execution Time' de EXPLAIN ANALYZE sobre `repeat` corridas."""
+    timings = []
+    for _ in range(repeat):
+        cur.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {query}")
+        plan = cur.fetchone()[0]
+        timings.append(plan[0]["Execution Time"])
+    return statistics.median(timings)
+
+
+def rename_ms(cur, query, repeat):
+    """Mediana del UPDATE de una company (incluye los ON UPDATE CASCADE); se revierte cada vez."""
+    timings = []
+    for _ in range(repeat):
+        cur.execute("SAVEPOINT bench_rename;")
+        start = time.perf_counter()
+        cur.execute(query)
+        timings.append((time.perf_counter() - start) * 1000)
+        cur.execute("ROLLBACK TO SAVEPOINT bench_rename;")
+    return statistics.median(timings)
+
+
+def run_benchmark(db_url, rows=DEFAULT_ROWS, companies=DEFAULT_COMPANIES, repeat=DEFAULT_REPEAT):
+    """{layout: {index_mb, join_ms, rename_ms}} para los dos esquemas."""
+    import psycopg2
+
+    results = {}
+    conn = psycopg2.connect(db_url)
+    try:
+        with conn.cursor() as cur:
+            for name, layout in LAYOUTS.items():
+                print(f"⏳ Cargando layout {name} ({rows:,} aplicaciones)...")
+                ddl = layout["ddl"].replace("{rows}", str(int(rows))).replace("{companies}", str(int(companies)))
+                for statement in filter(None, (s.strip() for s in ddl.split(";"))):
+                    cur.execute(statement)
+                for table in layout["tables"]:
+                    cur.execute(f"ANALYZE {table};")
+                results[name] = {
+                    "index_mb": index_bytes(cur, layout["tables"]) / 1024 / 1024,
+                    "join_ms": join_ms(cur, layout["join"], repeat),
+                    "rename_ms": rename_ms(cur, layout["rename"], repeat),
+                }
+    finally:
+        conn.rollback()  # las tablas TEMP y los datos no sobreviven
+        conn.close()
+    return results
+
+
+def print_results(results):
+    text, integer = results["TEXT"], results["INTEGER"]
+    print(f"\n{'':<22}{'TEXT':>12}{'INTEGER':>12}{'ratio':>9}")
+    for metric, label in (("index_mb", "Índices (MB)"), ("join_ms", "Join (ms)"), ("rename_ms", "Rename company (ms)")):
+        ratio = text[metric] / integer[metric] if integer[metric] else float("inf")
+        color = Fore.GREEN if ratio >= 1 else Fore.YELLOW
+        print(f"{label:<22}{text[metric]:>12.2f}{integer[metric]:>12.2f}{color}{ratio:>8.1f}x{Style.RESET_ALL}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="aplicaciones (y cartas) sintéticas")
+    parser.add_argument("--companies", type=int, default=DEFAULT_COMPANIES)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="corridas por medición (se usa la mediana)")
+    args = parser.parse_args()
+    init(autoreset=True)
+    print_results(run_benchmark(bootstrap().db_url, args.rows, args.companies, args.repeat))
@@ -0,0 +1,628 @@
+"""Réplica local en SQLite del schema de un tenant, para trabajar sin conexión.
+
+Uso:
+    python -m Library.local_replica --pull                # copia las tablas del tenant
+    python -m Library.local_replica --sync                # envía el outbox y trae cambios
+    python -m Library.local_replica --sync --watch 30     # cada 30 s mientras haya red
+    python -m Library.local_replica --status              # pendientes y conflictos
+
+Con CAREER_LOCAL_REPLICA=1 (o una carpeta) las páginas de Streamlit y
+CV_GENERATION leen y escriben en el archivo SQLite, adjuntado con el nombre
+del schema para que las consultas existentes funcionen igual. Triggers
+locales guardan cada fila escrita en _outbox, en la misma transacción. La
+sincronización la envía a Postgres por lotes y sólo aplica un cambio si la
+fila del servidor sigue en la versión (md5 de la fila) sobre la que se
+editó; si no, queda en _conflicts y gana la versión del servidor.
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from datetime import time as day_time
+from decimal import Decimal
+
+try:
+    from Library.instrumentation import span
+    from Library.settings import bootstrap, get_settings
+except ModuleNotFoundError:
+    # fallback if running inside the Library folder
+    from instrumentation import span
+    from settings import bootstrap, get_settings
+
+LOCAL_ENV = "CAREER_LOCAL_REPLICA"
+LOCAL_FOLDER = "local_replica"
+# Tabla lógica -> llave primaria (applications y cover_letters pueden ser vistas, ver migración 001)
+MIRROR_TABLES = {
+    "company_types": "type_id",
+    "companies": "company_id",
+    "languages": "lang",
+    "cv_files": "cv_file",
+    "applications": "application_id",
+    "cover_letters": "cover_id",
+    "job_tracker": "application_id",
+}
+# Llaves SERIAL: al insertar se deja que Postgres asigne el id
+SERIAL_TABLES = ("company_types", "companies", "applications", "cover_letters", "job_tracker")
+# Columnas que apuntan a la llave de otra tabla de la réplica (esquema con llaves enteras, migración 001)
+REFERENCES = {
+    "applications": {"company_id": "companies", "type_id": "company_types"},
+    "cover_letters": {"application_id": "applications"},
+}
+SYNC_BATCH = 200
+ROW_VERSION_SQL = "md5(to_jsonb(t.*)::text)"
+# OID de Postgres -> tipo guardado en _sync_state (el resto se guarda como texto)
+PG_TYPES = {
+    16: "boolean", 20: "integer", 21: "integer", 23: "integer",
+    700: "real", 701: "real", 1700: "numeric", 17: "bytea",
+    114: "json", 3802: "jsonb", 1007: "array", 1009: "array", 1015: "array",
+}
+SQLITE_AFFINITY = {"boolean": "INTEGER", "integer": "INTEGER", "real": "REAL", "numeric": "REAL", "bytea": "BLOB"}
+PLACEHOLDER_RE = re.compile(r"=\s*ANY\s*\(\s*%s\s*\)|%\((\w+)\)s|%s", re.IGNORECASE)
+CAST_RE = re.compile(r"::\w+(\[\])?")
+ILIKE_RE = re.compile(r"\bILIKE\b", re.IGNORECASE)
+
+INTERNAL_TABLES = """
+CREATE TABLE IF NOT EXISTS "{schema}".data_versions (table_name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE IF NOT EXISTS "{schema}"._sync_state (
+    table_name TEXT PRIMARY KEY, server_version INTEGER, columns TEXT NOT NULL, pulled_at TEXT);
+CREATE TABLE IF NOT EXISTS "{schema}"._row_versions (
+    table_name TEXT NOT NULL, pk NOT NULL, version TEXT NOT NULL, PRIMARY KEY (table_name, pk));
+CREATE TABLE IF NOT EXISTS "{schema}"._sync_flag (applying INTEGER NOT NULL);
+INSERT INTO "{schema}"._sync_flag (applying) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM "{schema}"._sync_flag);
+CREATE TABLE IF NOT EXISTS "{schema}"._outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, table_name TEXT NOT NULL, op TEXT NOT NULL, pk,
+    row TEXT, base_version TEXT, created_at TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT);
+CREATE TABLE IF NOT EXISTS "{schema}"._local_ids (
+    table_name TEXT NOT NULL, pk NOT NULL, status TEXT NOT NULL, server_pk, version TEXT,
+    PRIMARY KEY (table_name, pk));
+CREATE TABLE IF NOT EXISTS "{schema}"._conflicts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, table_name TEXT NOT NULL, op TEXT NOT NULL, pk,
+    local_row TEXT, server_row TEXT, error TEXT, detected_at TEXT NOT NULL);
+"""
+
+
+def local_enabled():
+    return os.getenv(LOCAL_ENV, "").strip().lower() not in ("", "0", "false", "no")
+
+
+def to_sqlite_value(value):
+    """Valor de Postgres/Python -> valor que SQLite guarda sin adaptadores."""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, (date, day_time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, memoryview):
+        return bytes(value)
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return value
+
+
+def to_sqlite_query(query, params=None):
+    """Traduce una consulta de psycopg2 (%s, %(x)s, = ANY(%s), ILIKE, ::tipo) a SQLite."""
+    query = ILIKE_RE.sub("LIKE", CAST_RE.sub("", query))
+    if isinstance(params, dict):
+        sql = PLACEHOLDER_RE.sub(lambda m: f":{m.group(1)}" if m.group(1) else m.group(0), query)
+        return sql.replace("%%", "%"), {key: to_sqlite_value(value) for key, value in params.items()}
+
+    values = list(params or ())
+    converted = []
+    position = 0
+
+    def replace(match):
+        nonlocal position
+        value = values[position]
+        position += 1
+        if match.group(0) != "%s":
+            # = ANY(%s) con una lista -> IN (?, ?, ...)
+            items = list(value)
+            converted.extend(to_sqlite_value(item) for item in items)
+            return f"IN ({', '.join(['?'] * len(items))})" if items else "IN (NULL)"
+        converted.append(to_sqlite_value(value))
+        return "?"
+
+    sql = PLACEHOLDER_RE.sub(replace, query)
+    return sql.replace("%%", "%"), converted
+
+
+class _Column:
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class LOCAL_CURSOR:
+    """Cursor de SQLite con la interfaz que usa el repo de psycopg2 (execute con %s, description[i].name).
+
+    Cada consulta que SQLite no puede correr (tabla que no está en la réplica,
+    como template_registry, o sintaxis de Postgres) se manda a Postgres con
+    `fallback()`; la siguiente vuelve a intentar en SQLite. execute_values
+    (usa mogrify y connection, que sólo existen en psycopg2) deja el resto del
+    cursor en Postgres: esas escrituras en bloque nunca van a SQLite.
+    """
+
+    def __init__(self, cursor, decoders, fallback=None):
+        self._cursor = cursor
+        self._decoders = decoders
+        self._fallback = fallback
+        self._remote = None
+        self._pinned = False
+        self._active = cursor  # de dónde salen los fetch* de la última consulta
+        self.description = None
+
+    def _remote_cursor(self):
+        if self._remote is None:
+            if self._fallback is None:
+                raise sqlite3.OperationalError("La réplica local no tiene conexión a Postgres para esta consulta.")
+            self._remote = self._fallback()
+        return self._remote
+
+    def execute(self, query, params=None):
+        if not self._pinned:
+            sql, values = to_sqlite_query(query, params)
+            try:
+                self._cursor.execute(sql, values)
+            except sqlite3.OperationalError:
+                if self._fallback is None:
+                    raise
+            else:
+                self._active = self._cursor
+                self.description = [_Column(column[0]) for column in self._cursor.description or ()] or None
+                return self
+        remote = self._remote_cursor()
+        remote.execute(query, params)
+        self._active = remote
+        self.description = remote.description
+        return self
+
+    # ===== Sólo psycopg2 (execute_values): el cursor pasa a Postgres =====
+    @property
+    def connection(self):
+        self._pinned = True
+        return self._remote_cursor().connection
+
+    def mogrify(self, query, params=None):
+        self._pinned = True
+        return self._remote_cursor().mogrify(query, params)
+
+    @property
+    def rowcount(self):
+        return self._active.rowcount
+
+    def _decode(self, row):
+        if row is None or not self._decoders or not self.description:
+            return row
+        return tuple(
+            self._decoders[column.name](value) if value is not None and column.name in self._decoders else value
+            for column, value in zip(self.description, row)
+        )
+
+    def fetchone(self):
+        if self._active is self._remote:
+            return self._remote.fetchone()
+        return self._decode(self._cursor.fetchone())
+
+    def fetchmany(self, size):
+        if self._active is self._remote:
+            return self._remote.fetchmany(size)
+        return [self._decode(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        if self._active is self._remote:
+            return self._remote.fetchall()
+        return [self._decode(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+
+class LOCAL_REPLICA:
+    """Archivo SQLite con las tablas del tenant, su outbox y el estado de sincronización."""
+    _instances = {}
+    _lock = threading.Lock()
+
+    def __init__(self, path, schema):
+        self.path = path
+        self.schema = schema
+        self._local = threading.local()
+        self._decoders = None
+        self._pulled = False
+        with self.connection() as conn:
+            conn.executescript(INTERNAL_TABLES.format(schema=schema))
+
+    @classmethod
+    def from_env(cls, schema):
+        """Réplica del schema si CAREER_LOCAL_REPLICA está activo (1 o una carpeta); None si no."""
+        if not local_enabled():
+            return None
+        value = os.getenv(LOCAL_ENV).strip()
+        folder = value if value.lower() not in ("1", "true", "yes") else None
+        if folder is None:
+            folder = os.path.join(str(get_settings().working_folder or "."), LOCAL_FOLDER)
+        path = os.path.join(folder, f"{schema}.sqlite3")
+        replica = cls._instances.get(path)
+        if replica is None:
+            with cls._lock:
+                replica = cls._instances.get(path)
+                if replica is None:
+                    os.makedirs(folder, exist_ok=True)
+                    replica = cls._instances[path] = cls(path, schema)
+        return replica
+
+    # ===== Conexiones =====
+    def _connect(self):
+        conn = sqlite3.connect(":memory:", timeout=30, check_same_thread=False)
+        # Adjuntado con el nombre del schema: sirven los nombres calificados y los sin calificar
+        conn.execute("ATTACH DATABASE ? AS " + f'"{self.schema}"', (self.path,))
+        conn.execute(f'PRAGMA "{self.schema}".journal_mode = WAL;')
+        conn.execute(f'PRAGMA "{self.schema}".synchronous = FULL;')  # el outbox sobrevive a un corte
+        return conn
+
+    def connection(self):
+        """Conexión SQLite del hilo actual (se usa como context manager: commit/rollback)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def decoders(self):
+        """{columna: función} para booleanos, arreglos y json guardados como texto."""
+        if self._decoders is None:
+            decoders = {}
+            with self.connection() as conn:
+                for (columns,) in conn.execute("SELECT columns FROM _sync_state;"):
+                    for name, pg_type in json.loads(columns):
+                        if pg_type == "boolean":
+                            decoders[name] = bool
+                        elif pg_type in ("array", "json", "jsonb"):
+                            decoders[name] = json.loads
+            self._decoders = decoders
+        return self._decoders
+
+    def cursor(self, fallback=None):
+        return LOCAL_CURSOR(self.connection().cursor(), self.decoders(), fallback)
+
+    def pulled(self):
+        """True si ya hay una copia local (antes de la primera copia se lee de Postgres)."""
+        if not self._pulled:
+            with self.connection() as conn:
+                self._pulled = conn.execute("SELECT count(*) FROM _sync_state;").fetchone()[0] > 0
+        return self._pulled
+
+    # ===== Pull (Postgres -> SQLite) =====
+    def pull(self, db):
+        """Copia las tablas cuya versión en data_versions cambió; devuelve las tablas copiadas."""
+        try:
+            with db.cursor() as cur:
+                cur.execute("SELECT table_name, version FROM data_versions WHERE table_name = ANY(%s);",
+                            (list(MIRROR_TABLES),))
+                server_versions = dict(cur.fetchall())
+        except Exception:
+            server_versions = {}  # schema sin data_versions: se copian todas
+        with self.connection() as conn:
+            state = dict(conn.execute("SELECT table_name, server_version FROM _sync_state;").fetchall())
+            pending = {row[0] for row in conn.execute("SELECT DISTINCT table_name FROM _outbox;")}
+
+        pulled = []
+        for table, pk in MIRROR_TABLES.items():
+            version = server_versions.get(table)
+            if table in state and version is not None and state[table] == version:
+                continue
+            if table in pending:
+                print(f"⚠️ {table} tiene cambios locales sin enviar; no se actualiza hasta sincronizarlos.")
+                continue
+            with span("local.pull", table=table):
+                with db.cursor() as cur:
+                    cur.execute(f"SELECT t.*, {ROW_VERSION_SQL} AS _row_version FROM {table} t;")
+                    columns = [(column.name, PG_TYPES.get(column.type_code, "text")) for column in cur.description[:-1]]
+                    rows = cur.fetchall()
+                self._replace(table, pk, columns, rows, version)
+            pulled.append(table)
+        if not pending:
+            # Sin outbox ya no hay operaciones que traducir: las filas locales ya tienen el id del servidor
+            with self.connection() as conn:
+                conn.execute("DELETE FROM _local_ids;")
+        if pulled:
+            self._decoders = None
+        return pulled
+
+    def _replace(self, table, pk, columns, rows, server_version):
+        names = [name for name, _ in columns]
+        pk_index = names.index(pk)
+        with self.connection() as conn:
+            conn.execute("UPDATE _sync_flag SET applying = 1;")
+            saved = conn.execute("SELECT columns FROM _sync_state WHERE table_name = ?;", (table,)).fetchone()
+            if saved is None or json.loads(saved[0]) != [list(column) for column in columns]:
+                self._create_table(conn, table, pk, columns)
+            conn.execute(f'DELETE FROM "{table}";')
+            conn.execute("DELETE FROM _row_versions WHERE table_name = ?;", (table,))
+            quoted = ", ".join(f'"{name}"' for name in names)
+            conn.executemany(
+                f'INSERT INTO "{table}" ({quoted}) VALUES ({", ".join(["?"] * len(names))});',
+                ([to_sqlite_value(value) for value in row[:-1]] for row in rows),
+            )
+            conn.executemany("INSERT INTO _row_versions (table_name, pk, version) VALUES (?, ?, ?);",
+                             ((table, to_sqlite_value(row[pk_index]), row[-1]) for row in rows))
+            conn.execute(
+                "INSERT INTO _sync_state (table_name, server_version, columns, pulled_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (table_name) DO UPDATE SET server_version = excluded.server_version, "
+                "columns = excluded.columns, pulled_at = excluded.pulled_at;",
+                (table, server_version, json.dumps(columns), datetime.now().isoformat(timespec="seconds")),
+            )
+            # El sello local sólo tiene que cambiar cuando cambia el contenido local
+            conn.execute(
+                "INSERT INTO data_versions (table_name, version) VALUES (?, 1) "
+                "ON CONFLICT (table_name) DO UPDATE SET version = version + 1;",
+                (table,),
+            )
+            conn.execute("UPDATE _sync_flag SET applying = 0;")
+
+    def _create_table(self, conn, table, pk, columns):
+        conn.execute(f'DROP TABLE IF EXISTS "{self.schema}"."{table}";')
+        definitions = []
+        for name, pg_type in columns:
+            affinity = SQLITE_AFFINITY.get(pg_type, "TEXT")
+            definitions.append(f'"{name}" {affinity}' + (" PRIMARY KEY" if name == pk else ""))
+        conn.execute(f'CREATE TABLE "{self.schema}"."{table}" ({", ".join(definitions)});')
+
+        # Cada escritura local queda en _outbox (y sube el sello de versión) en la misma transacción
+        row_json = "json_object(" + ", ".join(f"'{name}', NEW.\"{name}\"" for name, _ in columns) + ")"
+        base = f"(SELECT version FROM _row_versions WHERE table_name = '{table}' AND pk = OLD.\"{pk}\")"
+        for op, key, row, base_version in (
+            ("INSERT", f'NEW."{pk}"', row_json, "NULL"),
+            ("UPDATE", f'OLD."{pk}"', row_json, base),
+            ("DELETE", f'OLD."{pk}"', "NULL", base),
+        ):
+            conn.execute(
+                f'CREATE TRIGGER "{self.schema}"."{table}_outbox_{op.lower()}" AFTER {op} ON "{table}" '
+                f"WHEN (SELECT applying FROM _sync_flag) = 0 BEGIN "
+                f"INSERT INTO _outbox (table_name, op, pk, row, base_version, created_at) "
+                f"VALUES ('{table}', '{op}', {key}, {row}, {base_version}, CURRENT_TIMESTAMP); "
+                f"UPDATE data_versions SET version = version + 1 WHERE table_name = '{table}'; "
+                f"END;"
+            )
+
+    # ===== Push (SQLite -> Postgres) =====
+    def column_types(self, table):
+        with self.connection() as conn:
+            row = conn.execute("SELECT columns FROM _sync_state WHERE table_name = ?;", (table,)).fetchone()
+        return dict(json.loads(row[0])) if row else {}
+
+    def to_server(self, table, values):
+        """Fila del outbox (json de SQLite) -> parámetros para psycopg2."""
+        types = self.column_types(table)
+        converted = {}
+        for name, value in values.items():
+            pg_type = types.get(name)
+            if value is not None and pg_type == "boolean":
+                value = bool(value)
+            elif isinstance(value, str) and pg_type in ("array", "json", "jsonb"):
+                value = json.loads(value)
+                if pg_type in ("json", "jsonb"):
+                    value = json.dumps(value)
+            converted[name] = value
+        return converted
+
+    @staticmethod
+    def same_values(values, server_row):
+        """True si la fila del servidor ya tiene estos valores (el cambio ya se había enviado)."""
+        if server_row is None:
+            return False
+        normalize = lambda v: None if v is None else str(v).replace("T", " ")
+        return all(normalize(value) == normalize(server_row.get(name)) for name, value in values.items())
+
+    def _local_ids(self):
+        """{(tabla, llave local): [estado, llave en el servidor, versión]} de las filas creadas en la réplica.
+
+        estado: pending (INSERT sin enviar), pushed (ya tiene id del servidor) o
+        conflict (el INSERT quedó en _conflicts).
+        """
+        with self.connection() as conn:
+            local_ids = {
+                (table, pk): [status, server_pk, version]
+                for table, pk, status, server_pk, version in conn.execute(
+                    "SELECT table_name, pk, status, server_pk, version FROM _local_ids;")
+            }
+            for table, pk in conn.execute("SELECT DISTINCT table_name, pk FROM _outbox WHERE op = 'INSERT';"):
+                local_ids.setdefault((table, pk), ["pending", None, None])
+        return local_ids
+
+    def _apply(self, cur, table, op, pk, row, base_version, versions, local_ids):
+        """Aplica una operación del outbox; devuelve (estado, detalle) con estado applied/conflict/blocked."""
+        key = MIRROR_TABLES[table]
+        values = self.to_server(table, json.loads(row)) if row else {}
+        # Referencias a filas creadas en la réplica -> id que les asignó el servidor
+        for column, target in REFERENCES.get(table, {}).items():
+            local = local_ids.get((target, values.get(column)))
+            if local is not None:
+                if local[0] != "pushed":
+                    return "blocked", f"{target} {values[column]} todavía no existe en el servidor"
+                values[column] = local[1]
+
+        if op == "INSERT":
+            if table in SERIAL_TABLES:
+                values.pop(key, None)
+            values = {name: value for name, value in values.items() if value is not None}  # defaults del servidor
+            columns = ", ".join(f'"{name}"' for name in values)
+            cur.execute(f"INSERT INTO {table} ({columns}) VALUES ({', '.join(['%s'] * len(values))}) RETURNING {key};",
+                        list(values.values()))
+            server_pk = cur.fetchone()[0]
+            local = local_ids[(table, pk)] = ["pushed", server_pk, None]
+        else:
+            local = local_ids.get((table, pk))
+            if local is not None:
+                # Fila creada en la réplica: sólo se aplica sobre el id asignado y con su versión
+                if local[0] == "conflict":
+                    return "conflict", "el INSERT de esta fila quedó en conflicto"
+                if local[0] != "pushed" or local[2] is None:
+                    return "blocked", "la fila todavía no se creó en el servidor"
+                server_pk, base_version = local[1], local[2]
+            else:
+                server_pk = pk
+                base_version = versions.get((table, pk), base_version)
+            values.pop(key, None)  # la llave no se reescribe
+            check = f" AND {ROW_VERSION_SQL} = %s" if base_version is not None else ""
+            params = [server_pk] + ([base_version] if base_version is not None else [])
+            if op == "UPDATE":
+                assignments = ", ".join(f'"{name}" = %s' for name in values)
+                cur.execute(f'UPDATE {table} AS t SET {assignments} WHERE t."{key}" = %s{check};',
+                            list(values.values()) + params)
+            else:
+                cur.execute(f'DELETE FROM {table} AS t WHERE t."{key}" = %s{check};', params)
+            if cur.rowcount == 0:
+                cur.execute(f'SELECT to_jsonb(t.*) FROM {table} t WHERE t."{key}" = %s;', (server_pk,))
+                found = cur.fetchone()
+                server_row = found[0] if found else None
+                already = server_row is None if op == "DELETE" else self.same_values(values, server_row)
+                if not already:
+                    return "conflict", server_row
+
+        if op != "DELETE":
+            cur.execute(f'SELECT {ROW_VERSION_SQL} FROM {table} t WHERE t."{key}" = %s;', (server_pk,))
+            found = cur.fetchone()
+            version = found[0] if found else None
+            if local is not None:
+                local[2] = version
+            else:
+                versions[(table, pk)] = version
+        return "applied", None
+
+    def push(self, db):
+        """Envía el outbox en lotes de SYNC_BATCH (una transacción de Postgres por lote)."""
+        import psycopg2
+        summary = {"applied": 0, "conflicts": 0, "failed": 0}
+        versions, blocked = {}, set()
+        local_ids = self._local_ids()
+        last_id = 0
+        while True:
+            with self.connection() as conn:
+                ops = conn.execute(
+                    "SELECT id, table_name, op, pk, row, base_version FROM _outbox WHERE id > ? ORDER BY id LIMIT ?;",
+                    (last_id, SYNC_BATCH),
+                ).fetchall()
+            if not ops:
+                return summary
+            last_id = ops[-1][0]
+            done, conflicts, failed = [], [], []
+            before = {item: list(local) for item, local in local_ids.items()}
+            with span("local.push", ops=len(ops)):
+                with db.cursor() as cur:
+                    for op_id, table, op, pk, row, base_version in ops:
+                        if (table, pk) in blocked:
+                            continue  # una operación anterior de la misma fila falló
+                        cur.execute("SAVEPOINT outbox_op;")
+                        try:
+                            status, detail = self._apply(cur, table, op, pk, row, base_version, versions, local_ids)
+                            cur.execute("RELEASE SAVEPOINT outbox_op;")
+                        except psycopg2.IntegrityError as e:
+                            cur.execute("ROLLBACK TO SAVEPOINT outbox_op;")
+                            status, detail = "conflict", None
+                            conflicts.append((op_id, table, op, pk, row, None, str(e).strip()))
+                        except psycopg2.OperationalError:
+                            raise  # sin conexión: todo el lote queda en el outbox
+                        except psycopg2.Error as e:
+                            cur.execute("ROLLBACK TO SAVEPOINT outbox_op;")
+                            status, detail = "blocked", str(e).strip()
+                        else:
+                            if status == "conflict":
+                                server_row = json.dumps(detail, default=str) if not isinstance(detail, str) else None
+                                error = detail if isinstance(detail, str) else None
+                                conflicts.append((op_id, table, op, pk, row, server_row, error))
+                        if status == "applied":
+                            done.append((op_id,))
+                        elif status == "blocked":
+                            failed.append((detail, op_id))
+                            blocked.add((table, pk))
+                        elif op == "INSERT":
+                            # Las operaciones siguientes de esta fila no tienen a qué aplicarse
+                            local_ids[(table, pk)] = ["conflict", None, None]
+            # Postgres ya hizo commit: se sacan del outbox
+            with self.connection() as conn:
+                conn.executemany("DELETE FROM _outbox WHERE id = ?;", done + [(c[0],) for c in conflicts])
+                conn.executemany(
+                    "INSERT INTO _conflicts (table_name, op, pk, local_row, server_row, error, detected_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP);",
+                    [c[1:] for c in conflicts],
+                )
+                conn.executemany("UPDATE _outbox SET attempts = attempts + 1, last_error = ? WHERE id = ?;", failed)
+                conn.executemany(
+                    "INSERT OR REPLACE INTO _local_ids (table_name, pk, status, server_pk, version) VALUES (?, ?, ?, ?, ?);",
+                    [(table, pk, *local) for (table, pk), local in local_ids.items()
+                     if local[0] != "pending" and before.get((table, pk)) != local],
+                )
+            summary["applied"] += len(done)
+            summary["conflicts"] += len(conflicts)
+            summary["failed"] += len(failed)
+
+    def sync(self, db):
+        """Envía el outbox y trae lo que cambió en el servidor (también los ids asignados)."""
+        summary = self.push(db)
+        summary["pulled"] = self.pull(db)
+        return summary
+
+    def status(self):
+        with self.connection() as conn:
+            pending = conn.execute("SELECT count(*) FROM _outbox;").fetchone()[0]
+            conflicts = conn.execute("SELECT count(*) FROM _conflicts;").fetchone()[0]
+            pulled_at = conn.execute("SELECT min(pulled_at) FROM _sync_state;").fetchone()[0]
+        return {"pending": pending, "conflicts": conflicts, "pulled_at": pulled_at}
+
+    def conflicts(self, limit=50):
+        with self.connection() as conn:
+            return conn.execute(
+                "SELECT id, table_name, op, pk, local_row, server_row, error, detected_at "
+                "FROM _conflicts ORDER BY id DESC LIMIT ?;", (limit,)
+            ).fetchall()
+
+
+def print_conflicts(replica, limit=50):
+    """Lista los conflictos más recientes (gana la fila del servidor)."""
+    for conflict_id, table, op, pk, local_row, server_row, error, detected_at in replica.conflicts(limit):
+        print(f"   ⚠️ #{conflict_id} {op} {table} ({pk}) {detected_at}: {error}")
+        print(f"      local: {local_row}")
+        print(f"      servidor: {server_row}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tenant", default=None)
+    parser.add_argument("--pull", action="store_true", help="copiar las tablas que cambiaron en el servidor")
+    parser.add_argument("--sync", action="store_true", help="enviar el outbox y después copiar cambios")
+    parser.add_argument("--watch", type=float, default=None, help="repetir --sync cada N segundos")
+    parser.add_argument("--status", action="store_true", help="mostrar pendientes y conflictos")
+    args = parser.parse_args()
+
+    from Library.data_layer import DATA_LAYER
+    settings = bootstrap()
+    os.environ.setdefault(LOCAL_ENV, "1")
+    db = DATA_LAYER.for_tenant(settings.data_access, args.tenant or settings.default_tenant)
+    replica = LOCAL_REPLICA.from_env(db.schema)
+    while True:
+        try:
+            if args.sync or args.watch:
+                summary = replica.sync(db)
+                print(f"🔄 {summary['applied']} cambios enviados, {summary['conflicts']} conflictos, "
+                      f"{summary['failed']} con error; tablas actualizadas: {', '.join(summary['pulled']) or 'ninguna'}")
+                if summary["conflicts"] and not args.status:
+                    print_conflicts(replica, summary["conflicts"])
+            elif args.pull:
+                print(f"⬇️ Tablas copiadas: {', '.join(replica.pull(db)) or 'ninguna (ya al día)'}")
+        except Exception as e:
+            print(f"❌ No se pudo sincronizar con Postgres: {e}")
+        if args.status or not (args.sync or args.pull or args.watch):
+            status = replica.status()
+            print(f"📦 {replica.path}: {status['pending']} cambios pendientes, {status['conflicts']} conflictos, "
+                  f"última copia {status['pulled_at'] or 'nunca'}")
+            print_conflicts(replica)
+        if not args.watch:
+            break
+        time.sleep(args.watch)
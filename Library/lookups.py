@@ -0,0 +1,97 @@
+import threading
+
+try:
+    from Library.instrumentation import span
+except ModuleNotFoundError:
+    # fallback if running inside the Library folder
+    from instrumentation import span
+
+SEARCH_LIMIT = 20
+# Similitud mínima de pg_trgm para sugerir una company
+SIMILARITY_THRESHOLD = 0.2
+
+
+def option_index(options):
+    """{opción: posición} para resolver el index de un selectbox sin list.index()."""
+    return {option: position for position, option in enumerate(options)}
+
+
+class OPTION_LIST:
+    """Opciones de un selectbox con su índice {opción: posición}, construido una sola vez.
+
+    Se guarda en un snapshot de la sesión (ver streamlit_session.snapshot), así
+    el índice se reconstruye sólo cuando cambia la versión de la tabla.
+    """
+    __slots__ = ("options", "index_of")
+
+    def __init__(self, options):
+        self.options = list(options)
+        self.index_of = option_index(self.options)
+
+    def index(self, value, default=0):
+        return self.index_of.get(value, default)
+
+
+class COMPANY_LOOKUP:
+    """Nombres y mapa name→type de companies, uno por versión de datos.
+
+    Se construyen una vez por (schema, versión) y se comparten entre todas las
+    sesiones y formularios del proceso.
+    """
+    _cache = {}
+    _lock = threading.Lock()
+
+    def __init__(self, records):
+        self.names = [name for name, _ in records]
+        self.type_of = dict(records)
+
+    @classmethod
+    def load(cls, db, version):
+        key = (db.db_url, db.schema)
+        cached = cls._cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with span("lookup.companies", schema=db.schema):
+            with db.read_cursor() as cur:
+                cur.execute("SELECT company_name, company_type FROM companies ORDER BY company_name;")
+                lookup = cls(cur.fetchall())
+        with cls._lock:
+            cls._cache[key] = (version, lookup)
+        return lookup
+
+
+def search_companies(db, term, limit=SEARCH_LIMIT):
+    """[(company_name, company_type)] más parecidas a `term` (índice trigram de pg_trgm).
+
+    Sin término devuelve las primeras `limit` en orden alfabético. Si la base no
+    tiene pg_trgm se usa ILIKE.
+    """
+    term = (term or "").strip()
+    with span("lookup.search_companies", schema=db.schema):
+        if not term:
+            with db.read_cursor() as cur:
+                cur.execute("SELECT company_name, company_type FROM companies ORDER BY company_name LIMIT %s;", (limit,))
+                return cur.fetchall()
+        pattern = f"%{term}%"
+        try:
+            with db.read_cursor() as cur:
+                cur.execute("SELECT set_limit(%s);", (SIMILARITY_THRESHOLD,))
+                cur.execute(
+                    """
+                    SELECT company_name, company_type
+                    FROM companies
+                    WHERE company_name %% %s OR company_name ILIKE %s
+                    ORDER BY similarity(company_name, %s) DESC, company_name
+                    LIMIT %s;
+                    """,
+                    (term, pattern, term, limit),
+                )
+                return cur.fetchall()
+        except Exception:
+            with db.read_cursor() as cur:
+                cur.execute(
+                    "SELECT company_name, company_type FROM companies WHERE company_name ILIKE %s "
+                    "ORDER BY company_name LIMIT %s;",
+                    (pattern, limit),
+                )
+                return cur.fetchall()
@@ -0,0 +1,196 @@
+"""Detección de postings casi duplicados con MinHash + LSH guardado en Postgres.
+
+Uso:
+    python -m Library.posting_dedup --rebuild            # recalcula firmas de todos los snapshots
+    python -m Library.posting_dedup --tenant ana --list  # duplicados detectados
+
+Cada posting se reduce a shingles de SHINGLE_WORDS palabras y a una firma
+MinHash de NUM_PERM enteros. La firma se parte en BANDS bandas; cada banda es
+un bucket en posting_lsh. Al guardar un snapshot sólo se comparan los
+postings que comparten algún bucket (búsqueda por índice, sin recorrer la
+tabla), y si la similitud estimada pasa el umbral se marca duplicate_of.
+"""
+import argparse
+import hashlib
+import re
+
+import numpy as np
+
+try:
+    from Library.instrumentation import span
+    from Library.posting_fetcher import decompress_html, html_to_text
+    from Library.settings import bootstrap
+except ModuleNotFoundError:
+    # fallback if running inside the Library folder
+    from instrumentation import span
+    from posting_fetcher import decompress_html, html_to_text
+    from settings import bootstrap
+
+SHINGLE_WORDS = 5
+NUM_PERM = 128
+BANDS = 16                     # 16 bandas x 8 filas: umbral LSH ≈ (1/16)^(1/8) ≈ 0.71
+ROWS = NUM_PERM // BANDS
+DUPLICATE_THRESHOLD = 0.8      # similitud Jaccard estimada para marcar duplicado
+WORD_RE = re.compile(r"\w+")
+
+# Permutaciones fijas (multiply-shift: bits altos de a·x + b mod 2^64, a impar de 64 bits);
+# la misma semilla en todos los procesos. Con a y x de 32 bits el orden de a·x casi
+# no cambia entre permutaciones y la estimación de Jaccard sale sesgada hacia abajo.
+_rng = np.random.RandomState(20240601)
+_PERM_A = _rng.randint(0, 1 << 64, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.randint(0, 1 << 64, size=NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text):
+    """Hashes de 32 bits de los shingles de palabras del texto."""
+    words = WORD_RE.findall((text or "").lower())
+    if len(words) < SHINGLE_WORDS:
+        grams = {" ".join(words)} if words else set()
+    else:
+        grams = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=4).digest(), "little") for gram in grams),
+        dtype=np.uint64,
+        count=len(grams),
+    )
+
+
+def minhash(hashes):
+    """Firma MinHash (NUM_PERM valores); None si el texto no tiene palabras."""
+    if not len(hashes):
+        return None
+    # uint64 desborda módulo 2^64, que es justo lo que pide multiply-shift
+    values = (np.outer(hashes, _PERM_A) + _PERM_B) >> np.uint64(32)
+    return values.min(axis=0)
+
+
+def band_buckets(signature):
+    """[(banda, bucket BIGINT)] de una firma."""
+    buckets = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS:(band + 1) * ROWS].astype("<u8").tobytes()
+        digest = hashlib.blake2b(chunk, digest_size=8, person=band.to_bytes(2, "little")).digest()
+        buckets.append((band, int.from_bytes(digest, "little", signed=True)))
+    return buckets
+
+
+def similarity(a, b):
+    """Jaccard estimada entre dos firmas."""
+    return float(np.mean(a == b))
+
+
+def signature_bytes(signature):
+    return signature.astype("<u8").tobytes()
+
+
+def signature_from_bytes(data):
+    return np.frombuffer(bytes(data), dtype="<u8")
+
+
+class POSTING_DEDUP:
+    """Índice LSH de postings en las tablas posting_minhash / posting_lsh."""
+
+    def __init__(self, threshold=DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+
+    def register(self, cur, url_hash, text):
+        """Guarda la firma de un posting y lo marca si duplica a uno ya registrado.
+
+        Corre en el cursor del llamador (misma transacción que el snapshot).
+        Devuelve (duplicate_of, similitud) o (None, None).
+        """
+        signature = minhash(shingles(text))
+        cur.execute("DELETE FROM posting_lsh WHERE url_hash = %s;", (url_hash,))
+        if signature is None:
+            cur.execute("DELETE FROM posting_minhash WHERE url_hash = %s;", (url_hash,))
+            return None, None
+
+        buckets = band_buckets(signature)
+        with span("dedup.candidates"):
+            cur.execute(
+                """
+                SELECT m.url_hash, m.signature, m.duplicate_of
+                FROM posting_minhash m
+                WHERE m.url_hash <> %s
+                  AND m.url_hash IN (
+                      SELECT l.url_hash
+                      FROM posting_lsh l
+                      JOIN unnest(%s::smallint[], %s::bigint[]) AS b (band, bucket)
+                        ON l.band = b.band AND l.bucket = b.bucket
+                  );
+                """,
+                (url_hash, [band for band, _ in buckets], [bucket for _, bucket in buckets]),
+            )
+            candidates = cur.fetchall()
+
+        duplicate_of, best = None, None
+        for other_hash, other_signature, other_original in candidates:
+            score = similarity(signature, signature_from_bytes(other_signature))
+            if score >= self.threshold and (best is None or score > best):
+                # Apunta al original de la cadena, no a otro duplicado
+                duplicate_of, best = other_original or other_hash, score
+
+        cur.execute(
+            """
+            INSERT INTO posting_minhash (url_hash, signature, duplicate_of, similarity, computed_at)
+            VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (url_hash) DO UPDATE SET
+                signature = EXCLUDED.signature, duplicate_of = EXCLUDED.duplicate_of,
+                similarity = EXCLUDED.similarity, computed_at = EXCLUDED.computed_at;
+            """,
+            (url_hash, signature_bytes(signature), duplicate_of, best),
+        )
+        cur.execute(
+            "INSERT INTO posting_lsh (band, bucket, url_hash) "
+            "SELECT band, bucket, %s FROM unnest(%s::smallint[], %s::bigint[]) AS b (band, bucket) "
+            "ON CONFLICT DO NOTHING;",
+            (url_hash, [band for band, _ in buckets], [bucket for _, bucket in buckets]),
+        )
+        return duplicate_of, best
+
+    def rebuild(self, db):
+        """Recalcula firmas y marcas de todos los snapshots, del más antiguo al más nuevo."""
+        flagged = 0
+        with db.cursor() as cur:
+            cur.execute("TRUNCATE posting_lsh, posting_minhash;")
+            cur.execute("SELECT url_hash, content FROM posting_snapshots ORDER BY changed_at, url_hash;")
+            rows = cur.fetchall()
+            with span("dedup.rebuild", postings=len(rows)):
+                for url_hash, content in rows:
+                    duplicate_of, _ = self.register(cur, url_hash, html_to_text(decompress_html(content)))
+                    flagged += duplicate_of is not None
+        return len(rows), flagged
+
+    @staticmethod
+    def duplicates(db):
+        """[(posting_url, original_url, similitud)] de los postings marcados."""
+        with db.cursor() as cur:
+            cur.execute(
+                """
+                SELECT s.posting_url, o.posting_url, m.similarity
+                FROM posting_minhash m
+                JOIN posting_snapshots s ON s.url_hash = m.url_hash
+                JOIN posting_snapshots o ON o.url_hash = m.duplicate_of
+                ORDER BY m.similarity DESC;
+                """
+            )
+            return cur.fetchall()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tenant", default=None)
+    parser.add_argument("--rebuild", action="store_true", help="recalcular firmas de todos los snapshots")
+    parser.add_argument("--list", action="store_true", help="mostrar los duplicados detectados")
+    args = parser.parse_args()
+
+    from Library.data_layer import DATA_LAYER
+    settings = bootstrap()
+    db = DATA_LAYER.for_tenant(settings.data_access, args.tenant or settings.default_tenant)
+    dedup = POSTING_DEDUP()
+    if args.rebuild:
+        total, flagged = dedup.rebuild(db)
+        print(f"✅ {total} postings indexados, {flagged} marcados como duplicados.")
+    if args.list or not args.rebuild:
+        for url, original, score in dedup.duplicates(db):
+            print(f"🔁 {url}\n   ≈ {original} ({score:.0%})")
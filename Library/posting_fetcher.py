@@ -0,0 +1,299 @@
+"""Refresca en paralelo los posting_url de job_tracker (HTTP condicional + Chrome).
+
+Uso:
+    python -m Library.posting_fetcher                       # tenant por defecto
+    python -m Library.posting_fetcher --tenant ana --rps 2 --chrome
+    python -m Library.posting_fetcher --url http://127.0.0.1:8000/a --url http://127.0.0.1:8000/b
+
+Primero intenta un GET con If-None-Match / If-Modified-Since a través de un
+cliente httpx compartido, con un límite de peticiones por host. Sólo las
+páginas que parecen vacías sin JavaScript se vuelven a pedir con el pool de
+Chrome (--chrome). Cada snapshot se guarda comprimido con zlib en
+posting_snapshots, con el sha256 de la URL como llave; sólo se reescribe si
+cambió su texto visible. Con --url no toca la base: sirve para probar contra
+un servidor local.
+"""
+import argparse
+import asyncio
+import hashlib
+import html as html_lib
+import re
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from colorama import Fore, Style, init
+
+try:
+    from Library.instrumentation import span
+    from Library.settings import bootstrap
+except ModuleNotFoundError:
+    # fallback if running inside the Library folder
+    from instrumentation import span
+    from settings import bootstrap
+
+DEFAULT_CONCURRENCY = 32
+DEFAULT_RPS_PER_HOST = 2.0
+REQUEST_TIMEOUT_S = 20.0
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) career_manager posting refresher"
+# Si el HTML trae menos texto visible que esto (y trae scripts) se asume que lo pinta JavaScript
+JS_TEXT_MIN_CHARS = 400
+SCRIPT_RE = re.compile(r"<(script|style|noscript)\b.*?</\1>", re.IGNORECASE | re.DOTALL)
+TAG_RE = re.compile(r"<[^>]+>")
+
+
+def url_hash(url):
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def compress_html(html):
+    return zlib.compress(html.encode("utf-8"), 6)
+
+
+def decompress_html(content):
+    return zlib.decompress(bytes(content)).decode("utf-8") if content is not None else None
+
+
+def html_to_text(html):
+    """Texto visible de una página: sin scripts, estilos ni etiquetas."""
+    return " ".join(html_lib.unescape(TAG_RE.sub(" ", SCRIPT_RE.sub(" ", html or ""))).split())
+
+
+def content_sha256(html):
+    """Huella del texto visible: el HTML que pinta Chrome cambia en cada render (nonces, ids) aunque el posting no."""
+    return hashlib.sha256(html_to_text(html).encode("utf-8")).hexdigest()
+
+
+def needs_javascript(html):
+    """True si la página casi no tiene texto visible sin ejecutar sus scripts."""
+    if "<script" not in html.lower():
+        return False
+    return len(html_to_text(html)) < JS_TEXT_MIN_CHARS
+
+
+def read_posting(db, url):
+    """HTML del último snapshot de `url`; None si nunca se descargó."""
+    with db.cursor() as cur:
+        cur.execute("SELECT content FROM posting_snapshots WHERE url_hash = %s;", (url_hash(url),))
+        row = cur.fetchone()
+    return decompress_html(row[0]) if row else None
+
+
+class HOST_LIMITER:
+    """Espacia las peticiones a un mismo host a `rps` por segundo (asyncio)."""
+
+    def __init__(self, rps):
+        self.interval = 1.0 / rps if rps > 0 else 0.0
+        self._next_at = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, host):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_at.get(host, now))
+            self._next_at[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class POSTING_FETCHER:
+    """Descarga concurrente de postings con GET condicional y fallback a Chrome."""
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, rps_per_host=DEFAULT_RPS_PER_HOST, chrome_pool=None):
+        self.concurrency = concurrency
+        self.rps_per_host = rps_per_host
+        self.chrome_pool = chrome_pool  # CHROME_DRIVER_POOL ya iniciado, o None para no escalar
+
+    # ===== Descarga =====
+    async def fetch_all(self, targets):
+        """targets: [{"url", "etag", "last_modified", "content_sha256"}] -> lista de resultados."""
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("❌ Instala httpx para refrescar postings: pip install httpx")
+
+        limiter = HOST_LIMITER(self.rps_per_host)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        chrome_executor = None
+        if self.chrome_pool is not None:
+            chrome_executor = ThreadPoolExecutor(max_workers=self.chrome_pool.size, thread_name_prefix="chrome")
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        try:
+            async with httpx.AsyncClient(
+                timeout=REQUEST_TIMEOUT_S,
+                limits=limits,
+                follow_redirects=True,
+                headers={"User-Agent": USER_AGENT},
+            ) as client:
+                return await asyncio.gather(*(
+                    self.fetch_one(client, limiter, semaphore, chrome_executor, target) for target in targets
+                ))
+        finally:
+            if chrome_executor is not None:
+                chrome_executor.shutdown(wait=True)
+
+    async def fetch_one(self, client, limiter, semaphore, chrome_executor, target):
+        url = target["url"]
+        result = {"url": url, "status": None, "via": "http", "html": None, "etag": None,
+                  "last_modified": None, "outcome": "error", "error": None}
+        headers = {}
+        if target.get("etag"):
+            headers["If-None-Match"] = target["etag"]
+        if target.get("last_modified"):
+            headers["If-Modified-Since"] = target["last_modified"]
+        try:
+            # Primero el turno del host (sin ocupar lugar): un host lento no bloquea a los demás
+            await limiter.wait(urlsplit(url).netloc.lower())
+            async with semaphore:
+                response = await client.get(url, headers=headers)
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+            return result
+
+        result["status"] = response.status_code
+        result["etag"] = response.headers.get("etag") or target.get("etag")
+        result["last_modified"] = response.headers.get("last-modified") or target.get("last_modified")
+        if response.status_code == 304:
+            result["outcome"] = "not_modified"
+            return result
+        if response.status_code >= 400:
+            result["error"] = f"HTTP {response.status_code}"
+            return result
+
+        html = response.text
+        if chrome_executor is not None and needs_javascript(html):
+            try:
+                loop = asyncio.get_running_loop()
+                html = await loop.run_in_executor(chrome_executor, self.chrome_pool.fetch, url)
+                result["via"] = "chrome"
+            except Exception as e:
+                print(f"⚠️ Chrome falló con {url}; se guarda el HTML sin JavaScript: {e}")
+        result["html"] = html
+        sha = content_sha256(html)
+        result["content_sha256"] = sha
+        result["outcome"] = "unchanged" if sha == target.get("content_sha256") else "updated"
+        return result
+
+    # ===== Base de datos =====
+    def targets(self, db):
+        with db.cursor() as cur:
+            cur.execute(
+                """
+                SELECT DISTINCT ON (j.posting_url) j.posting_url, s.etag, s.last_modified, s.content_sha256
+                FROM job_tracker j
+                LEFT JOIN posting_snapshots s
+                    ON s.url_hash = encode(sha256(convert_to(j.posting_url, 'UTF8')), 'hex')
+                WHERE COALESCE(btrim(j.posting_url), '') <> ''
+                ORDER BY j.posting_url;
+                """
+            )
+            return [
+                {"url": url, "etag": etag, "last_modified": last_modified, "content_sha256": sha}
+                for url, etag, last_modified, sha in cur.fetchall()
+            ]
+
+    def store(self, db, results):
+        """Guarda los resultados; el contenido sólo se reescribe si cambió."""
+        from psycopg2.extras import execute_values
+        try:
+            from Library.posting_dedup import POSTING_DEDUP
+        except ModuleNotFoundError:
+            # fallback if running inside the Library folder
+            from posting_dedup import POSTING_DEDUP
+
+        changed = [r for r in results if r["outcome"] == "updated"]
+        touched = [r for r in results if r["outcome"] in ("not_modified", "unchanged")]
+        with span("postings.store", changed=len(changed), touched=len(touched)):
+            with db.cursor() as cur:
+                if changed:
+                    execute_values(
+                        cur,
+                        """
+                        INSERT INTO posting_snapshots
+                            (url_hash, posting_url, status, etag, last_modified, fetched_via,
+                             content, content_sha256, fetched_at, changed_at)
+                        VALUES %s
+                        ON CONFLICT (url_hash) DO UPDATE SET
+                            status = EXCLUDED.status, etag = EXCLUDED.etag,
+                            last_modified = EXCLUDED.last_modified, fetched_via = EXCLUDED.fetched_via,
+                            content = EXCLUDED.content, content_sha256 = EXCLUDED.content_sha256,
+                            fetched_at = EXCLUDED.fetched_at, changed_at = EXCLUDED.changed_at;
+                        """,
+                        [
+                            (url_hash(r["url"]), r["url"], r["status"], r["etag"], r["last_modified"], r["via"],
+                             compress_html(r["html"]), r["content_sha256"])
+                            for r in changed
+                        ],
+                        template="(%s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+                    )
+                    # Firmas MinHash en la misma transacción: los duplicados quedan marcados al insertar
+                    dedup = POSTING_DEDUP()
+                    for r in changed:
+                        r["duplicate_of"], r["similarity"] = dedup.register(cur, url_hash(r["url"]), html_to_text(r["html"]))
+                if touched:
+                    execute_values(
+                        cur,
+                        """
+                        UPDATE posting_snapshots AS s
+                        SET status = v.status, etag = v.etag, last_modified = v.last_modified,
+                            fetched_at = CURRENT_TIMESTAMP
+                        FROM (VALUES %s) AS v (url_hash, status, etag, last_modified)
+                        WHERE s.url_hash = v.url_hash;
+                        """,
+                        [(url_hash(r["url"]), r["status"], r["etag"], r["last_modified"]) for r in touched],
+                    )
+
+    def refresh(self, db):
+        """Descarga todos los posting_url del tenant y guarda los snapshots nuevos."""
+        targets = self.targets(db)
+        with span("postings.refresh", urls=len(targets)):
+            results = asyncio.run(self.fetch_all(targets))
+        self.store(db, results)
+        return results
+
+
+def print_summary(results, elapsed):
+    counts = {}
+    for r in results:
+        counts[r["outcome"]] = counts.get(r["outcome"], 0) + 1
+    chrome = sum(1 for r in results if r["via"] == "chrome" and r["html"] is not None)
+    print(f"{Fore.GREEN}✅ {len(results)} postings en {elapsed:.1f}s: "
+          f"{counts.get('updated', 0)} nuevos/cambiados, {counts.get('unchanged', 0)} iguales, "
+          f"{counts.get('not_modified', 0)} sin descargar (304), {chrome} vía Chrome{Style.RESET_ALL}")
+    for r in results:
+        if r["outcome"] == "error":
+            print(f"{Fore.RED}❌ {r['url']}: {r['error']}{Style.RESET_ALL}")
+        elif r.get("duplicate_of"):
+            print(f"{Fore.YELLOW}🔁 {r['url']} parece duplicado ({r['similarity']:.0%}) de otro posting{Style.RESET_ALL}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tenant", default=None)
+    parser.add_argument("--url", action="append", default=[], help="descargar sólo estas URLs, sin base de datos")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--rps", type=float, default=DEFAULT_RPS_PER_HOST, help="peticiones por segundo por host")
+    parser.add_argument("--chrome", action="store_true", help="usar Chrome headless con páginas que requieren JavaScript")
+    args = parser.parse_args()
+    init(autoreset=True)
+
+    pool = None
+    if args.chrome:
+        from Library.chrome_helper import CHROME_DRIVER_POOL
+        pool = CHROME_DRIVER_POOL().start()
+    fetcher = POSTING_FETCHER(args.concurrency, args.rps, chrome_pool=pool)
+    start = time.perf_counter()
+    try:
+        if args.url:
+            results = asyncio.run(fetcher.fetch_all([{"url": url} for url in args.url]))
+        else:
+            from Library.data_layer import DATA_LAYER
+            settings = bootstrap()
+            results = fetcher.refresh(DATA_LAYER.for_tenant(settings.data_access, args.tenant or settings.default_tenant))
+    finally:
+        if pool is not None:
+            pool.close()
+    print_summary(results, time.perf_counter() - start)
@@ -0,0 +1,204 @@
+import re
+import threading
+import unicodedata
+
+import numpy as np
+from scipy import sparse
+
+try:
+    from Library.instrumentation import span
+except ModuleNotFoundError:
+    # fallback if running inside the Library folder
+    from instrumentation import span
+
+# Tipo de bloque -> columnas de applications que lo usan (y cuántos sugerir)
+BLOCK_FIELDS = {
+    "education": ("education1", "education2", "education3"),
+    "experience": ("experience1", "experience2", "experience3"),
+    "skills": ("skills",),
+    "interests": ("interests",),
+}
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Con más filas muertas que vivas se reconstruye la matriz compacta
+COMPACT_RATIO = 0.5
+TOKEN_RE = re.compile(r"[^\W\d_]{2,}")
+STOPWORDS = {
+    "English": """a an and are as at be by for from has have in is it its of on or our that the their this
+        to we will with you your they them who what which can all any also more other such than into
+        about over under using use work working experience years role team""",
+    "Spanish": """a al con de del el ella ellos en entre es este esta estos estas la las lo los mas para
+        pero por que se sin sobre su sus un una uno unos unas y o como ser son fue han hay nuestro
+        nuestra tu usted experiencia años equipo trabajo puesto""",
+    "French": """a au aux avec ce ces dans de des du elle en est et il ils je la le les leur mais ne nous
+        ou par pas pour qui que sa se ses son sur un une vous sont être avoir plus comme notre votre
+        expérience ans équipe travail poste""",
+}
+
+
+def fold(text):
+    """Minúsculas y sin acentos ('Expérience' -> 'experience')."""
+    decomposed = unicodedata.normalize("NFKD", (text or "").lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+_STOPWORDS = {lang: frozenset(fold(words).split()) for lang, words in STOPWORDS.items()}
+
+
+def tokenize(text, lang=None):
+    stopwords = _STOPWORDS.get(lang, frozenset())
+    return [token for token in TOKEN_RE.findall(fold(text)) if token not in stopwords]
+
+
+class BM25_INDEX:
+    """Matriz dispersa término-frecuencia de los bloques de un idioma, con altas y bajas incrementales.
+
+    Sólo se tokenizan los bloques nuevos; los borrados se marcan como muertos
+    y se descartan al compactar. idf y largo promedio se calculan al consultar
+    a partir de df y doc_len, así que agregar bloques no obliga a rehacer nada.
+    """
+
+    def __init__(self, lang):
+        self.lang = lang
+        self.vocab = {}
+        self.keys = []          # (tipo, texto) de cada fila
+        self.row_of = {}        # (tipo, texto) -> fila viva
+        self.tf = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.doc_len = np.zeros(0, dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.df = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.row_of)
+
+    def update(self, blocks):
+        """Sincroniza el índice con el conjunto de bloques (tipo, texto) actual."""
+        blocks = set(blocks)
+        removed = [self.row_of.pop(key) for key in list(self.row_of) if key not in blocks]
+        added = [key for key in blocks if key not in self.row_of]
+        if removed:
+            self.alive[removed] = False
+            self.df -= np.asarray((self.tf[removed] > 0).sum(axis=0)).ravel()
+        if added:
+            self._append(added)
+        if len(self.keys) and (~self.alive).sum() > COMPACT_RATIO * len(self.keys):
+            self._compact()
+        return len(added), len(removed)
+
+    def _append(self, added):
+        rows, cols, counts = [], [], []
+        for offset, (_, text) in enumerate(added):
+            terms = {}
+            for token in tokenize(text, self.lang):
+                column = self.vocab.setdefault(token, len(self.vocab))
+                terms[column] = terms.get(column, 0) + 1
+            rows.extend([offset] * len(terms))
+            cols.extend(terms)
+            counts.extend(terms.values())
+        width = len(self.vocab)
+        new = sparse.csr_matrix((np.asarray(counts, dtype=np.float32), (rows, cols)), shape=(len(added), width))
+        self.tf.resize((self.tf.shape[0], width))
+        self.tf = sparse.vstack([self.tf, new], format="csr")
+        self.df = np.concatenate([self.df, np.zeros(width - len(self.df), dtype=np.int64)])
+        self.df += np.diff(new.tocsc().indptr)
+        self.doc_len = np.concatenate([self.doc_len, np.asarray(new.sum(axis=1), dtype=np.float32).ravel()])
+        self.alive = np.concatenate([self.alive, np.ones(len(added), dtype=bool)])
+        start = len(self.keys)
+        self.keys.extend(added)
+        self.row_of.update((key, start + offset) for offset, key in enumerate(added))
+
+    def _compact(self):
+        keep = np.flatnonzero(self.alive)
+        self.tf = self.tf[keep]
+        self.doc_len = self.doc_len[keep]
+        self.alive = np.ones(len(keep), dtype=bool)
+        self.keys = [self.keys[row] for row in keep]
+        self.row_of = {key: row for row, key in enumerate(self.keys)}
+
+    def scores(self, text):
+        """Puntaje BM25 de cada fila contra `text` (filas muertas = 0)."""
+        query = {}
+        for token in tokenize(text, self.lang):
+            column = self.vocab.get(token)
+            if column is not None:
+                query[column] = query.get(column, 0) + 1
+        n_docs = int(self.alive.sum())
+        if not query or not n_docs:
+            return np.zeros(len(self.keys), dtype=np.float32)
+
+        columns = np.fromiter(query, dtype=np.int64)
+        weights = np.fromiter(query.values(), dtype=np.float32)
+        df = self.df[columns]
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)) * weights
+        avg_len = float(self.doc_len[self.alive].mean()) or 1.0
+
+        # Sólo las columnas de los términos del posting: unas pocas decenas
+        hits = self.tf[:, columns].tocoo()
+        tf = hits.data
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[hits.row] / avg_len)
+        contribution = idf[hits.col] * tf * (BM25_K1 + 1) / (tf + norm)
+        result = np.bincount(hits.row, weights=contribution, minlength=len(self.keys)).astype(np.float32)
+        result[~self.alive] = 0
+        return result
+
+
+class RELEVANCE_RANKER:
+    """Índices BM25 por (schema, idioma), actualizados cuando cambia applications."""
+    _cache = {}
+    _lock = threading.RLock()  # update() modifica el índice en sitio: las consultas también lo toman
+
+    @staticmethod
+    def load_blocks(db, lang):
+        columns = [column for fields in BLOCK_FIELDS.values() for column in fields]
+        with db.cursor() as cur:
+            cur.execute(f"SELECT {', '.join(columns)} FROM applications WHERE lang = %s;", (lang,))
+            rows = cur.fetchall()
+        blocks = set()
+        for row in rows:
+            values = dict(zip(columns, row))
+            for kind, fields in BLOCK_FIELDS.items():
+                for field in fields:
+                    text = (values[field] or "").strip()
+                    if text and text.lower() not in ("na", "null", "none"):
+                        blocks.add((kind, text))
+        return blocks
+
+    @classmethod
+    def index(cls, db, lang, version):
+        key = (db.db_url, db.schema, lang)
+        with cls._lock:
+            cached = cls._cache.get(key)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            index = cached[1] if cached is not None else BM25_INDEX(lang)
+            with span("relevance.update", schema=db.schema, lang=lang) as current:
+                added, removed = index.update(cls.load_blocks(db, lang))
+                current.set(added=added, removed=removed)
+            cls._cache[key] = (version, index)
+        return index
+
+    @classmethod
+    def rank(cls, db, posting_text, lang, version, top=None):
+        """{tipo: [(puntaje, texto)]} de mejor a peor; `top` por tipo (default: columnas del form)."""
+        with cls._lock:
+            index = cls.index(db, lang, version)
+            with span("relevance.rank", lang=lang, blocks=len(index)):
+                scores = index.scores(posting_text)
+            keys = list(index.keys)
+        ranked = {kind: [] for kind in BLOCK_FIELDS}
+        for row in np.argsort(-scores):
+            if scores[row] <= 0:
+                break
+            kind, text = keys[row]
+            if len(ranked[kind]) < (top or len(BLOCK_FIELDS[kind])):
+                ranked[kind].append((float(scores[row]), text))
+        return ranked
+
+    @staticmethod
+    def form_values(ranked):
+        """Valores para prellenar el formulario de Applications (education1, experience1, ...)."""
+        values = {}
+        for kind, fields in BLOCK_FIELDS.items():
+            for field, (_, text) in zip(fields, ranked.get(kind, [])):
+                values[field] = text
+        return values
@@ -0,0 +1,454 @@
+"""Servicio HTTP de render de CVs y cartas (ASGI, sin framework).
+
+Uso:
+    python -m Library.render_service --port 8600 --workers 4 --queue 16
+    uvicorn --factory Library.render_service:create_app --workers 2   # varios procesos
+
+Endpoints:
+    POST /render   {"application_id": 12, "document": "cv" | "cover_letter",
+                    "format": "docx" | "pdf", "tenant": "ana", "date": "2025-01-31"}
+                   -> el documento como archivo adjunto
+    POST /bundle   {"application_ids": [12, 15], "documents": ["cv", "cover_letter"],
+                    "source": "render" | "disk", "format": "docx", "tenant": "ana"}
+    GET  /bundle?ids=12,15&documents=cv,cover_letter&source=disk&tenant=ana
+                   -> zip con los documentos, enviado por trozos conforme se genera
+    GET  /health   -> workers, peticiones en curso y capacidad de la cola
+
+Cada proceso tiene un pool de workers con los templates en memoria y una
+cola local acotada: cuando está llena responde 503 con Retry-After en lugar
+de acumular trabajo. Los workers son threads: las consultas y LibreOffice
+(PDF) corren en paralelo, pero el render del .docx es Python puro y comparte
+el GIL, así que más threads no renderizan más rápido. Para escalar el render
+se levantan más procesos (uvicorn --workers) o nodos.
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from urllib.parse import parse_qs, quote
+
+try:
+    from Library.CV_generation import CV_GENERATION, render_docx, safe_filename
+    from Library.instrumentation import span
+    from Library.settings import bootstrap, normalize_tenant
+    from Library.zip_stream import iter_zip
+except ModuleNotFoundError:
+    # fallback if running inside the Library folder
+    from CV_generation import CV_GENERATION, render_docx, safe_filename
+    from instrumentation import span
+    from settings import bootstrap, normalize_tenant
+    from zip_stream import iter_zip
+
+WORKERS_ENV = "CAREER_RENDER_WORKERS"
+QUEUE_ENV = "CAREER_RENDER_QUEUE"
+# Pocos threads por proceso: alcanzan para solapar consultas/PDF con el render, que comparte el GIL
+DEFAULT_RENDER_WORKERS = min(4, os.cpu_count() or 1)
+MAX_BODY_BYTES = 64 * 1024
+MAX_BUNDLE_APPLICATIONS = 500
+BUNDLE_SOURCES = ("render", "disk")
+DOCUMENTS = {"cv": "CV", "cover_letter": "CLetter"}
+CONTENT_TYPES = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pdf": "application/pdf",
+}
+# ValueError -> 400, LookupError -> 404, NotImplementedError -> 501
+ERROR_STATUS = ((ValueError, 400), (LookupError, 404), (NotImplementedError, 501))
+
+
+def docx_to_pdf(data):
+    """Convierte un .docx (bytes) a PDF con LibreOffice en modo headless."""
+    soffice = shutil.which("soffice") or shutil.which("libreoffice")
+    if soffice is None:
+        raise NotImplementedError("PDF requiere LibreOffice (soffice) instalado en el servidor.")
+    with tempfile.TemporaryDirectory() as folder:
+        source = os.path.join(folder, "document.docx")
+        with open(source, "wb") as f:
+            f.write(data)
+        subprocess.run(
+            [soffice, "--headless", "--convert-to", "pdf", "--outdir", folder, source],
+            check=True, capture_output=True, timeout=120,
+        )
+        with open(os.path.join(folder, "document.pdf"), "rb") as f:
+            return f.read()
+
+
+def parse_render_request(body):
+    """Valida el JSON de POST /render; ValueError si algo no cuadra."""
+    try:
+        payload = json.loads(body or b"{}")
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSON inválido: {e}")
+    if not isinstance(payload, dict):
+        raise ValueError("El cuerpo debe ser un objeto JSON.")
+    try:
+        application_id = int(payload["application_id"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("application_id (entero) es obligatorio.")
+    document = payload.get("document", "cv")
+    if not isinstance(document, str) or document not in DOCUMENTS:
+        raise ValueError(f"document debe ser uno de {sorted(DOCUMENTS)}.")
+    output_format = str(payload.get("format", "docx")).lower()
+    if output_format not in CONTENT_TYPES:
+        raise ValueError(f"format debe ser uno de {sorted(CONTENT_TYPES)}.")
+    letter_date = payload.get("date")
+    return {
+        "application_id": application_id,
+        "document": document,
+        "format": output_format,
+        "tenant": parse_tenant(payload),
+        "date": date.fromisoformat(str(letter_date)) if letter_date else None,
+    }
+
+
+def parse_tenant(payload):
+    tenant = payload.get("tenant")
+    if tenant is not None and not isinstance(tenant, str):
+        raise ValueError("tenant debe ser texto.")
+    return normalize_tenant(tenant)
+
+
+def text_list(value, field):
+    """'a,b' o ["a", "b"] -> ["a", "b"]; ValueError con cualquier otro tipo de JSON."""
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list) or not all(isinstance(item, (str, int)) and not isinstance(item, bool) for item in value):
+        raise ValueError(f"{field} debe ser una lista o un texto separado por comas.")
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+def parse_bundle_request(payload):
+    """Valida los parámetros de /bundle (JSON del POST o query string del GET)."""
+    ids = payload.get("application_ids", [])
+    if isinstance(ids, int) and not isinstance(ids, bool):
+        ids = [ids]
+    try:
+        application_ids = list(dict.fromkeys(int(i) for i in text_list(ids, "application_ids")))
+    except ValueError:
+        raise ValueError("application_ids debe ser una lista de enteros.")
+    if not application_ids:
+        raise ValueError("application_ids es obligatorio.")
+    if len(application_ids) > MAX_BUNDLE_APPLICATIONS:
+        raise ValueError(f"Máximo {MAX_BUNDLE_APPLICATIONS} aplicaciones por bundle.")
+    documents = text_list(payload.get("documents", list(DOCUMENTS)), "documents")
+    if not documents or any(d not in DOCUMENTS for d in documents):
+        raise ValueError(f"documents debe ser una lista de {sorted(DOCUMENTS)}.")
+    source = str(payload.get("source", "render")).lower()
+    if source not in BUNDLE_SOURCES:
+        raise ValueError(f"source debe ser uno de {list(BUNDLE_SOURCES)}.")
+    output_format = str(payload.get("format", "docx")).lower()
+    if output_format not in CONTENT_TYPES:
+        raise ValueError(f"format debe ser uno de {sorted(CONTENT_TYPES)}.")
+    letter_date = payload.get("date")
+    return {
+        "application_ids": application_ids,
+        "documents": documents,
+        "source": source,
+        "format": output_format,
+        "tenant": parse_tenant(payload),
+        "date": date.fromisoformat(str(letter_date)) if letter_date else None,
+    }
+
+
+def content_disposition(filename):
+    """Encabezado de descarga: nombre ASCII para clientes viejos y filename* (RFC 6266) con el original."""
+    stem, extension = os.path.splitext(filename)
+    stem = unicodedata.normalize("NFKD", stem).encode("ascii", "ignore").decode("ascii")
+    fallback = (stem.replace('"', "").replace("\\", "").strip() or "document") + extension
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}".encode("ascii")
+
+
+def query_payload(scope):
+    """Query string de un GET como dict {parámetro: último valor}."""
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    payload = {key: values[-1] for key, values in query.items()}
+    if "ids" in payload:
+        payload["application_ids"] = payload.pop("ids")
+    return payload
+
+
+class RENDER_SERVICE:
+    """App ASGI: pool de workers con templates precargados y cola acotada."""
+
+    def __init__(self, settings, workers=None, queue_size=None):
+        self.settings = settings
+        self.workers = workers or int(os.getenv(WORKERS_ENV, str(DEFAULT_RENDER_WORKERS)))
+        self.queue_size = queue_size if queue_size is not None else int(os.getenv(QUEUE_ENV, str(self.workers * 4)))
+        self.executor = None
+        self.in_flight = 0  # sólo se toca desde el event loop
+        self.avg_render_s = 1.0
+        self._generators = {}
+        # {(ruta, mtime): bytes} de templates locales ya leídos
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    # ===== Workers =====
+    def generator(self, tenant):
+        """CV_GENERATION por tenant, reutilizado entre peticiones."""
+        generator = self._generators.get(tenant)
+        if generator is None:
+            with self._lock:
+                generator = self._generators.get(tenant)
+                if generator is None:
+                    generator = CV_GENERATION(str(self.settings.working_folder), self.settings.data_access, tenant)
+                    self._generators[tenant] = generator
+        return generator
+
+    def template_bytes(self, generator, template_file):
+        template = generator.template_registry.open_template(template_file)
+        if template is None:
+            raise LookupError(f"No se encontró el template {template_file}.")
+        if isinstance(template, io.BytesIO):
+            return template.getvalue()  # template_registry ya los cachea por sha256
+        key = (template, os.stat(template).st_mtime)
+        data = self._templates.get(key)
+        if data is None:
+            with open(template, "rb") as f:
+                data = f.read()
+            with self._lock:
+                for stale in [k for k in self._templates if k[0] == template]:
+                    del self._templates[stale]
+                self._templates[key] = data
+        return data
+
+    def render(self, request):
+        """Corre en un worker: consulta la aplicación y devuelve (nombre, bytes)."""
+        generator = self.generator(request["tenant"])
+        cv_record, cl_record = generator.fetch_application(request["application_id"], request["date"])
+        if cv_record is None:
+            raise LookupError(f"No existe la aplicación {request['application_id']}.")
+        return self.render_document(generator, cv_record, cl_record, request["document"], request["format"])
+
+    def render_document(self, generator, cv_record, cl_record, document, output_format):
+        record = cl_record if document == "cover_letter" else cv_record
+        if record is None:
+            raise LookupError(f"La aplicación {cv_record['application_id']} no tiene carta registrada.")
+
+        template = self.template_bytes(generator, generator.template_file(cv_record, document))
+        buffer = io.BytesIO()
+        render_docx(io.BytesIO(template), record, buffer)
+        data = buffer.getvalue()
+        if output_format == "pdf":
+            with span("render.pdf"):
+                data = docx_to_pdf(data)
+        filename = safe_filename(f"{cv_record['job']}_JACJ_{DOCUMENTS[document]}.{output_format}")
+        return filename, data
+
+    def bundle_entries(self, request):
+        """(nombre en el zip, bytes o ruta) de cada documento; se generan uno por uno al consumirse."""
+        generator = self.generator(request["tenant"])
+        for application_id in request["application_ids"]:
+            cv_record, cl_record = generator.fetch_application(application_id, request["date"])
+            if cv_record is None:
+                print(f"⚠️ Bundle: no existe la aplicación {application_id}; se omite.")
+                continue
+            folder = safe_filename(f"{application_id}_{cv_record['job']}_{cv_record.get('lang', '')}")
+            for document in request["documents"]:
+                # Output CVs/<job>/<stem>_JACJ_*.docx identifica la aplicación (job, company e idioma)
+                on_disk = generator.rendered_file(cv_record, document) if request["source"] == "disk" else None
+                if on_disk and request["format"] == "docx":
+                    filename = safe_filename(f"{cv_record['job']}_JACJ_{DOCUMENTS[document]}.docx")
+                    yield f"{folder}/{filename}", on_disk
+                    continue
+                try:
+                    with span("render.bundle_document", document=document):
+                        name, data = self.render_document(generator, cv_record, cl_record, document, request["format"])
+                except LookupError as e:
+                    print(f"⚠️ Bundle: {e}")
+                    continue
+                yield f"{folder}/{name}", data
+
+    def _executor(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="render")
+        return self.executor
+
+    def retry_after(self):
+        """Segundos estimados hasta que se libere lugar en la cola."""
+        return max(1, math.ceil(self.avg_render_s * self.in_flight / self.workers))
+
+    # ===== ASGI =====
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.handle_http(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._executor()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.executor is not None:
+                    self.executor.shutdown(wait=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def handle_http(self, scope, receive, send):
+        method, path = scope["method"], scope["path"]
+        if path == "/health" and method == "GET":
+            await self.send_json(send, 200, {
+                "workers": self.workers,
+                "in_flight": self.in_flight,
+                "capacity": self.workers + self.queue_size,
+            })
+        elif path == "/render" and method == "POST":
+            await self.handle_render(receive, send)
+        elif path == "/bundle" and method in ("GET", "POST"):
+            await self.handle_bundle(scope, receive, send)
+        elif path in ("/health", "/render", "/bundle"):
+            await self.send_json(send, 405, {"error": "Método no permitido."})
+        else:
+            await self.send_json(send, 404, {"error": "Ruta no encontrada."})
+
+    async def handle_render(self, receive, send):
+        body = await self.read_body(receive)
+        if body is None:
+            await self.send_json(send, 413, {"error": "Cuerpo demasiado grande."})
+            return
+        try:
+            request = parse_render_request(body)
+        except ValueError as e:
+            await self.send_json(send, 400, {"error": str(e)})
+            return
+
+        # Backpressure: workers ocupados + cola llena -> 503 inmediato
+        if self.in_flight >= self.workers + self.queue_size:
+            await self.send_json(send, 503, {"error": "Servicio saturado, reintenta más tarde."},
+                                 headers=[(b"retry-after", str(self.retry_after()).encode())])
+            return
+
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            filename, data = await loop.run_in_executor(self._executor(), self.render, request)
+        except Exception as e:
+            status = next((code for error, code in ERROR_STATUS if isinstance(e, error)), 500)
+            await self.send_json(send, status, {"error": str(e)})
+            return
+        finally:
+            self.in_flight -= 1
+            # Promedio móvil del tiempo de render para estimar Retry-After
+            self.avg_render_s = 0.8 * self.avg_render_s + 0.2 * (time.perf_counter() - start)
+
+        await self.respond(send, 200, data, CONTENT_TYPES[request["format"]], headers=[
+            (b"content-disposition", content_disposition(filename)),
+        ])
+
+    async def handle_bundle(self, scope, receive, send):
+        if scope["method"] == "POST":
+            body = await self.read_body(receive)
+            if body is None:
+                await self.send_json(send, 413, {"error": "Cuerpo demasiado grande."})
+                return
+            try:
+                payload = json.loads(body or b"{}")
+            except json.JSONDecodeError as e:
+                await self.send_json(send, 400, {"error": f"JSON inválido: {e}"})
+                return
+        else:
+            payload = query_payload(scope)
+        try:
+            if not isinstance(payload, dict):
+                raise ValueError("El cuerpo debe ser un objeto JSON.")
+            request = parse_bundle_request(payload)
+        except ValueError as e:
+            await self.send_json(send, 400, {"error": str(e)})
+            return
+
+        if self.in_flight >= self.workers + self.queue_size:
+            await self.send_json(send, 503, {"error": "Servicio saturado, reintenta más tarde."},
+                                 headers=[(b"retry-after", str(self.retry_after()).encode())])
+            return
+
+        # El zip se arma en un worker trozo por trozo; cada trozo se envía en cuanto existe
+        self.in_flight += 1
+        loop = asyncio.get_running_loop()
+        executor = self._executor()
+        chunks = iter_zip(self.bundle_entries(request))
+        try:
+            try:
+                chunk = await loop.run_in_executor(executor, next, chunks, None)
+            except Exception as e:
+                status = next((code for error, code in ERROR_STATUS if isinstance(e, error)), 500)
+                await self.send_json(send, status, {"error": str(e)})
+                return
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"application/zip"),
+                    (b"content-disposition", b'attachment; filename="career_bundle.zip"'),
+                ],
+            })
+            try:
+                while chunk is not None:
+                    if chunk:
+                        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                    chunk = await loop.run_in_executor(executor, next, chunks, None)
+            except Exception as e:
+                # Los encabezados ya salieron: se corta el zip y el cliente lo verá incompleto
+                print(f"❌ Bundle interrumpido: {e}")
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            self.in_flight -= 1
+
+    async def read_body(self, receive):
+        """Cuerpo completo de la petición; None si excede MAX_BODY_BYTES."""
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                return None
+            chunks.append(chunk)
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    async def respond(self, send, status, body, content_type, headers=()):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", content_type.encode()),
+                (b"content-length", str(len(body)).encode()),
+                *headers,
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def send_json(self, send, status, payload, headers=()):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        await self.respond(send, status, body, "application/json; charset=utf-8", headers)
+
+
+def create_app(workers=None, queue_size=None):
+    """Factory para uvicorn/hypercorn; valida settings y carpetas al crear la app."""
+    return RENDER_SERVICE(bootstrap(), workers=workers, queue_size=queue_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--workers", type=int, default=None, help="threads de render por proceso (default: min(4, CPUs))")
+    parser.add_argument("--queue", type=int, default=None, help="peticiones en espera antes de responder 503")
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("❌ Instala uvicorn para levantar el servicio: pip install uvicorn")
+    uvicorn.run(create_app(args.workers, args.queue), host=args.host, port=args.port)
@@ -0,0 +1,196 @@
+import os
+import re
+import threading
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+import yaml
+
+# Ruta base del proyecto (carpeta raíz del repo)
+BASE_PATH = Path(__file__).resolve().parent.parent
+ENV_FILE = BASE_PATH / ".env"
+CONFIG_FILE = BASE_PATH / "config" / "config.yml"
+
+FOLDER_KEY = "MAIN_PATH"
+DB_KEY = "DB_URL"
+# Réplicas de sólo lectura, separadas por comas (opcional)
+READ_URLS_KEY = "DB_READ_URLS"
+TENANT_KEY = "CAREER_TENANT"
+
+# Nombres de tenant válidos: se usan como sufijo del schema sin comillas
+TENANT_PATTERN = re.compile(r"^[a-z][a-z0-9_]{0,30}$")
+
+
+def normalize_tenant(tenant):
+    """'' / None -> None (schema base); valida el resto contra TENANT_PATTERN."""
+    tenant = (tenant or "").strip().lower()
+    if not tenant:
+        return None
+    if not TENANT_PATTERN.match(tenant):
+        raise ValueError(f"❌ Tenant inválido '{tenant}': usa minúsculas, dígitos y '_' (máx. 31).")
+    return tenant
+
+
+def tenant_schema(schema_name, tenant=None):
+    """Schema de un tenant: el schema base para None, '<schema>_<tenant>' si no."""
+    tenant = normalize_tenant(tenant)
+    return f"{schema_name}_{tenant}" if tenant else schema_name
+
+
+def resolve_structure(db_structure):
+    """Sustituye los placeholders anidados ({schema_name}, ...) de db_structure."""
+    resolved = {}
+    for key, value in db_structure.items():
+        if isinstance(value, str):
+            temp = value
+            for inner_key, inner_value in db_structure.items():
+                if isinstance(inner_value, str):
+                    temp = temp.replace(f"{{{inner_key}}}", inner_value)
+            resolved[key] = temp.strip()
+    return resolved
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Configuración inmutable del proceso (.env + config/config.yml)."""
+    env_found: bool
+    working_folder: Optional[Path]
+    db_url: Optional[str]
+    db_structure: Mapping[str, str]
+    config_mtime: float
+    env_mtime: float
+    error: Optional[str] = None
+    db_read_urls: Tuple[str, ...] = ()
+
+    @property
+    def schema_name(self):
+        return self.db_structure.get("schema_name")
+
+    @property
+    def output_path(self):
+        return self.working_folder / "Output CVs" if self.working_folder else None
+
+    @property
+    def templates_path(self):
+        return self.working_folder / "CV Templates" if self.working_folder else None
+
+    @cached_property
+    def resolved_structure(self):
+        """Plantillas de tablas con placeholders resueltos (se calculan una vez)."""
+        return MappingProxyType(resolve_structure(self.db_structure))
+
+    @property
+    def default_tenant(self):
+        return normalize_tenant(os.getenv(TENANT_KEY))
+
+    def schema_for(self, tenant=None):
+        return tenant_schema(self.schema_name, tenant)
+
+    @property
+    def data_access(self):
+        """Dict con la forma que esperan CV_GENERATION, CSV_TO_SQL e INITIALIZE.
+
+        Es nuevo en cada llamada (barato: resolved_structure ya está calculado),
+        así un consumidor que lo modifique no altera los settings compartidos.
+        """
+        return {
+            "db_structure": dict(self.db_structure),
+            "resolved_structure": self.resolved_structure,
+            DB_KEY: self.db_url,
+            READ_URLS_KEY: self.db_read_urls,
+        }
+
+    def ensure_folders(self):
+        """Crea working_folder, Output CVs y CV Templates una sola vez."""
+        if self.error:
+            raise ValueError(self.error)
+        for folder in (self.working_folder, self.output_path, self.templates_path):
+            if folder not in _ready_folders:
+                folder.mkdir(parents=True, exist_ok=True)
+                _ready_folders.add(folder)
+        return self
+
+
+_lock = threading.Lock()
+_state = {"settings": None, "env_mtime": None}
+_ready_folders = set()
+
+
+def _mtime(path):
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+def load_env():
+    """Carga el .env del repo; sólo lo vuelve a leer si cambió su mtime."""
+    env_mtime = _mtime(ENV_FILE)
+    if env_mtime and env_mtime != _state["env_mtime"]:
+        from dotenv import load_dotenv
+        # override sólo en recargas, para respetar variables ya exportadas al arrancar
+        load_dotenv(dotenv_path=ENV_FILE, override=_state["env_mtime"] is not None)
+        _state["env_mtime"] = env_mtime
+    return bool(env_mtime)
+
+
+def _build_settings(config_mtime, env_mtime):
+    env_found = load_env()
+    with open(CONFIG_FILE, "r") as file:
+        config = yaml.safe_load(file) or {}
+    db_structure = MappingProxyType(dict(config.get("db_structure") or {}))
+
+    main_path_str = os.getenv(FOLDER_KEY)
+    db_url = os.getenv(DB_KEY)
+    error = None
+    if env_found:
+        # ===== MODO LOCAL (.env) =====
+        if not main_path_str:
+            error = "❌ MAIN_PATH no está definido en el archivo .env."
+        elif not db_url:
+            error = "❌ DB_URL no está definido en el archivo .env."
+    else:
+        # ===== MODO CLOUD / SIN .env (Render) =====
+        # Si no está definida MAIN_PATH en el entorno, usamos un default
+        if not main_path_str:
+            main_path_str = str(BASE_PATH / "temp_files")
+            os.environ[FOLDER_KEY] = main_path_str  # la inyectamos por si otro código la usa
+        if not db_url:
+            error = "❌ La variable de entorno DB_URL no está configurada."
+
+    return Settings(
+        env_found=env_found,
+        working_folder=Path(main_path_str) if main_path_str else None,
+        db_url=db_url,
+        db_structure=db_structure,
+        config_mtime=config_mtime,
+        env_mtime=env_mtime,
+        error=error,
+        db_read_urls=tuple(url.strip() for url in os.getenv(READ_URLS_KEY, "").split(",") if url.strip()),
+    )
+
+
+def get_settings():
+    """Settings compartidos por todo el proceso.
+
+    Se parsean una vez y sólo se recargan cuando cambia el mtime de
+    config/config.yml o del .env (un stat por llamada, sin leer el YAML).
+    """
+    config_mtime = _mtime(CONFIG_FILE)
+    env_mtime = _mtime(ENV_FILE)
+    current = _state["settings"]
+    if current is not None and current.config_mtime == config_mtime and current.env_mtime == env_mtime:
+        return current
+    with _lock:
+        current = _state["settings"]
+        if current is None or current.config_mtime != config_mtime or current.env_mtime != env_mtime:
+            current = _state["settings"] = _build_settings(config_mtime, env_mtime)
+    return current
+
+
+def bootstrap():
+    """Settings validados y con carpetas creadas; ValueError si falta algo."""
+    return get_settings().ensure_folders()
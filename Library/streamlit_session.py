@@ -0,0 +1,245 @@
+import os
+import tempfile
+from collections import OrderedDict
+
+import streamlit as st
+
+try:
+    from Library.data_layer import DATA_LAYER
+    from Library.local_replica import MIRROR_TABLES
+    from Library.settings import normalize_tenant
+except ModuleNotFoundError:
+    # fallback if running inside the Library folder
+    from data_layer import DATA_LAYER
+    from local_replica import MIRROR_TABLES
+    from settings import normalize_tenant
+
+TENANT_STATE_KEY = "tenant"
+DB_SESSION_STATE_KEY = "db_session"
+
+
+def select_tenant(settings):
+    """Selector de usuario (tenant) en el sidebar, compartido entre páginas.
+
+    El valor se guarda en st.session_state para que sobreviva al cambiar de
+    página. Detiene la ejecución si el nombre no es válido.
+    """
+    st.session_state.setdefault(TENANT_STATE_KEY, settings.default_tenant or "")
+    tenant_input = st.sidebar.text_input(
+        "Usuario (tenant)",
+        value=st.session_state[TENANT_STATE_KEY],
+        help="Vacío = schema base. Cada usuario tiene su propio schema en la misma base.",
+    )
+    try:
+        tenant = normalize_tenant(tenant_input)
+    except ValueError as e:
+        st.sidebar.error(str(e))
+        st.stop()
+    st.session_state[TENANT_STATE_KEY] = tenant or ""
+    return tenant
+
+
+def db_session():
+    """{db_url: LSN} de las escrituras de esta sesión (ver DATA_LAYER.record_write)."""
+    return st.session_state.setdefault(DB_SESSION_STATE_KEY, {})
+
+
+def session_db(data_access, tenant=None):
+    """DATA_LAYER del tenant para esta sesión de Streamlit.
+
+    Las lecturas pueden ir a una réplica (DB_READ_URLS), pero sólo a una que
+    ya aplicó las escrituras de la sesión; si no, se leen del primario. Con
+    CAREER_LOCAL_REPLICA las consultas van a la réplica SQLite (LOCAL_REPLICA).
+    """
+    return DATA_LAYER.for_tenant(data_access, tenant, session=db_session(), offline=True)
+
+
+WINDOW_STATE_PREFIX = "window_"
+DEFAULT_WINDOW_ROWS = 100
+DEFAULT_PREFETCH_ROWS = 200
+
+
+def windowed_frame(db, key, query, params=None, window=DEFAULT_WINDOW_ROWS, prefetch=DEFAULT_PREFETCH_ROWS,
+                   label=None, version=None):
+    """Página visible de una consulta grande, leída con cursores server-side.
+
+    La sesión sólo guarda la ventana visible más un buffer de prefetch; cambiar
+    de página dentro del buffer no consulta la base. `query` debe tener ORDER BY
+    para que las páginas sean estables. Si se pasa `version` (ver table_versions)
+    el buffer se descarta cuando cambia. Devuelve (DataFrame de la página, total).
+    """
+    state_key = f"{WINDOW_STATE_PREFIX}{key}"
+    signature = (db.schema, query, tuple(params or ()), version)
+    buffer = st.session_state.get(state_key)
+    if buffer is None or buffer["signature"] != signature:
+        buffer = {"signature": signature, "total": db.count(query, params), "start": -1, "frame": None}
+        st.session_state[state_key] = buffer
+
+    total = buffer["total"]
+    pages = max(1, -(-total // window))
+    page = st.number_input(f"Página (de {pages}, {total} filas)", min_value=1, max_value=pages, value=1, key=f"{state_key}_page")
+    start = (page - 1) * window
+
+    cached = buffer["frame"]
+    end = min(start + window, total)
+    if cached is None or not (buffer["start"] <= start and end <= buffer["start"] + len(cached)):
+        # Fuera del buffer: se pide la ventana más el prefetch de las siguientes páginas
+        buffer["frame"] = cached = db.read_window(query, params, offset=start, limit=window + prefetch, label=label)
+        buffer["start"] = start
+    offset = start - buffer["start"]
+    return cached.iloc[offset:offset + window], total
+
+
+def invalidate_windows():
+    """Descarta los buffers de páginas (llamar después de escribir en la base)."""
+    for state_key in [k for k in st.session_state if str(k).startswith(WINDOW_STATE_PREFIX) and not str(k).endswith("_page")]:
+        del st.session_state[state_key]
+
+
+EXPORT_STATE_PREFIX = "export_"
+EXPORT_CHUNK_ROWS = 5000
+
+
+def export_csv(db, key, query, params=None, version=None, label=None, file_name=None):
+    """Botón para exportar la consulta completa a CSV sin cargarla entera en memoria.
+
+    Los bloques de DATA_LAYER.iter_frames (cursor server-side) se escriben uno
+    por uno a un archivo temporal; la sesión sólo guarda su ruta. El archivo se
+    borra cuando cambia la consulta o su `version` (ver table_versions).
+    """
+    state_key = f"{EXPORT_STATE_PREFIX}{key}"
+    signature = (db.schema, query, tuple(params or ()), version)
+    export = st.session_state.get(state_key)
+    if export is not None and export["signature"] != signature:
+        drop_export(state_key)
+        export = None
+
+    if st.button("📤 Exportar CSV", key=f"{state_key}_button"):
+        drop_export(state_key)
+        fd, path = tempfile.mkstemp(prefix=f"career_{key}_", suffix=".csv")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                header = True
+                for frame in db.iter_frames(query, params, chunksize=EXPORT_CHUNK_ROWS, label=label):
+                    frame.to_csv(f, index=False, header=header)
+                    header = False
+        except Exception as e:
+            os.remove(path)
+            st.error(f"❌ No se pudo exportar: {e}")
+        else:
+            export = st.session_state[state_key] = {"signature": signature, "path": path}
+
+    if export is not None and os.path.exists(export["path"]):
+        with open(export["path"], "rb") as f:
+            st.download_button("⬇️ Descargar CSV", f, file_name=file_name or f"{key}.csv", mime="text/csv",
+                               key=f"{state_key}_download")
+
+
+def drop_export(state_key):
+    export = st.session_state.pop(state_key, None)
+    if export and os.path.exists(export["path"]):
+        os.remove(export["path"])
+
+
+def changed_cells(original, edited, key, columns):
+    """{llave: {columna: valor}} con las celdas de `columns` que difieren entre el snapshot y st.data_editor.
+
+    Vacíos (None, NaN, NaT, "") cuentan como NULL y las fechas se comparan como
+    date: una celda que se editó y volvió a su valor no genera escritura.
+    """
+    import pandas as pd
+
+    def normalize(value):
+        if value is None or value == "" or (pd.api.types.is_scalar(value) and pd.isna(value)):
+            return None
+        if isinstance(value, pd.Timestamp):
+            return value.date()
+        return value.item() if hasattr(value, "item") else value  # numpy -> python (psycopg2 no adapta numpy)
+
+    changes = {}
+    for index, before in original.iterrows():
+        after = edited.loc[index]
+        cells = {}
+        for column in columns:
+            value = normalize(after[column])
+            if value != normalize(before[column]):
+                cells[column] = value
+        if cells:
+            changes[normalize(before[key])] = cells
+    return changes
+
+
+SNAPSHOT_STATE_KEY = "snapshots"
+# Consultas con parámetros (job, idioma, company...) generan un snapshot por combinación
+MAX_SESSION_SNAPSHOTS = 32
+CV_GENERATION_STATE_KEY = "cv_generation"
+
+
+def table_versions(db, tables):
+    """Sello de versión barato de `tables`: una lectura de data_versions.
+
+    Los schemas creados antes de data_versions usan count(*) y max(xmin).
+    Se lee del mismo servidor que los datos (read_cursor), así el sello y el
+    snapshot siempre corresponden al mismo estado. Con réplica local, las
+    tablas que no se copian a SQLite toman el sello de Postgres.
+    """
+    tables = tuple(tables)
+    if not db.local_ready():
+        return _versions(db, tables)
+    remote_tables = tuple(table for table in tables if table not in MIRROR_TABLES)
+    if not remote_tables:
+        return _versions(db, tables)
+    local_tables = tuple(table for table in tables if table in MIRROR_TABLES)
+    found = dict(zip(local_tables, _versions(db, local_tables) if local_tables else ()))
+    found.update(zip(remote_tables, _versions(db.remote(), remote_tables)))
+    return tuple(found[table] for table in tables)
+
+
+def _versions(db, tables):
+    try:
+        with db.read_cursor() as cur:
+            cur.execute("SELECT table_name, version FROM data_versions WHERE table_name = ANY(%s);", (list(tables),))
+            found = dict(cur.fetchall())
+        return tuple(found.get(table, 0) for table in tables)
+    except Exception:
+        with db.read_cursor() as cur:
+            cur.execute(" UNION ALL ".join(
+                f"SELECT count(*)::text || ':' || COALESCE(max(xmin::text::bigint), 0)::text FROM {table}"
+                for table in tables
+            ) + ";")
+            return tuple(row[0] for row in cur.fetchall())
+
+
+def snapshot(db, name, tables, loader):
+    """Resultado de loader() guardado en la sesión mientras `tables` no cambien.
+
+    Los reruns por interacción con widgets reutilizan el snapshot y sólo
+    pagan la consulta del sello de versión. La sesión guarda a lo más
+    MAX_SESSION_SNAPSHOTS; se descartan los usados hace más tiempo.
+    """
+    stamp = (db.schema, table_versions(db, tables))
+    snapshots = st.session_state.get(SNAPSHOT_STATE_KEY)
+    if not isinstance(snapshots, OrderedDict):
+        snapshots = st.session_state[SNAPSHOT_STATE_KEY] = OrderedDict(snapshots or {})
+    cached = snapshots.get(name)
+    if cached is None or cached[0] != stamp:
+        cached = snapshots[name] = (stamp, loader())
+    snapshots.move_to_end(name)
+    while len(snapshots) > MAX_SESSION_SNAPSHOTS:
+        snapshots.popitem(last=False)
+    return cached[1]
+
+
+def cached_cv_generation(working_folder, data_access, tenant=None):
+    """CV_GENERATION de la sesión; sólo se reconstruye si cambia el tenant o la carpeta."""
+    try:
+        from Library.CV_generation import CV_GENERATION
+    except ModuleNotFoundError:
+        # fallback if running inside the Library folder
+        from CV_generation import CV_GENERATION
+    key = (str(working_folder), data_access["DB_URL"], tenant)
+    cached = st.session_state.get(CV_GENERATION_STATE_KEY)
+    if cached is None or cached[0] != key:
+        cached = (key, CV_GENERATION(working_folder, data_access, tenant, offline=True, session=db_session()))
+        st.session_state[CV_GENERATION_STATE_KEY] = cached
+    return cached[1]
@@ -0,0 +1,177 @@
+import hashlib
+import io
+import os
+import threading
+
+from colorama import Fore, Style
+
+try:
+    from Library.instrumentation import span
+except ModuleNotFoundError:
+    # fallback if running inside the Library folder
+    from instrumentation import span
+
+# Prefijo del archivo -> tipo de template
+TEMPLATE_KINDS = {"Curriculum": "curriculum", "Cover_letter": "cover_letter"}
+STORE_CONTENT_ENV = "CAREER_STORE_TEMPLATES"
+HASH_CHUNK = 1024 * 1024
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_template_name(filename):
+    """'Curriculum_English_v2.docx' -> ('curriculum', 'English'); None si no aplica."""
+    if not filename.endswith(".docx"):
+        return None
+    for prefix, kind in TEMPLATE_KINDS.items():
+        if filename.startswith(prefix):
+            parts = filename[len(prefix):-len(".docx")].lstrip("_").split("_")
+            return kind, parts[0]
+    return None
+
+
+class TEMPLATE_REGISTRY:
+    """Registro de templates en la tabla template_registry.
+
+    Guarda ruta, idioma, tamaño, mtime y sha256 de cada template. La
+    sincronización sólo vuelve a hashear los archivos cuyo tamaño o mtime
+    cambió, y escribe todo en bloque. Opcionalmente guarda los bytes del
+    template para que workers en otros nodos los lean desde Postgres.
+    """
+    # {sha256: bytes} compartido por proceso
+    _content_cache = {}
+    _lock = threading.Lock()
+
+    def __init__(self, db, templates_path):
+        self.db = db
+        self.templates_path = templates_path
+
+    @staticmethod
+    def store_content_default():
+        return os.getenv(STORE_CONTENT_ENV, "").strip().lower() in ("1", "true", "yes")
+
+    def scan(self):
+        """{archivo: (kind, lang, size, mtime)} de los templates en disco."""
+        found = {}
+        if not os.path.isdir(self.templates_path):
+            return found
+        with os.scandir(self.templates_path) as entries:
+            for entry in entries:
+                parsed = parse_template_name(entry.name) if entry.is_file() else None
+                if parsed:
+                    stat = entry.stat()
+                    found[entry.name] = (parsed[0], parsed[1], stat.st_size, stat.st_mtime)
+        return found
+
+    def sync(self, store_content=None, prune_stored=False):
+        """Sincroniza la carpeta de templates con la tabla; devuelve un resumen.
+
+        Un archivo que ya no está en disco sólo se borra del registro si no tiene
+        bytes guardados (o con prune_stored=True): en una máquina sin la carpeta
+        compartida el registro es la única copia del template.
+        """
+        from psycopg2.extras import execute_values
+
+        if store_content is None:
+            store_content = self.store_content_default()
+        on_disk = self.scan()
+
+        with self.db.cursor() as cur:
+            with span("registry.load"):
+                cur.execute("SELECT lang FROM languages")
+                languages = {row[0] for row in cur.fetchall()}
+                cur.execute(
+                    "SELECT template_file, size_bytes, mtime, sha256, content IS NOT NULL "
+                    "FROM template_registry"
+                )
+                registered = {row[0]: row[1:] for row in cur.fetchall()}
+
+            rows, skipped, unchanged = [], [], 0
+            with span("registry.hash", files=len(on_disk)):
+                for name, (kind, lang, size, mtime) in sorted(on_disk.items()):
+                    if lang not in languages:
+                        skipped.append(name)
+                        continue
+                    previous = registered.get(name)
+                    if previous and previous[0] == size and previous[1] == mtime and (previous[3] or not store_content):
+                        unchanged += 1
+                        continue
+                    path = os.path.join(self.templates_path, name)
+                    sha = file_sha256(path)
+                    content = None
+                    if store_content:
+                        with open(path, "rb") as f:
+                            content = f.read()
+                    rows.append((name, kind, lang, size, mtime, sha, content))
+
+            with span("registry.write", rows=len(rows)):
+                if rows:
+                    execute_values(
+                        cur,
+                        """
+                        INSERT INTO template_registry
+                            (template_file, kind, lang, size_bytes, mtime, sha256, content)
+                        VALUES %s
+                        ON CONFLICT (template_file) DO UPDATE SET
+                            kind = EXCLUDED.kind,
+                            lang = EXCLUDED.lang,
+                            size_bytes = EXCLUDED.size_bytes,
+                            mtime = EXCLUDED.mtime,
+                            sha256 = EXCLUDED.sha256,
+                            content = CASE
+                                WHEN EXCLUDED.sha256 = template_registry.sha256
+                                THEN COALESCE(EXCLUDED.content, template_registry.content)
+                                ELSE EXCLUDED.content
+                            END,
+                            synced_at = CURRENT_TIMESTAMP;
+                        """,
+                        rows,
+                    )
+                    cv_rows = [(row[0], row[2]) for row in rows if row[1] == "curriculum"]
+                    if cv_rows:
+                        execute_values(
+                            cur,
+                            "INSERT INTO cv_files (cv_file, lang) VALUES %s ON CONFLICT (cv_file) DO NOTHING;",
+                            cv_rows,
+                        )
+                removed = [
+                    name for name, previous in registered.items()
+                    if name not in on_disk and (prune_stored or not previous[3])
+                ]
+                if removed:
+                    cur.execute("DELETE FROM template_registry WHERE template_file = ANY(%s);", (removed,))
+
+        for name in skipped:
+            print(f"⚠️ Idioma no encontrado en la lista de idiomas válidos para {name}. Omitiendo.")
+        summary = {"updated": len(rows), "unchanged": unchanged, "removed": len(removed), "skipped": len(skipped)}
+        print(f"{Fore.GREEN}✅ Registro de templates: {summary}{Style.RESET_ALL}")
+        return summary
+
+    def fetch_content(self, template_file):
+        """Bytes del template desde Postgres (cacheados por sha256), o None."""
+        with self.db.cursor() as cur:
+            cur.execute(
+                "SELECT sha256, content FROM template_registry WHERE template_file = %s AND content IS NOT NULL;",
+                (template_file,),
+            )
+            row = cur.fetchone()
+        if row is None:
+            return None
+        sha, content = row
+        with self._lock:
+            return self._content_cache.setdefault(sha, bytes(content))
+
+    def open_template(self, template_file):
+        """Ruta local si existe; si no, un BytesIO con el contenido guardado en la base."""
+        path = os.path.join(self.templates_path, template_file)
+        if os.path.exists(path):
+            return path
+        with span("registry.fetch", template=template_file):
+            content = self.fetch_content(template_file)
+        return io.BytesIO(content) if content is not None else None
@@ -3,11 +3,30 @@ import yaml
 from colorama import Fore, init
 
 class YAMLCREATOR:
+    # {yaml_path: (mtime, data)} compartido por proceso: evita releer el YAML
+    _cache = {}
+
     def __init__(self, working_folder):
         print(Fore.BLUE + "INITIALIZING YAMLCREATOR")
         self.working_folder = working_folder
         self.yaml_path = os.path.join(working_folder, "config.yml")
-        self.data = self.yaml_creation(working_folder)
+        self.data = self.cached_yaml()
+
+    def cached_yaml(self):
+        """Devuelve el YAML parseado; sólo se relee si cambió su mtime."""
+        try:
+            mtime = os.path.getmtime(self.yaml_path)
+        except OSError:
+            mtime = None
+        cached = self._cache.get(self.yaml_path)
+        if mtime is not None and cached and cached[0] == mtime:
+            return cached[1]
+        data = self.yaml_creation(self.working_folder)
+        try:
+            self._cache[self.yaml_path] = (os.path.getmtime(self.yaml_path), data)
+        except OSError:
+            pass
+        return data
 
     def yaml_creation(self, working_folder):
         output_yaml = self.yaml_path
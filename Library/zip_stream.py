@@ -0,0 +1,65 @@
+import io
+import time
+import zipfile
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _Pipe(io.RawIOBase):
+    """Destino de ZipFile que sólo acumula lo escrito hasta que el generador lo entrega."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _source_chunks(source):
+    """bytes, ruta a un archivo o iterable de bytes -> trozos de hasta CHUNK_SIZE."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for start in range(0, len(view), CHUNK_SIZE):
+            yield view[start:start + CHUNK_SIZE]
+    elif isinstance(source, str):
+        with open(source, "rb") as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+    else:
+        yield from source
+
+
+def iter_zip(entries, compression=zipfile.ZIP_DEFLATED):
+    """Genera un .zip por trozos a partir de (nombre, fuente), sin archivo temporal.
+
+    Las fuentes (ver _source_chunks) se leen una por una conforme se consume
+    el generador; en memoria sólo queda el trozo en curso y el directorio
+    central (unos bytes por entrada). Una fuente None se omite.
+    """
+    pipe = _Pipe()
+    # Sin seek: zipfile escribe data descriptors después de cada entrada
+    with zipfile.ZipFile(pipe, mode="w", compression=compression) as archive:
+        for name, source in entries:
+            if source is None:
+                continue
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.compress_type = compression
+            with archive.open(info, mode="w", force_zip64=True) as entry:
+                for chunk in _source_chunks(source):
+                    entry.write(chunk)
+                    if pipe.chunks:
+                        yield pipe.drain()
+            yield pipe.drain()
+    yield pipe.drain()
@@ -11,21 +11,72 @@ CREATE TABLE IF NOT EXISTS {schema_name}.companies (
     {table_companies}
 );
 
+-- Create languages table (applications y cv_files la referencian)
+CREATE TABLE IF NOT EXISTS {schema_name}.languages (
+    {table_languages}
+);
+
+-- Formato de fecha de las cartas por idioma: {city} {day} {dd} {ordinal} {month} {mm} {year}
+ALTER TABLE {schema_name}.languages
+    ADD COLUMN IF NOT EXISTS date_pattern TEXT,
+    ADD COLUMN IF NOT EXISTS city TEXT,
+    ADD COLUMN IF NOT EXISTS month_names TEXT[],
+    ADD COLUMN IF NOT EXISTS ordinal_style TEXT,
+    ADD COLUMN IF NOT EXISTS capitalize_month BOOLEAN DEFAULT TRUE;
+
+-- Idiomas iniciales; para agregar otro idioma basta con insertar su fila
+INSERT INTO {schema_name}.languages AS l (lang, date_pattern, city, month_names, ordinal_style)
+VALUES
+    ('English', '{city}, {month} {day}{ordinal}, {year}', 'Mexico City',
+     ARRAY['January', 'February', 'March', 'April', 'May', 'June',
+           'July', 'August', 'September', 'October', 'November', 'December'], 'english'),
+    ('Spanish', '{city}, {day} de {month} de {year}', 'Ciudad de México',
+     ARRAY['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio',
+           'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre'], NULL),
+    ('French', '{city}, le {day}{ordinal} {month} {year}', 'Mexico',
+     ARRAY['janvier', 'février', 'mars', 'avril', 'mai', 'juin',
+           'juillet', 'août', 'septembre', 'octobre', 'novembre', 'décembre'], 'french')
+ON CONFLICT (lang) DO UPDATE SET
+    date_pattern = EXCLUDED.date_pattern,
+    city = EXCLUDED.city,
+    month_names = EXCLUDED.month_names,
+    ordinal_style = EXCLUDED.ordinal_style
+WHERE l.date_pattern IS NULL;
+
+-- Create cv files table
+CREATE TABLE IF NOT EXISTS {schema_name}.cv_files (
+    {table_cv_files}
+);
+
+-- Create template registry table (ruta, idioma, tamaño, mtime, hash y bytes opcionales)
+CREATE TABLE IF NOT EXISTS {schema_name}.template_registry (
+    {table_template_registry}
+);
+
 -- Create applications table
 CREATE TABLE IF NOT EXISTS {schema_name}.applications (
     {table_applications}
 );
 
--- Create languages table
-CREATE TABLE IF NOT EXISTS {schema_name}.languages (
-    {table_languages}
-);
+-- Sólo en el esquema con llaves TEXT; tras la migración 001 applications es una vista
+DO $$
+BEGIN
+    IF to_regclass('{schema_name}.application_data') IS NULL THEN
+        ALTER TABLE {schema_name}.applications
+            ADD COLUMN IF NOT EXISTS cv_files TEXT REFERENCES {schema_name}.cv_files(cv_file);
+    END IF;
+END $$;
 
 -- Create cover letters table
 CREATE TABLE IF NOT EXISTS {schema_name}.cover_letters (
     {table_cover_letters}
 );
 
+-- Create job tracker table
+CREATE TABLE IF NOT EXISTS {schema_name}.job_tracker (
+    {table_job_tracker}
+);
+
 -- Crear trigger
 CREATE OR REPLACE FUNCTION {schema_name}.insert_cover_letter()
 RETURNS TRIGGER AS $$
@@ -44,4 +95,171 @@ BEGIN
     VALUES (NEW.job, NEW.lang, NEW.company_name);
     RETURN NEW;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
+
+-- Avisos de cambios (LISTEN career_changes) para regenerar sólo los documentos afectados
+-- (los triggers se conectan en SQL/triggers.sql)
+CREATE OR REPLACE FUNCTION {schema_name}.notify_document_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    changed RECORD;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        changed := OLD;
+    ELSE
+        changed := NEW;
+    END IF;
+    IF TG_OP = 'UPDATE' AND OLD IS NOT DISTINCT FROM NEW THEN
+        RETURN NULL;
+    END IF;
+    -- to_jsonb: funciona con las tablas TEXT y con las de llaves enteras (migración 001)
+    PERFORM pg_notify('career_changes', json_build_object(
+        'schema', TG_TABLE_SCHEMA,
+        'table', COALESCE(TG_ARGV[0], TG_TABLE_NAME),
+        'op', TG_OP,
+        'application_id', to_jsonb(changed) -> 'application_id',
+        'job', to_jsonb(changed) ->> 'job',
+        'lang', to_jsonb(changed) ->> 'lang',
+        'company_name', to_jsonb(changed) ->> 'company_name'
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Historial de cambios: cada fila guarda el delta inverso (valores anteriores de las columnas que cambiaron)
+-- (los triggers se conectan en SQL/triggers.sql)
+CREATE TABLE IF NOT EXISTS {schema_name}.row_history (
+    {table_row_history}
+);
+
+CREATE INDEX IF NOT EXISTS row_history_row_idx
+    ON {schema_name}.row_history (table_name, row_id, history_id);
+
+-- Textos largos: sólo se guarda el tramo reemplazado ([prefijo, sufijo, texto anterior])
+CREATE OR REPLACE FUNCTION {schema_name}.text_splice(old_text TEXT, new_text TEXT)
+RETURNS JSONB AS $$
+DECLARE
+    lo INT := 0;
+    hi INT := least(length(old_text), length(new_text));
+    mid INT;
+    prefix INT;
+BEGIN
+    WHILE lo < hi LOOP
+        mid := (lo + hi + 1) / 2;
+        IF left(old_text, mid) = left(new_text, mid) THEN
+            lo := mid;
+        ELSE
+            hi := mid - 1;
+        END IF;
+    END LOOP;
+    prefix := lo;
+    lo := 0;
+    hi := least(length(old_text), length(new_text)) - prefix;
+    WHILE lo < hi LOOP
+        mid := (lo + hi + 1) / 2;
+        IF right(old_text, mid) = right(new_text, mid) THEN
+            lo := mid;
+        ELSE
+            hi := mid - 1;
+        END IF;
+    END LOOP;
+    RETURN jsonb_build_object('~splice', jsonb_build_array(
+        prefix, lo, substr(old_text, prefix + 1, length(old_text) - prefix - lo)));
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION {schema_name}.record_history()
+RETURNS TRIGGER AS $$
+DECLARE
+    old_row JSONB;
+    new_row JSONB;
+    delta JSONB;
+    pk TEXT := TG_ARGV[0];
+    -- Nombre lógico de la tabla (applications aunque la tabla base sea application_data)
+    label TEXT := COALESCE(TG_ARGV[1], TG_TABLE_NAME);
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        new_row := to_jsonb(NEW);
+        INSERT INTO {schema_name}.row_history (table_name, row_id, op, delta)
+        VALUES (label, (new_row ->> pk)::BIGINT, TG_OP, '{}'::JSONB);
+        RETURN NULL;
+    END IF;
+    old_row := to_jsonb(OLD);
+    IF TG_OP = 'DELETE' THEN
+        delta := old_row;
+    ELSE
+        new_row := to_jsonb(NEW);
+        SELECT jsonb_object_agg(o.key,
+            CASE WHEN jsonb_typeof(o.value) = 'string'
+                      AND jsonb_typeof(new_row -> o.key) = 'string'
+                      AND length(o.value #>> '{}') > 256
+                 THEN {schema_name}.text_splice(o.value #>> '{}', new_row ->> o.key)
+                 ELSE o.value
+            END)
+        INTO delta
+        FROM jsonb_each(old_row) AS o
+        WHERE new_row -> o.key IS DISTINCT FROM o.value;
+        IF delta IS NULL THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+    INSERT INTO {schema_name}.row_history (table_name, row_id, op, delta)
+    VALUES (label, (old_row ->> pk)::BIGINT, TG_OP, delta);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Contador de versión por tabla: la UI sólo vuelve a consultar cuando cambia
+-- (los triggers se conectan en SQL/triggers.sql)
+CREATE TABLE IF NOT EXISTS {schema_name}.data_versions (
+    {table_data_versions}
+);
+
+CREATE OR REPLACE FUNCTION {schema_name}.bump_data_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO {schema_name}.data_versions AS v (table_name, version)
+    VALUES (COALESCE(TG_ARGV[0], TG_TABLE_NAME), 1)
+    ON CONFLICT (table_name) DO UPDATE
+    SET version = v.version + 1, changed_at = CURRENT_TIMESTAMP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Búsqueda aproximada de companies (type-ahead); requiere permiso para crear la extensión
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS companies_name_trgm_idx
+    ON {schema_name}.companies USING gin (company_name gin_trgm_ops);
+
+-- Última versión descargada de cada posting_url (HTML comprimido con zlib, llave sha256 de la URL)
+CREATE TABLE IF NOT EXISTS {schema_name}.posting_snapshots (
+    {table_posting_snapshots}
+);
+
+-- Deduplicación de postings: firma MinHash por snapshot y sus buckets LSH (Library/posting_dedup.py)
+CREATE TABLE IF NOT EXISTS {schema_name}.posting_minhash (
+    {table_posting_minhash}
+);
+
+CREATE TABLE IF NOT EXISTS {schema_name}.posting_lsh (
+    {table_posting_lsh}
+);
+
+CREATE INDEX IF NOT EXISTS posting_lsh_url_hash_idx ON {schema_name}.posting_lsh (url_hash);
+
+-- Recordatorios (Library/deadline_scheduler.py): índices parciales sólo con las filas que tienen fecha
+CREATE INDEX IF NOT EXISTS job_tracker_next_deadline_idx
+    ON {schema_name}.job_tracker (next_stage_deadline) WHERE next_stage_deadline IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS job_tracker_reach_out_idx
+    ON {schema_name}.job_tracker (reach_out_day) WHERE reach_out_day IS NOT NULL;
+
+-- Avisa al scheduler que recargue su heap (un NOTIFY por transacción y schema)
+CREATE OR REPLACE FUNCTION {schema_name}.notify_deadline_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('career_deadlines', TG_TABLE_SCHEMA);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,185 @@
+-- 001: llaves enteras (company_id, type_id, application_id) en lugar de llaves TEXT
+-- applications / cover_letters pasan a ser vistas de compatibilidad sobre
+-- application_data / cover_letter_data; las consultas existentes siguen funcionando.
+
+ALTER TABLE {schema_name}.applications RENAME TO application_data;
+
+ALTER TABLE {schema_name}.cover_letters RENAME TO cover_letter_data;
+
+-- El backfill no debe generar historial, avisos ni versiones (SQL/triggers.sql los vuelve a crear)
+ALTER TABLE {schema_name}.application_data DISABLE TRIGGER USER;
+
+ALTER TABLE {schema_name}.cover_letter_data DISABLE TRIGGER USER;
+
+-- ===== application_data: company_id / type_id =====
+ALTER TABLE {schema_name}.application_data
+    ADD COLUMN company_id INT,
+    ADD COLUMN type_id INT;
+
+UPDATE {schema_name}.application_data a
+SET company_id = c.company_id,
+    type_id = t.type_id
+FROM {schema_name}.companies c, {schema_name}.company_types t
+WHERE c.company_name = a.company_name
+  AND t.type_business = a.company_type;
+
+-- ===== cover_letter_data: application_id =====
+ALTER TABLE {schema_name}.cover_letter_data
+    ADD COLUMN application_id INT;
+
+UPDATE {schema_name}.cover_letter_data l
+SET application_id = a.application_id
+FROM {schema_name}.application_data a
+WHERE a.job = l.job AND a.lang = l.lang AND a.company_name = l.company_name;
+
+-- Quita las llaves TEXT (CASCADE elimina la FK compuesta y los UNIQUE que las usaban)
+ALTER TABLE {schema_name}.cover_letter_data
+    DROP COLUMN job CASCADE,
+    DROP COLUMN lang CASCADE,
+    DROP COLUMN company_name CASCADE;
+
+ALTER TABLE {schema_name}.application_data
+    DROP COLUMN company_name CASCADE,
+    DROP COLUMN company_type CASCADE;
+
+ALTER TABLE {schema_name}.application_data
+    ALTER COLUMN company_id SET NOT NULL,
+    ALTER COLUMN type_id SET NOT NULL,
+    ADD CONSTRAINT application_data_company_fk
+        FOREIGN KEY (company_id) REFERENCES {schema_name}.companies(company_id) ON DELETE RESTRICT,
+    ADD CONSTRAINT application_data_type_fk
+        FOREIGN KEY (type_id) REFERENCES {schema_name}.company_types(type_id) ON DELETE RESTRICT,
+    ADD CONSTRAINT application_data_job_lang_company_key UNIQUE (job, lang, company_id);
+
+ALTER TABLE {schema_name}.cover_letter_data
+    ALTER COLUMN application_id SET NOT NULL,
+    ADD CONSTRAINT cover_letter_data_application_fk
+        FOREIGN KEY (application_id) REFERENCES {schema_name}.application_data(application_id) ON DELETE CASCADE,
+    ADD CONSTRAINT cover_letter_data_application_key UNIQUE (application_id);
+
+CREATE INDEX application_data_company_idx ON {schema_name}.application_data (company_id);
+
+CREATE INDEX application_data_type_idx ON {schema_name}.application_data (type_id);
+
+ALTER TABLE {schema_name}.application_data ENABLE TRIGGER USER;
+
+ALTER TABLE {schema_name}.cover_letter_data ENABLE TRIGGER USER;
+
+-- ===== Vistas de compatibilidad (mismas columnas que las tablas anteriores) =====
+CREATE VIEW {schema_name}.applications AS
+SELECT a.application_id, a.job,
+       a.education1, a.education2, a.education3,
+       a.experience1, a.experience2, a.experience3,
+       a.skills, a.interests, a.lang, a.status, a.created_at,
+       c.company_name, t.type_business AS company_type,
+       a.cv_files, a.company_id, a.type_id
+FROM {schema_name}.application_data a
+JOIN {schema_name}.companies c ON c.company_id = a.company_id
+JOIN {schema_name}.company_types t ON t.type_id = a.type_id;
+
+ALTER VIEW {schema_name}.applications ALTER COLUMN application_id
+    SET DEFAULT nextval(pg_get_serial_sequence('{schema_name}.application_data', 'application_id')::regclass);
+
+ALTER VIEW {schema_name}.applications ALTER COLUMN created_at SET DEFAULT CURRENT_TIMESTAMP;
+
+CREATE VIEW {schema_name}.cover_letters AS
+SELECT l.cover_id, a.job, a.lang, c.company_name,
+       l.header, l.address, l.date, l.body, l."end", l.sign,
+       l.application_id
+FROM {schema_name}.cover_letter_data l
+JOIN {schema_name}.application_data a ON a.application_id = l.application_id
+JOIN {schema_name}.companies c ON c.company_id = a.company_id;
+
+ALTER VIEW {schema_name}.cover_letters ALTER COLUMN cover_id
+    SET DEFAULT nextval(pg_get_serial_sequence('{schema_name}.cover_letter_data', 'cover_id')::regclass);
+
+-- ===== Escrituras a través de las vistas =====
+CREATE OR REPLACE FUNCTION {schema_name}.applications_view_write()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_company_id INT;
+    v_type_id INT;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM {schema_name}.application_data WHERE application_id = OLD.application_id;
+        RETURN OLD;
+    END IF;
+    SELECT company_id INTO v_company_id FROM {schema_name}.companies WHERE company_name = NEW.company_name;
+    v_company_id := COALESCE(v_company_id, NEW.company_id);
+    IF v_company_id IS NULL THEN
+        RAISE foreign_key_violation USING MESSAGE = format('La company "%s" no existe en companies.', NEW.company_name);
+    END IF;
+    SELECT type_id INTO v_type_id FROM {schema_name}.company_types WHERE type_business = NEW.company_type;
+    v_type_id := COALESCE(v_type_id, NEW.type_id);
+    IF v_type_id IS NULL THEN
+        RAISE foreign_key_violation USING MESSAGE = format('El tipo "%s" no existe en company_types.', NEW.company_type);
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO {schema_name}.application_data
+            (application_id, job, education1, education2, education3,
+             experience1, experience2, experience3, skills, interests,
+             lang, status, created_at, cv_files, company_id, type_id)
+        VALUES
+            (NEW.application_id, NEW.job, NEW.education1, NEW.education2, NEW.education3,
+             NEW.experience1, NEW.experience2, NEW.experience3, NEW.skills, NEW.interests,
+             NEW.lang, NEW.status, NEW.created_at, NEW.cv_files, v_company_id, v_type_id);
+    ELSE
+        UPDATE {schema_name}.application_data
+        SET application_id = NEW.application_id, job = NEW.job,
+            education1 = NEW.education1, education2 = NEW.education2, education3 = NEW.education3,
+            experience1 = NEW.experience1, experience2 = NEW.experience2, experience3 = NEW.experience3,
+            skills = NEW.skills, interests = NEW.interests, lang = NEW.lang, status = NEW.status,
+            created_at = NEW.created_at, cv_files = NEW.cv_files,
+            company_id = v_company_id, type_id = v_type_id
+        WHERE application_id = OLD.application_id;
+    END IF;
+    NEW.company_id := v_company_id;
+    NEW.type_id := v_type_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER applications_view_write
+INSTEAD OF INSERT OR UPDATE OR DELETE ON {schema_name}.applications
+FOR EACH ROW EXECUTE FUNCTION {schema_name}.applications_view_write();
+
+CREATE OR REPLACE FUNCTION {schema_name}.cover_letters_view_write()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_application_id INT;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM {schema_name}.cover_letter_data WHERE cover_id = OLD.cover_id;
+        RETURN OLD;
+    END IF;
+    SELECT a.application_id INTO v_application_id
+    FROM {schema_name}.application_data a
+    JOIN {schema_name}.companies c ON c.company_id = a.company_id
+    WHERE a.job = NEW.job AND a.lang = NEW.lang AND c.company_name = NEW.company_name;
+    v_application_id := COALESCE(v_application_id, NEW.application_id);
+    IF v_application_id IS NULL THEN
+        RAISE foreign_key_violation USING MESSAGE = format(
+            'No existe la aplicación (%s, %s, %s).', NEW.job, NEW.lang, NEW.company_name);
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO {schema_name}.cover_letter_data
+            (cover_id, application_id, header, address, date, body, "end", sign)
+        VALUES
+            (NEW.cover_id, v_application_id, NEW.header, NEW.address, NEW.date, NEW.body, NEW."end", NEW.sign);
+    ELSE
+        UPDATE {schema_name}.cover_letter_data
+        SET cover_id = NEW.cover_id, application_id = v_application_id,
+            header = NEW.header, address = NEW.address, date = NEW.date,
+            body = NEW.body, "end" = NEW."end", sign = NEW.sign
+        WHERE cover_id = OLD.cover_id;
+    END IF;
+    NEW.application_id := v_application_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER cover_letters_view_write
+INSTEAD OF INSERT OR UPDATE OR DELETE ON {schema_name}.cover_letters
+FOR EACH ROW EXECUTE FUNCTION {schema_name}.cover_letters_view_write();
@@ -0,0 +1,50 @@
+-- Conecta los triggers de avisos, historial y versiones a las tablas base.
+-- Se corre después de initializing.sql y de SQL/migrations, así que sirve para
+-- el esquema con llaves TEXT (applications) y para el de llaves enteras
+-- (application_data); los triggers siempre reportan el nombre lógico.
+DO $$
+DECLARE
+    t RECORD;
+BEGIN
+    FOR t IN
+        SELECT logical, pk, COALESCE(to_regclass('{schema_name}.' || stored), to_regclass('{schema_name}.' || logical)) AS rel
+        FROM (VALUES ('applications', 'application_data', 'application_id'),
+                     ('cover_letters', 'cover_letter_data', 'cover_id')) AS v(logical, stored, pk)
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %s', t.logical || '_notify_change', t.rel);
+        EXECUTE format('CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE ON %s '
+                       'FOR EACH ROW EXECUTE FUNCTION {schema_name}.notify_document_change(%L)',
+                       t.logical || '_notify_change', t.rel, t.logical);
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %s', t.logical || '_history', t.rel);
+        EXECUTE format('CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE ON %s '
+                       'FOR EACH ROW EXECUTE FUNCTION {schema_name}.record_history(%L, %L)',
+                       t.logical || '_history', t.rel, t.pk, t.logical);
+    END LOOP;
+END $$;
+
+DO $$
+DECLARE
+    t TEXT;
+    rel REGCLASS;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['company_types', 'companies', 'languages', 'cv_files', 'template_registry',
+                             'applications', 'cover_letters', 'job_tracker', 'posting_snapshots',
+                             'posting_minhash']
+    LOOP
+        rel := COALESCE(
+            CASE t WHEN 'applications' THEN to_regclass('{schema_name}.application_data')
+                   WHEN 'cover_letters' THEN to_regclass('{schema_name}.cover_letter_data') END,
+            to_regclass('{schema_name}.' || t));
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %s', t || '_data_version', rel);
+        EXECUTE format('CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %s '
+                       'FOR EACH STATEMENT EXECUTE FUNCTION {schema_name}.bump_data_version(%L)',
+                       t || '_data_version', rel, t);
+    END LOOP;
+END $$;
+
+-- El scheduler de recordatorios recarga su heap cuando cambia job_tracker
+DROP TRIGGER IF EXISTS job_tracker_deadline_notify ON {schema_name}.job_tracker;
+
+CREATE TRIGGER job_tracker_deadline_notify
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {schema_name}.job_tracker
+FOR EACH STATEMENT EXECUTE FUNCTION {schema_name}.notify_deadline_change();
@@ -1,14 +1,11 @@
 import os
-from dotenv import load_dotenv
-from colorama import Fore, Style, init
-from Library.yaml_creator import YAMLCREATOR
-from Library.chrome_helper import CHROME_HELPER
-import pandas as pd
-from docx import Document
-import yaml
-from sqlalchemy import create_engine
 import sys
 import subprocess
+from colorama import Fore, Style, init
+from Library.settings import ENV_FILE, FOLDER_KEY, load_env, get_settings
+from Library.yaml_creator import YAMLCREATOR
+# pandas, python-docx, SQLAlchemy y el helper de Chrome se importan sólo en la
+# opción del menú que los usa, para que el menú aparezca al instante.
 
 
 
@@ -22,13 +19,16 @@ class CARRIER_MANAGEMENT:
               1) Inicializar la base en SQL 
               2) Poblar con datos
               3) Reemplazar datos en word. 
+              4) Generar todos los idiomas de un job (en paralelo)
+              5) Regenerar documentos al cambiar la base (listener)
+              6) Recordatorios de deadlines (scheduler)
               """)
-        user_choice = input("Seleccione una opción (1-3): ")
+        user_choice = input("Seleccione una opción (1-6): ")
 
         if user_choice == "1":
             print("Inicializando base de datos en PostgreSQL...")
             from Library.SQL_management import CSV_TO_SQL
-            CSV_TO_SQL(self.working_folder, self.data_access).csv_to_sql_process()
+            CSV_TO_SQL(self.working_folder, self.data_access, self.tenant).csv_to_sql_process()
         elif user_choice == "2":
             print("Poblando la base de datos con datos de ejemplo...")
             streamlit_path = os.path.join(".", "Library", "concept_filing.py")
@@ -38,46 +38,55 @@ class CARRIER_MANAGEMENT:
                 print(f"❌ Error al ejecutar Streamlit: {e}")            
         elif user_choice == "3":
             from Library.CV_generation import CV_GENERATION
-            CV_GENERATION(self.working_folder, self.data_access).postgre_to_docx()
+            input_date = self.ask_letter_date()
+            CV_GENERATION(self.working_folder, self.data_access, self.tenant).postgre_to_docx(input_date)
+        elif user_choice == "4":
+            from Library.CV_generation import CV_GENERATION
+            job = input("Job a generar en todos sus idiomas: ").strip()
+            input_date = self.ask_letter_date()
+            CV_GENERATION(self.working_folder, self.data_access, self.tenant).render_all_languages(job, input_date=input_date)
+        elif user_choice == "5":
+            from Library.cdc_listener import CDC_LISTENER
+            CDC_LISTENER(get_settings(), tenant=self.tenant).run()
+        elif user_choice == "6":
+            from Library.deadline_scheduler import DEADLINE_SCHEDULER
+            DEADLINE_SCHEDULER(get_settings(), tenant=self.tenant).run()
 
         else: 
             print("Opción no válida. Saliendo.")
             
+    def ask_letter_date(self):
+        """Pide la fecha de la carta (DD/MM/AAAA); None = hoy."""
+        from datetime import datetime
+        while True:
+            str_date = input("Fecha de la carta DD/MM/AAAA (enter = hoy): ").strip()
+            if not str_date:
+                return None
+            try:
+                return datetime.strptime(str_date, '%d/%m/%Y')
+            except ValueError:
+                print("Formato inválido, usa DD/MM/AAAA.")
+
     def __init__(self):
         self.folder_root = self.get_root_path()
-        env_path = os.path.abspath(os.path.join(os.path.dirname(__file__)))
-        env_file = os.path.join(env_path, '.env')
-        folder_name = "MAIN_PATH"
-        db_key = "DB_URL"
-        
-        self.working_folder = "."
-        pg_dict = {}
-
-        if os.path.exists(env_file):
-            load_dotenv(dotenv_path=env_file)
-            self.working_folder = os.getenv(folder_name)
-            pg_dict = {"DB_URL": os.getenv(db_key)} 
-
-        yaml_path = os.path.join(env_path, 'config', 'config.yml')
-        with open(yaml_path, 'r') as file:
-            data_access = yaml.safe_load(file)
-            if data_access is None:
-                data_access = {}
-            data_access.update(pg_dict)  # ⚠️ Esto solo funciona si data_access es una lista
+        # get_root_path ya cargó el .env (una sola vez por proceso)
+        self.working_folder = os.getenv(FOLDER_KEY) or "."
+        settings = get_settings()
+        self.data_access = settings.data_access
+        self.tenant = settings.default_tenant  # CAREER_TENANT en el .env
         os.makedirs(self.working_folder, exist_ok=True)
         self.data_yaml = YAMLCREATOR(self.working_folder).data
-        # Initialize Sprint 1.1: Get product list
-        self.chrome_helper = CHROME_HELPER()
-        root_path = os.path.join(os.path.dirname(__file__))
-        config_path = os.path.join(root_path, "config", "config.yml")
-        with open(config_path, 'r') as f:
-            self.data_access = yaml.safe_load(f)    
-            env_file = ".env"
-            load_dotenv(env_file)
-            pg_dict = {"DB_URL": os.getenv("DB_URL")}
-            self.data_access.update(pg_dict)
+        self._chrome_helper = None
         self.output_path = os.path.join(self.working_folder, "Output CVs")
         os.makedirs(self.output_path, exist_ok=True)
+
+    @property
+    def chrome_helper(self):
+        # Initialize Sprint 1.1: Get product list (import diferido)
+        if self._chrome_helper is None:
+            from Library.chrome_helper import CHROME_HELPER
+            self._chrome_helper = CHROME_HELPER()
+        return self._chrome_helper
         
     # Get the root path
     def get_root_path(self):
@@ -85,11 +94,10 @@ class CARRIER_MANAGEMENT:
         repo_path = os.path.dirname(os.path.abspath(__file__))
         repo_name = os.path.basename(repo_path)
         print(f"Current script path: {os.path.abspath(__file__)}")
-        env_file = ".env"
+        env_file = str(ENV_FILE)
         # Load .env if it exists
         full_repo_path = None
-        if os.path.exists(env_file):
-            load_dotenv(env_file)
+        if load_env():
             full_repo_path = os.getenv("MAIN_PATH") or os.getenv("Main_path")
             if not full_repo_path:
                 with open(env_file, "r") as env_handle:
@@ -123,6 +131,7 @@ class CARRIER_MANAGEMENT:
                 content = f.read()
                 if "MAIN_PATH=" not in content:
                     f.write(f"MAIN_PATH={full_repo_path}\n")
+            os.environ[FOLDER_KEY] = full_repo_path
             # Check if full_repo_path is inside repo_path
             if full_repo_path.startswith(repo_path + os.sep):
                 gitignore_path = ".gitignore"
@@ -1,91 +1,47 @@
+from datetime import date, timedelta
+
 import streamlit as st
 import pandas as pd
-import psycopg2
-from psycopg2.extras import RealDictCursor
-import os
-from sqlalchemy import create_engine
-from urllib.parse import urlparse
-from dotenv import load_dotenv
-import yaml
-from pathlib import Path
-
-# Ruta base del proyecto (carpeta raíz del repo)
-BASE_PATH = Path(__file__).resolve().parent.parent
-env_file = BASE_PATH / ".env"
-
-folder_name = "MAIN_PATH"
-db_key = "DB_URL"
-
-working_folder = None
-db_url = None
-
-if env_file.exists():
-    # ===== MODO LOCAL (.env) =====
-    load_dotenv(dotenv_path=env_file)
-
-    main_path_str = os.getenv(folder_name)
-    db_url = os.getenv(db_key)
-
-    if not main_path_str:
-        st.error("❌ MAIN_PATH no está definido en el archivo .env.")
-        st.stop()
-
-    working_folder = Path(main_path_str)
-    working_folder.mkdir(parents=True, exist_ok=True)
-
-    if not db_url:
-        st.error("❌ DB_URL no está definido en el archivo .env.")
-        st.stop()
-
-else:
-    # ===== MODO CLOUD / SIN .env (Render) =====
-    main_path_str = os.getenv(folder_name)
-
-    # Si no está definida MAIN_PATH en el entorno, usamos un default
-    if not main_path_str:
-        main_path_str = str(BASE_PATH / "temp_files")
-        os.environ[folder_name] = main_path_str  # la inyectamos por si otro código la usa
-
-    working_folder = Path(main_path_str)
-    working_folder.mkdir(parents=True, exist_ok=True)
-
-    db_url = os.getenv(db_key)
-    if not db_url:
-        st.error("❌ La variable de entorno DB_URL no está configurada.")
-        st.stop()
-
-# Rutas usadas en tu lógica
-output_path = working_folder / "Output CVs"
-output_path.mkdir(parents=True, exist_ok=True)
-
-
-templates_path = working_folder / "CV Templates"
-templates_path.mkdir(parents=True, exist_ok=True)
-
-# Cargar configuración YAML
-yaml_path = BASE_PATH / "config" / "config.yml"
-
-with open(yaml_path, "r") as file:
-    data_access = yaml.safe_load(file) or {}
-data_access['DB_URL'] = db_url
-# 1) Parse DB URL from self.data_access['sql_workflow']
-sql_url = data_access['DB_URL']
-parsed = urlparse(sql_url)
-dbname = parsed.path.lstrip('/')
-user = parsed.username
-password = parsed.password
-host = parsed.hostname
-port = parsed.port
-
-# 2) Connect to PostgreSQL
-conn = psycopg2.connect(
-    dbname=dbname,
-    user=user,
-    password=password,
-    host=host,
-    port=port
+from Library.deadline_scheduler import HORIZON_DAYS, KIND_LABELS, LOOKBACK_DAYS, due_items
+from Library.instrumentation import tracer, span
+from Library.lookups import COMPANY_LOOKUP, OPTION_LIST, search_companies
+from Library.posting_fetcher import html_to_text, read_posting
+from Library.relevance import RELEVANCE_RANKER
+from Library.settings import bootstrap
+from Library.streamlit_session import (
+    cached_cv_generation,
+    changed_cells,
+    export_csv,
+    invalidate_windows,
+    select_tenant,
+    session_db,
+    snapshot,
+    table_versions,
+    windowed_frame,
 )
 
+# Job tracker: columnas de la tabla editable (application_id queda oculta como llave)
+JT_GRID_COLUMNS = [
+    "company", "position", "contact_person", "reach_out_day", "stage", "type",
+    "posting_url", "duplicate_of", "message", "next_stage_deadline",
+]
+JT_EDITABLE_COLUMNS = ["contact_person", "reach_out_day", "stage", "type", "posting_url", "message", "next_stage_deadline"]
+JT_DATE_COLUMNS = ["reach_out_day", "next_stage_deadline"]
+STATUS_OPTIONS = OPTION_LIST(["applied", "interviewing", "offered", "rejected"])
+DEFAULT_LANG_OPTIONS = OPTION_LIST(["English", "Spanish", "French"])
+
+# Settings compartidos por proceso (Library/settings.py): el YAML y el .env
+# sólo se vuelven a leer si cambia su mtime, no en cada rerun.
+try:
+    settings = bootstrap()
+except ValueError as e:
+    st.error(str(e))
+    st.stop()
+
+working_folder = settings.working_folder
+output_path = settings.output_path
+templates_path = settings.templates_path
+data_access = settings.data_access
 # 3) Streamlit UI
 st.set_page_config(page_title="Resumen aplicaciones", layout="wide")
 # 🔙 Link a Home
@@ -100,11 +56,82 @@ vista = st.sidebar.radio(
         "Companies",
         "Applications",
         "Cover Letters",
-        "Job tracker"
+        "Job tracker",
+        "History"
     ]
 )
 
-schema = data_access['db_structure']['schema_name']    
+# === 👤 Tenant: cada usuario trabaja en su propio schema ===
+tenant = select_tenant(settings)
+
+# Pool de conexiones del tenant; cada conexión fija su search_path.
+# Con DB_READ_URLS las lecturas van a réplicas al día con esta sesión.
+db = session_db(data_access, tenant)
+schema = db.schema
+st.sidebar.caption(f"Schema: `{schema}`")
+
+if tenant and st.sidebar.button("Crear schema para este usuario"):
+    from Library.SQL_initialize import INITIALIZE
+    if INITIALIZE().initialize_postgres_db(data_access, working_folder, tenant=tenant, launch_streamlit=False):
+        db.note_write()
+        st.sidebar.success(f"✅ Schema '{schema}' listo.")
+    else:
+        st.sidebar.error(f"❌ No se pudo crear el schema '{schema}'.")
+
+# === 💾 Réplica local (CAREER_LOCAL_REPLICA): se lee/escribe en SQLite y se sincroniza con Postgres ===
+if db.local is not None:
+    if not db.local.pulled():
+        try:
+            db.local.pull(db.remote())
+        except Exception as e:
+            st.sidebar.warning(f"⚠️ Sin copia local todavía (Postgres no responde): {e}")
+    local_status = db.local.status()
+    st.sidebar.caption(
+        f"💾 Réplica local: {local_status['pending']} cambio(s) sin enviar, "
+        f"{local_status['conflicts']} conflicto(s)"
+    )
+    if local_status["conflicts"]:
+        with st.sidebar.expander(f"⚠️ Conflictos de la réplica ({local_status['conflicts']})"):
+            st.caption("Cambios locales que Postgres rechazó; la fila del servidor es la que quedó.")
+            st.dataframe(
+                pd.DataFrame(
+                    db.local.conflicts(),
+                    columns=["id", "tabla", "operación", "llave", "fila local", "fila servidor", "error", "detectado"],
+                ),
+                hide_index=True,
+            )
+    if st.sidebar.button("🔄 Sincronizar réplica local"):
+        try:
+            summary = db.local.sync(db.remote())
+            st.sidebar.success(
+                f"✅ {summary['applied']} enviados, {summary['conflicts']} conflictos, "
+                f"{len(summary['pulled'])} tabla(s) actualizadas."
+            )
+            invalidate_windows()
+            st.rerun()
+        except Exception as e:
+            st.sidebar.error(f"❌ No se pudo sincronizar: {e}")
+
+show_timings = st.sidebar.checkbox("⏱️ Mostrar tiempos de consultas", value=tracer.enabled)
+# Streamlit reutiliza hilos entre reruns: se limpia siempre lo que haya quedado de un rerun anterior
+tracer.stop_run()
+if show_timings:
+    tracer.start_run()
+
+
+def read_sql(table, query, params=None):
+    """Lectura por el pool del tenant, envuelta en un span para el desglose de tiempos."""
+    with span("page.query", view=vista, table=table):
+        return db.read_frame(query, params=params, label=table)
+
+
+def read_snapshot(table, query, params=None, tables=None):
+    """Como read_sql, pero reutiliza el resultado de la sesión mientras la tabla no cambie.
+
+    Los reruns por interacción con widgets sólo consultan el sello de versión.
+    """
+    return snapshot(db, (query, tuple(params or ())), tables or (table,), lambda: read_sql(table, query, params))
+
 
 if vista == "Companies":
     st.title("🏢 Companies & Business Types")
@@ -117,9 +144,9 @@ if vista == "Companies":
 
         # Mostrar registros actuales
         try:
-            df_types = pd.read_sql(
-                f'SELECT type_business FROM "{schema}".company_types ORDER BY type_business;',
-                conn
+            df_types = read_snapshot(
+                "company_types",
+                'SELECT type_business FROM company_types ORDER BY type_business;',
             )
         except Exception:
             df_types = pd.DataFrame()
@@ -132,16 +159,15 @@ if vista == "Companies":
         if st.button("Agregar Company Type"):
             if new_type_business:
                 try:
-                    with conn.cursor() as cur:
+                    with db.cursor() as cur:
                         cur.execute(
-                            f'''
-                            INSERT INTO "{schema}".company_types (type_business)
+                            '''
+                            INSERT INTO company_types (type_business)
                             VALUES (%s)
                             ON CONFLICT DO NOTHING;
                             ''',
                             (new_type_business,)
                         )
-                        conn.commit()
                     st.success("✅ Tipo de negocio agregado correctamente.")
                 except Exception as e:
                     st.error(f"❌ Error al agregar tipo de negocio: {e}")
@@ -154,9 +180,9 @@ if vista == "Companies":
 
         # Mostrar registros actuales
         try:
-            df_companies = pd.read_sql(
-                f'SELECT company_name, company_type, created_at FROM "{schema}".companies ORDER BY company_name;',
-                conn
+            df_companies = read_snapshot(
+                "companies",
+                'SELECT company_name, company_type, created_at FROM companies ORDER BY company_name;',
             )
         except Exception:
             df_companies = pd.DataFrame()
@@ -168,9 +194,9 @@ if vista == "Companies":
 
         # Cargar opciones de tipo de negocio
         try:
-            company_types_df = pd.read_sql(
-                f'SELECT type_business FROM "{schema}".company_types ORDER BY type_business;',
-                conn
+            company_types_df = read_snapshot(
+                "company_types",
+                'SELECT type_business FROM company_types ORDER BY type_business;',
             )
             company_type_options = company_types_df['type_business'].tolist()
         except Exception:
@@ -181,16 +207,15 @@ if vista == "Companies":
         if st.button("Agregar Company"):
             if new_company_name and selected_company_type:
                 try:
-                    with conn.cursor() as cur:
+                    with db.cursor() as cur:
                         cur.execute(
-                            f'''
-                            INSERT INTO "{schema}".companies (company_name, company_type)
+                            '''
+                            INSERT INTO companies (company_name, company_type)
                             VALUES (%s, %s)
                             ON CONFLICT DO NOTHING;
                             ''',
                             (new_company_name, selected_company_type)
                         )
-                        conn.commit()
                     st.success("✅ Company agregada correctamente.")
                 except Exception as e:
                     st.error(f"❌ Error al agregar Company: {e}")
@@ -200,44 +225,129 @@ if vista == "Companies":
 elif vista == "Applications":
     st.title("📝 Applications")
 
-    # === Mostrar registros actuales ===
+    # === Mostrar registros actuales (sólo la página visible + prefetch) ===
+    applications_query = '''
+        SELECT job, education1, education2, education3,
+            experience1, experience2, experience3,
+            skills, interests, lang, status,
+            company_name, company_type, created_at, cv_files
+        FROM applications
+        ORDER BY created_at DESC, application_id DESC;
+    '''
+    applications_version = None
     try:
-        df = pd.read_sql(f'''
-            SELECT job, education1, education2, education3,
-                experience1, experience2, experience3,
-                skills, interests, lang, status,
-                company_name, company_type, created_at, cv_files
-            FROM "{schema}".applications
-            ORDER BY created_at DESC;
-        ''', conn)
+        applications_version = table_versions(db, ("applications",))
+        with span("page.query", view=vista, table="applications"):
+            df, _ = windowed_frame(db, "applications", applications_query, version=applications_version,
+                                   label="applications")
     except Exception:
         df = pd.DataFrame()
 
-    st.dataframe(df, use_container_width=True)
+    st.dataframe(df, use_container_width=True, height=400)
+    if not df.empty:
+        # La tabla completa va a un CSV por bloques; en pantalla sigue sólo la página visible
+        export_csv(db, "applications", applications_query, version=applications_version, label="applications")
 
     st.markdown("### ➕ Agregar o Editar Application")
 
-    # === Seleccionar registro existente (opcional) ===
+    # === Seleccionar registro existente (opcional, de la página visible) ===
     existing_jobs = df['job'].tolist() if not df.empty else []
     selected_existing_job = st.selectbox("Selecciona una aplicación existente (opcional para editar):", [""] + existing_jobs)
 
 
+    # Las sugerencias rankeadas son para la aplicación en la que se pidieron: al cambiar de fila se descartan
+    if st.session_state.get("ranked_for") != selected_existing_job:
+        st.session_state.pop("ranked_blocks", None)
+        st.session_state["ranked_for"] = selected_existing_job
+
     # Prellenar si se seleccionó uno existente
     if selected_existing_job:
         selected_row = df[df['job'] == selected_existing_job].iloc[0]
         default_values = selected_row.to_dict()
     else:
         default_values = {}
+
+    # Los idiomas se agregan en la tabla languages, no en código
+    # Las opciones de los selectbox y su índice se arman una vez por versión de la tabla (snapshot)
+    try:
+        lang_choices = snapshot(db, "lang_options", ("languages",), lambda: OPTION_LIST(
+            read_sql("languages", "SELECT lang FROM languages ORDER BY lang;")["lang"].tolist()))
+    except Exception:
+        lang_choices = DEFAULT_LANG_OPTIONS
+    if not lang_choices.options:
+        lang_choices = DEFAULT_LANG_OPTIONS
+    lang_options = lang_choices.options
+
+    # === 🎯 Sugerencias: bloques guardados que mejor coinciden con un posting (BM25) ===
+    with st.expander("🎯 Sugerir contenido a partir de un posting"):
+        try:
+            postings_df = read_snapshot(
+                "job_tracker",
+                '''
+                SELECT j.position, j.company, j.posting_url
+                FROM job_tracker j
+                JOIN posting_snapshots s
+                  ON s.url_hash = encode(sha256(convert_to(j.posting_url, 'UTF8')), 'hex')
+                ORDER BY j.application_id DESC;
+                ''',
+                tables=("job_tracker", "posting_snapshots"),
+            )
+        except Exception:
+            postings_df = pd.DataFrame(columns=["position", "company", "posting_url"])
+        posting_urls = {f"{row.position} — {row.company}": row.posting_url for row in postings_df.itertuples()}
+        posting_choice = st.selectbox("Posting descargado (Job tracker)", [""] + list(posting_urls))
+        pasted_posting = st.text_area("…o pega el texto del posting", height=150)
+        rank_lang = st.selectbox("Idioma de los bloques", options=lang_options, key="rank_lang")
+        if st.button("🎯 Rankear bloques"):
+            posting_text = pasted_posting.strip()
+            if not posting_text and posting_choice:
+                posting_text = html_to_text(read_posting(db, posting_urls[posting_choice]))
+            if posting_text:
+                st.session_state["ranked_blocks"] = RELEVANCE_RANKER.rank(
+                    db, posting_text, rank_lang, table_versions(db, ("applications",))
+                )
+            else:
+                st.warning("⚠️ Elige un posting descargado o pega su texto.")
+        ranked_blocks = st.session_state.get("ranked_blocks")
+        use_ranked = False
+        if ranked_blocks:
+            st.dataframe(pd.DataFrame([
+                {"tipo": kind, "puntaje": round(score, 2), "texto": text}
+                for kind, items in ranked_blocks.items() for score, text in items
+            ]), use_container_width=True)
+            use_ranked = st.checkbox("Prellenar el formulario con estas sugerencias", value=False,
+                                     help="Reemplaza education, experience y skills del formulario.")
+    if use_ranked:
+        default_values = {**default_values, **RELEVANCE_RANKER.form_values(ranked_blocks)}
+
     # === Botón actualizar CV's (movido fuera del formulario) ===
-    from Library.CV_generation import CV_GENERATION
-    function_app = CV_GENERATION(working_folder, data_access)
+    function_app = cached_cv_generation(working_folder, data_access, tenant)
     if st.button("Actualizar CV Files"):
-        function_app.get_cv_files()
+        sync_summary = function_app.get_cv_files()
+        if sync_summary:
+            st.success(f"✅ Templates sincronizados: {sync_summary}")
     if st.button("Abre carpeta de CVs"):
-        templates_path = os.path.join(working_folder, "CV Templates")
-        function_app.open_folder(templates_path)
+        function_app.open_folder(function_app.templates_path)
 
 
+    # === 🔎 Búsqueda de company (fuera del formulario para que responda al teclear) ===
+    # Al navegador sólo llegan las coincidencias; el mapa name→type completo vive en el servidor
+    try:
+        company_lookup = COMPANY_LOOKUP.load(db, table_versions(db, ("companies",)))
+    except Exception:
+        company_lookup = COMPANY_LOOKUP([])
+    company_query = st.text_input("🔎 Buscar company", help="Búsqueda aproximada por nombre (pg_trgm).")
+    try:
+        company_choices = snapshot(db, ("company_search", company_query), ("companies",), lambda: OPTION_LIST(
+            name for name, _ in search_companies(db, company_query)))
+    except Exception:
+        company_choices = OPTION_LIST([])
+    default_company = default_values.get("company_name")
+    company_names, company_index = company_choices.options, company_choices.index(default_company)
+    if default_company in company_lookup.type_of and default_company not in company_choices.index_of:
+        # La company de la aplicación siempre se ofrece, aunque no coincida con la búsqueda
+        company_names, company_index = [default_company, *company_names], 0
+
     # === Formulario ===
     with st.form("application_form", clear_on_submit=False):
         st.subheader("🧠 Información General")
@@ -270,32 +380,19 @@ elif vista == "Applications":
         st.markdown("#### 🌍 Language & Status")
         col7, col8 = st.columns(2)
         with col7:
-            lang_options = ["English", "Spanish", "French"]
-            new_lang = st.selectbox("Language", options=lang_options, index=lang_options.index(default_values.get("lang", "English")) if default_values.get("lang") in lang_options else 0)
+            new_lang = st.selectbox("Language", options=lang_options, index=lang_choices.index(default_values.get("lang")))
         with col8:
-            status_options = ["applied", "interviewing", "offered", "rejected"]
-            selected_status = st.selectbox("Status", options=status_options, index=status_options.index(default_values.get("status", "applied")) if default_values.get("status") in status_options else 0)
+            selected_status = st.selectbox("Status", options=STATUS_OPTIONS.options, index=STATUS_OPTIONS.index(default_values.get("status")))
 
         # === Empresa y Tipo ===
         st.markdown("#### 🏢 Company Information")
-        try:
-            companies_df = pd.read_sql(
-                f'SELECT company_name, company_type FROM "{schema}".companies ORDER BY company_name;',
-                conn
-            )
-            company_options = companies_df.to_dict('records')
-        except Exception:
-            company_options = []
-        
-        
-        if company_options:
-            company_names = [c['company_name'] for c in company_options]
-            selected_company_name = st.selectbox("Company Name", options=company_names, index=company_names.index(default_values.get("company_name", company_names[0])) if default_values.get("company_name") in company_names else 0)
-            selected_company_type = next(
-                (c['company_type'] for c in company_options if c['company_name'] == selected_company_name),
-                default_values.get("company_type", None)
-            )
+        if company_names:
+            selected_company_name = st.selectbox("Company Name", options=company_names, index=company_index)
+            selected_company_type = company_lookup.type_of.get(selected_company_name, default_values.get("company_type"))
             st.info(f"**Company Type:** {selected_company_type}")
+        elif company_lookup.names:
+            st.warning(f"⚠️ Ninguna company coincide con '{company_query}'. Ajusta la búsqueda.")
+            selected_company_name, selected_company_type = None, None
         else:
             selected_company_name = st.text_input("Company Name (if none available)", value=default_values.get("company_name", ""))
             selected_company_type = st.text_input("Company Type", value=default_values.get("company_type", ""))
@@ -303,15 +400,12 @@ elif vista == "Applications":
         st.markdown("#### 🏢 CV File")
         # Load cv_files options based on selected lang (note: this uses the default lang for options; for dynamic update, consider moving outside form or using session state)
         try:
-            cv_files_df = pd.read_sql(
-                f'SELECT cv_file FROM "{schema}".cv_files WHERE lang = %s ORDER BY cv_file;',
-                conn,
-                params=(new_lang,)
-            )
-            cv_file_options = cv_files_df['cv_file'].tolist()
+            cv_file_choices = snapshot(db, ("cv_file_options", new_lang), ("cv_files",), lambda: OPTION_LIST([""] + read_sql(
+                "cv_files", 'SELECT cv_file FROM cv_files WHERE lang = %s ORDER BY cv_file;', params=(new_lang,)
+            )['cv_file'].tolist()))
         except Exception:
-            cv_file_options = []
-        selected_cv_file = st.selectbox("CV File", options=[""] + cv_file_options, index=0 if not default_values.get("cv_files") or default_values.get("cv_files") not in cv_file_options else cv_file_options.index(default_values.get("cv_files")) + 1)
+            cv_file_choices = OPTION_LIST([""])
+        selected_cv_file = st.selectbox("CV File", options=cv_file_choices.options, index=cv_file_choices.index(default_values.get("cv_files") or ""))
         
         # === Botón de envío ===
         submitted = st.form_submit_button("💾 Guardar Application")
@@ -319,11 +413,11 @@ elif vista == "Applications":
         if submitted:
             if new_job and selected_company_name and selected_company_type and selected_status:
                 try:
-                    with conn.cursor() as cur:
+                    with db.cursor() as cur:
                         # Intentar actualizar primero
                         cur.execute(
-                            f'''
-                            UPDATE "{schema}".applications
+                            '''
+                            UPDATE applications
                             SET education1 = %s, education2 = %s, education3 = %s,
                                 experience1 = %s, experience2 = %s, experience3 = %s,
                                 skills = %s, interests = %s, lang = %s, status = %s,
@@ -342,8 +436,8 @@ elif vista == "Applications":
                         if cur.rowcount == 0:
                             # Si no existe, insertar
                             cur.execute(
-                                f'''
-                                INSERT INTO "{schema}".applications 
+                                '''
+                                INSERT INTO applications 
                                 (job, education1, education2, education3,
                                 experience1, experience2, experience3,
                                 skills, interests, lang, status,
@@ -359,7 +453,7 @@ elif vista == "Applications":
                                     selected_company_name, selected_company_type, selected_cv_file or None
                                 )
                             )
-                        conn.commit()
+                    invalidate_windows()
                     st.success("✅ Application guardada o actualizada correctamente.")
                 except Exception as e:
                     st.error(f"❌ Error al guardar la Application: {e}")
@@ -372,9 +466,9 @@ elif vista == "Cover Letters":
 
     # === Cargar combinaciones válidas desde applications ===
     try:
-        apps_df = pd.read_sql(
-            f'SELECT job, lang, company_name FROM "{schema}".applications ORDER BY job;',
-            conn
+        apps_df = read_snapshot(
+            "applications",
+            'SELECT job, lang, company_name FROM applications ORDER BY job;',
         )
     except Exception:
         apps_df = pd.DataFrame()
@@ -394,12 +488,12 @@ elif vista == "Cover Letters":
 
     # === Buscar si ya existe una carta para esa combinación ===
     try:
-        query = f'''
+        query = '''
             SELECT header, address, date, body, "end", sign
-            FROM "{schema}".cover_letters
+            FROM cover_letters
             WHERE job = %s AND lang = %s AND company_name = %s;
         '''
-        cover_df = pd.read_sql(query, conn, params=(job_selected, lang_selected, company_selected))
+        cover_df = read_snapshot("cover_letters", query, params=(job_selected, lang_selected, company_selected))
     except Exception:
         cover_df = pd.DataFrame()
 
@@ -426,21 +520,10 @@ elif vista == "Cover Letters":
 
         if submitted:
             try:
-                with conn.cursor() as cur:
-                    # 1️⃣ Intentar insertar si no existe
-                    cur.execute(f'''
-                        INSERT INTO "{schema}".cover_letters
-                        (job, lang, company_name, header, address, date, body, "end", sign)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        ON CONFLICT DO NOTHING;
-                    ''', (
-                        job_selected, lang_selected, company_selected,
-                        header, address, date_str if date_str else None, body, end_text, sign
-                    ))
-
-                    # 2️⃣ Actualizar siempre (si ya existía, se actualiza)
-                    cur.execute(f'''
-                        UPDATE "{schema}".cover_letters
+                with db.cursor() as cur:
+                    # 1️⃣ Actualizar si ya existe
+                    cur.execute('''
+                        UPDATE cover_letters
                         SET header = %s, address = %s, date = %s, body = %s, "end" = %s, sign = %s
                         WHERE job = %s AND lang = %s AND company_name = %s;
                     ''', (
@@ -448,7 +531,16 @@ elif vista == "Cover Letters":
                         job_selected, lang_selected, company_selected
                     ))
 
-                    conn.commit()
+                    # 2️⃣ Si no existía, insertar (sin ON CONFLICT: cover_letters puede ser una vista)
+                    if cur.rowcount == 0:
+                        cur.execute('''
+                            INSERT INTO cover_letters
+                            (job, lang, company_name, header, address, date, body, "end", sign)
+                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s);
+                        ''', (
+                            job_selected, lang_selected, company_selected,
+                            header, address, date_str if date_str else None, body, end_text, sign
+                        ))
 
                 st.success("✅ Carta guardada correctamente.")
 
@@ -457,26 +549,53 @@ elif vista == "Cover Letters":
 elif vista == "Job tracker":
     st.title("📌 Job tracker")
 
-    # === Cargar tabla job_tracker ===
+    # === ⏰ Vencimientos: hoy (y atrasados) y próximos días, por los índices parciales ===
+    today = date.today()
     try:
-        jt_df = pd.read_sql(
-            f'''
-            SELECT
-                application_id,
-                company,
-                contact_person,
-                reach_out_day,
-                stage,
-                "type",
-                position,
-                posting_url,
-                message,
-                next_stage_deadline
-            FROM "{schema}".job_tracker
-            ORDER BY company, position;
-            ''',
-            conn
+        upcoming = snapshot(
+            db, ("due_items", today), ("job_tracker",),
+            lambda: due_items(db, today - timedelta(days=LOOKBACK_DAYS), today + timedelta(days=HORIZON_DAYS)),
         )
+    except Exception:
+        upcoming = []
+    due_now = [item for item in upcoming if item["due"] <= today]
+    with st.expander(
+        f"⏰ Para hoy: {len(due_now)} · próximos {HORIZON_DAYS} días: {len(upcoming) - len(due_now)}",
+        expanded=bool(due_now),
+    ):
+        if upcoming:
+            st.dataframe(pd.DataFrame([
+                {
+                    "cuándo": "hoy" if item["due"] == today else ("atrasado" if item["due"] < today else str(item["due"])),
+                    "company": item["company"],
+                    "position": item["position"],
+                    "qué": KIND_LABELS.get(item["kind"], item["kind"]),
+                }
+                for item in upcoming
+            ]), use_container_width=True)
+        else:
+            st.caption("Sin vencimientos próximos.")
+
+    # === Cargar la página visible de job_tracker (cursor server-side + prefetch) ===
+    jt_query = '''
+        SELECT
+            application_id,
+            company,
+            contact_person,
+            reach_out_day,
+            stage,
+            "type",
+            position,
+            posting_url,
+            message,
+            next_stage_deadline
+        FROM job_tracker
+        ORDER BY company, position, application_id;
+    '''
+    try:
+        jt_version = table_versions(db, ("job_tracker",))
+        with span("page.query", view=vista, table="job_tracker"):
+            jt_df, _ = windowed_frame(db, "job_tracker", jt_query, version=jt_version, label="job_tracker")
     except Exception as e:
         st.error(f"❌ Error al cargar job_tracker: {e}")
         st.stop()
@@ -484,108 +603,151 @@ elif vista == "Job tracker":
     if jt_df.empty:
         st.warning("⚠️ No hay registros en job_tracker. Crea aplicaciones primero.")
         st.stop()
+    export_csv(db, "job_tracker", jt_query, version=jt_version, label="job_tracker")
+
+    # === 🔁 Postings casi duplicados (MinHash/LSH, se marcan al descargar los postings) ===
+    try:
+        duplicates_df = read_snapshot(
+            "posting_minhash",
+            '''
+            SELECT s.posting_url, o.posting_url AS original_url
+            FROM posting_minhash m
+            JOIN posting_snapshots s ON s.url_hash = m.url_hash
+            JOIN posting_snapshots o ON o.url_hash = m.duplicate_of;
+            ''',
+            tables=("posting_minhash", "posting_snapshots"),
+        )
+        duplicate_of = dict(zip(duplicates_df["posting_url"], duplicates_df["original_url"]))
+    except Exception:
+        duplicate_of = {}
+    jt_df = jt_df.assign(duplicate_of=jt_df["posting_url"].map(duplicate_of))
+    if jt_df["duplicate_of"].notna().any():
+        st.warning(f"🔁 {int(jt_df['duplicate_of'].notna().sum())} posting(s) de esta página parecen repetidos; revisa la columna duplicate_of.")
 
-    # === Mostrar tabla sólo con las columnas pedidas ===
+    # === ✏️ Tabla editable: se guardan sólo las celdas que cambiaron, en un solo UPDATE ===
     st.subheader("📋 Registros actuales")
+    st.caption("Edita las celdas que quieras y guarda todo junto; sólo se escriben las celdas que cambiaron.")
+    jt_df = jt_df.assign(**{column: pd.to_datetime(jt_df[column], errors="coerce") for column in JT_DATE_COLUMNS})
+    with st.form("job_tracker_grid_form"):
+        edited_df = st.data_editor(
+            jt_df,
+            key=f"job_tracker_grid_{jt_version}",
+            column_order=JT_GRID_COLUMNS,
+            disabled=["company", "position", "duplicate_of"],
+            column_config={
+                "reach_out_day": st.column_config.DateColumn("reach_out_day", format="YYYY-MM-DD"),
+                "next_stage_deadline": st.column_config.DateColumn("next_stage_deadline", format="YYYY-MM-DD"),
+                "posting_url": st.column_config.LinkColumn("posting_url"),
+                "duplicate_of": st.column_config.LinkColumn("duplicate_of"),
+            },
+            use_container_width=True,
+            hide_index=True,
+        )
+        submitted_jt = st.form_submit_button("💾 Guardar cambios")
+
+    if submitted_jt:
+        changes = changed_cells(jt_df, edited_df, "application_id", JT_EDITABLE_COLUMNS)
+        if not changes:
+            st.info("ℹ️ No hay cambios para guardar.")
+        else:
+            try:
+                updated = db.update_rows(
+                    "job_tracker", "application_id", changes, types={column: "date" for column in JT_DATE_COLUMNS}
+                )
+                invalidate_windows()
+                st.success(f"✅ {updated} registro(s) actualizados ({sum(map(len, changes.values()))} celdas).")
+            except Exception as e:
+                st.error(f"❌ Error al actualizar los registros: {e}")
+
+elif vista == "History":
+    st.title("🕘 Historial de versiones")
+    from Library.history import HISTORY_TABLES, ROW_HISTORY
+    history = ROW_HISTORY(db)
+
+    history_table = st.selectbox("Tabla", options=list(HISTORY_TABLES))
+    try:
+        with span("page.query", view=vista, table="row_history"):
+            history_rows = history.rows(history_table)
+    except Exception as e:
+        st.error(f"❌ Error al cargar el historial (¿inicializaste el schema con los triggers?): {e}")
+        st.stop()
+
+    if not history_rows:
+        st.info("Aún no hay cambios registrados para esta tabla.")
+        st.stop()
+
+    row_labels = {
+        row_id: f"{label} ({changes} cambios{', borrada' if deleted else ''})"
+        for row_id, label, changes, deleted in history_rows
+    }
+    selected_row_id = st.selectbox(
+        "Registro",
+        options=list(row_labels),
+        format_func=lambda row_id: row_labels[row_id],
+    )
+
+    versions = history.versions(history_table, selected_row_id)
     st.dataframe(
-        jt_df[
+        pd.DataFrame(
             [
-                "company",
-                "contact_person",
-                "reach_out_day",
-                "stage",
-                "type",
-                "position",
-                "posting_url",
-                "message",
-                "next_stage_deadline",
+                {
+                    "version": v["history_id"],
+                    "fecha": v["changed_at"],
+                    "operación": v["op"],
+                    "columnas": ", ".join(v["columns"]),
+                }
+                for v in versions
             ]
-        ],
+        ),
         use_container_width=True,
+        hide_index=True,
     )
 
-    st.markdown("---")
-    st.markdown("### ✏️ Editar un registro")
-
-    # === Selector company – position ===
-    labels = [
-        f"{row.company} — {row.position}"
-        for _, row in jt_df.iterrows()
-    ]
-    indices = list(range(len(labels)))
-
-    selected_index = st.selectbox(
-        "Selecciona la company–position a editar:",
-        indices,
-        format_func=lambda i: labels[i],
+    restorable = [v for v in versions if v["state"] is not None]
+    if not restorable:
+        st.warning("⚠️ No hay versiones con contenido para mostrar.")
+        st.stop()
+    selected_version = st.selectbox(
+        "Ver versión",
+        options=restorable,
+        format_func=lambda v: f"{v['history_id']} — {v['changed_at']:%Y-%m-%d %H:%M} — {v['op']}",
     )
 
-    selected_row = jt_df.iloc[selected_index]
-
-    # Campos de sólo lectura
-    st.text_input("Company", value=selected_row["company"], disabled=True)
-    st.text_input("Position", value=selected_row["position"], disabled=True)
-
-    # Valores actuales (manejar NULL/NaN/NaT)
-    def safe_str(value):
-        return str(value) if pd.notna(value) else ""
-
-    contact_person_val = safe_str(selected_row["contact_person"])
-    reach_out_day_val = safe_str(selected_row["reach_out_day"])
-    stage_val = safe_str(selected_row["stage"])
-    type_val = safe_str(selected_row["type"])
-    posting_url_val = safe_str(selected_row["posting_url"])
-    message_val = safe_str(selected_row["message"])
-    next_deadline_val = safe_str(selected_row["next_stage_deadline"])
-
-    # === Formulario de edición ===
-    with st.form("job_tracker_edit_form"):
-        contact_person = st.text_input("Contact person", value=contact_person_val)
-        reach_out_day_str = st.text_input(
-            "Reach out day (YYYY-MM-DD)",
-            value=reach_out_day_val,
-        )
-        stage = st.text_input("Stage", value=stage_val)
-        type_field = st.text_input("Type", value=type_val)
-        posting_url = st.text_input("Posting URL", value=posting_url_val)
-        message = st.text_area("Message", value=message_val, height=150)
-        next_stage_deadline_str = st.text_input(
-            "Next stage deadline (YYYY-MM-DD)",
-            value=next_deadline_val,
-        )
-
-        submitted_jt = st.form_submit_button("💾 Guardar cambios")
-
-    if submitted_jt:
+    current_state = versions[0]["state"] or {}
+    col_version, col_current = st.columns(2)
+    with col_version:
+        st.markdown("#### Versión seleccionada")
+        st.json(selected_version["state"])
+    with col_current:
+        st.markdown("#### Actual")
+        st.json(current_state)
+
+    if selected_version is versions[0]:
+        st.caption("Es la versión actual.")
+    elif st.button("♻️ Restaurar esta versión"):
         try:
-            with conn.cursor() as cur:
-                cur.execute(
-                    f'''
-                    UPDATE "{schema}".job_tracker
-                    SET
-                        contact_person      = %s,
-                        reach_out_day       = %s,
-                        stage               = %s,
-                        "type"              = %s,
-                        posting_url         = %s,
-                        message             = %s,
-                        next_stage_deadline = %s
-                    WHERE application_id = %s;
-                    ''',
-                    (
-                        contact_person or None,
-                        reach_out_day_str or None,
-                        stage or None,
-                        type_field or None,
-                        posting_url or None,
-                        message or None,
-                        next_stage_deadline_str or None,
-                        int(selected_row["application_id"]),
-                    ),
-                )
-                conn.commit()
-
-            st.success("✅ Registro actualizado correctamente.")
-
+            history.restore(history_table, selected_row_id, selected_version["history_id"])
+            st.success("✅ Versión restaurada. La restauración también queda en el historial.")
         except Exception as e:
-            st.error(f"❌ Error al actualizar el registro: {e}")
+            st.error(f"❌ Error al restaurar: {e}")
+
+# === ⏱️ Desglose de tiempos de este rerun ===
+if show_timings:
+    records = tracer.run_records()
+    with st.sidebar.expander("⏱️ Tiempos de este rerun", expanded=True):
+        if records:
+            timings_df = pd.DataFrame(
+                [
+                    {
+                        "span": ("  " * r["depth"]) + r["name"],
+                        "detalle": r["attrs"].get("table") or r["attrs"].get("template") or "",
+                        "ms": r["duration_ms"],
+                    }
+                    for r in records
+                ]
+            )
+            st.dataframe(timings_df, use_container_width=True, hide_index=True)
+            st.caption(f"Total consultas: {sum(r['duration_ms'] for r in records if r['depth'] == 0):.1f} ms")
+        else:
+            st.caption("Sin consultas registradas en este rerun.")
+    tracer.stop_run()
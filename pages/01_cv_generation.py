@@ -1,10 +1,19 @@
 import os
+import shutil
 import streamlit as st
-import yaml
-from dotenv import load_dotenv
 import platform
 import subprocess
-from pathlib import Path
+import tempfile
+from urllib.parse import urlencode
+from Library.render_service import DOCUMENTS, RENDER_SERVICE, parse_bundle_request
+from Library.settings import bootstrap
+from Library.streamlit_session import cached_cv_generation, db_session, select_tenant, session_db, snapshot
+from Library.zip_stream import iter_zip
+
+# URL del servicio de render (python -m Library.render_service) para descargar el zip en streaming
+RENDER_URL_ENV = "CAREER_RENDER_URL"
+# {"payload": selección con la que se armó, "path": zip temporal en disco}
+BUNDLE_STATE_KEY = "bundle_zip"
 
 
 def open_folder(path):
@@ -12,68 +21,32 @@ def open_folder(path):
         os.startfile(path)
     elif platform.system() == "Darwin":  # macOS
         subprocess.run(['open', path])
+    elif shutil.which("xdg-open") and (os.getenv("DISPLAY") or os.getenv("WAYLAND_DISPLAY")):
+        subprocess.run(['xdg-open', str(path)])
     else:
-        st.error("Unsupported OS for opening folder.")
-# Ruta base del proyecto (carpeta raíz del repo)
-# Ruta base del proyecto (carpeta raíz del repo)
-BASE_PATH = Path(__file__).resolve().parent.parent
-env_file = BASE_PATH / ".env"
-
-folder_name = "MAIN_PATH"
-db_key = "DB_URL"
-
-working_folder = None
-db_url = None
-
-if env_file.exists():
-    # ===== MODO LOCAL (.env) =====
-    load_dotenv(dotenv_path=env_file)
-
-    main_path_str = os.getenv(folder_name)
-    db_url = os.getenv(db_key)
-
-    if not main_path_str:
-        st.error("❌ MAIN_PATH no está definido en el archivo .env.")
-        st.stop()
-
-    working_folder = Path(main_path_str)
-    working_folder.mkdir(parents=True, exist_ok=True)
-
-    if not db_url:
-        st.error("❌ DB_URL no está definido en el archivo .env.")
-        st.stop()
-
-else:
-    # ===== MODO CLOUD / SIN .env (Render) =====
-    main_path_str = os.getenv(folder_name)
+        # Servidor sin escritorio: la carpeta no se puede abrir, se descarga como zip abajo
+        st.info(f"📂 Los documentos están en: {path}")
 
-    # Si no está definida MAIN_PATH en el entorno, usamos un default
-    if not main_path_str:
-        main_path_str = str(BASE_PATH / "temp_files")
-        os.environ[folder_name] = main_path_str  # la inyectamos por si otro código la usa
 
-    working_folder = Path(main_path_str)
-    working_folder.mkdir(parents=True, exist_ok=True)
+def drop_bundle():
+    """Borra el zip preparado (cambió la selección o se va a armar otro)."""
+    bundle = st.session_state.pop(BUNDLE_STATE_KEY, None)
+    if bundle and os.path.exists(bundle["path"]):
+        os.remove(bundle["path"])
 
-    db_url = os.getenv(db_key)
-    if not db_url:
-        st.error("❌ La variable de entorno DB_URL no está configurada.")
-        st.stop()
 
-# Rutas usadas en tu lógica
-output_path = working_folder / "Output CVs"
-output_path.mkdir(parents=True, exist_ok=True)
+# Settings compartidos por proceso (Library/settings.py): el YAML y el .env
+# sólo se vuelven a leer si cambia su mtime, no en cada rerun.
+try:
+    settings = bootstrap()
+except ValueError as e:
+    st.error(str(e))
+    st.stop()
 
-
-templates_path = working_folder / "CV Templates"
-templates_path.mkdir(parents=True, exist_ok=True)
-
-# Cargar configuración YAML
-yaml_path = BASE_PATH / "config" / "config.yml"
-
-with open(yaml_path, "r") as file:
-    data_access = yaml.safe_load(file) or {}
-data_access['DB_URL'] = db_url
+working_folder = settings.working_folder
+output_path = settings.output_path
+templates_path = settings.templates_path
+data_access = settings.data_access
 
 
 st.set_page_config(page_title="Resumen aplicaciones", layout="wide")
@@ -87,17 +60,85 @@ st.page_link(
 )
 st.write("---")
 
+tenant = select_tenant(settings)
+letter_date = st.date_input("Fecha de la carta")
+
 
 if st.button("Generar el esquema SQL"):
     st.write("Iniciando el generador de esquema SQL...")
     from Library.SQL_management import CSV_TO_SQL
-    CSV_TO_SQL(working_folder, data_access).csv_to_sql_process()
+    CSV_TO_SQL(working_folder, data_access, tenant, session=db_session()).csv_to_sql_process()
 
 if st.button("Generar CVs desde PostgreSQL"):
-    from Library.CV_generation import CV_GENERATION
-    CV_GENERATION(working_folder, data_access).postgre_to_docx()
-
-
+    cached_cv_generation(working_folder, data_access, tenant).postgre_to_docx(letter_date)
+
+
+
+st.markdown("### 🌍 Generar todos los idiomas de un job")
+db = session_db(data_access, tenant)
+try:
+    job_options = snapshot(db, "distinct_jobs", ("applications",), lambda: db.read_frame(
+        "SELECT DISTINCT job FROM applications ORDER BY job;", label="applications")["job"].tolist())
+except Exception:
+    job_options = []
+selected_job = st.selectbox("Job", options=job_options)
+if st.button("Generar bundle multi-idioma") and selected_job:
+    bundle_path = cached_cv_generation(working_folder, data_access, tenant).render_all_languages(
+        selected_job, input_date=letter_date
+    )
+    if bundle_path:
+        st.success(f"✅ Bundle generado en: {bundle_path}")
+    else:
+        st.error("❌ No se pudo generar el bundle.")
+
+st.markdown("### 📦 Descargar documentos en un zip")
+try:
+    application_rows = snapshot(db, "application_labels", ("applications",), lambda: db.read_frame(
+        "SELECT application_id, job, lang FROM applications ORDER BY application_id;",
+        label="applications").values.tolist())
+except Exception:
+    application_rows = []
+application_labels = {int(row[0]): f"{row[0]} · {row[1]} ({row[2]})" for row in application_rows}
+selected_ids = st.multiselect("Aplicaciones", options=list(application_labels), format_func=application_labels.get)
+selected_documents = st.multiselect("Documentos", options=list(DOCUMENTS), default=list(DOCUMENTS))
+bundle_source = st.radio("Origen", options=["disk", "render"], horizontal=True,
+                         format_func={"disk": "Bundles de Output CVs (o render si falta)", "render": "Render nuevo"}.get)
+
+bundle_payload = None
+if selected_ids and selected_documents:
+    bundle_payload = {"application_ids": selected_ids, "documents": selected_documents,
+                      "source": bundle_source, "tenant": tenant, "date": letter_date.isoformat()}
+if st.session_state.get(BUNDLE_STATE_KEY) and st.session_state[BUNDLE_STATE_KEY]["payload"] != bundle_payload:
+    drop_bundle()
+
+if bundle_payload:
+    render_url = os.getenv(RENDER_URL_ENV)
+    if render_url:
+        # El servicio arma el zip por trozos mientras el navegador lo descarga
+        query = urlencode({"ids": ",".join(map(str, selected_ids)), "documents": ",".join(selected_documents),
+                           "source": bundle_source, "tenant": tenant or "", "date": letter_date.isoformat()})
+        st.link_button("⬇️ Descargar zip", f"{render_url.rstrip('/')}/bundle?{query}")
+    else:
+        if st.button("Preparar zip"):
+            drop_bundle()
+            # El zip se escribe a disco por trozos: en memoria sólo queda el documento en curso
+            service = RENDER_SERVICE(settings, workers=1)
+            fd, path = tempfile.mkstemp(prefix="career_bundle_", suffix=".zip")
+            try:
+                with st.spinner("Generando zip..."), os.fdopen(fd, "wb") as f:
+                    for chunk in iter_zip(service.bundle_entries(parse_bundle_request(bundle_payload))):
+                        f.write(chunk)
+            except Exception as e:
+                os.remove(path)
+                st.error(f"❌ No se pudo generar el zip: {e}")
+            else:
+                st.session_state[BUNDLE_STATE_KEY] = {"payload": bundle_payload, "path": path}
+        bundle = st.session_state.get(BUNDLE_STATE_KEY)
+        if bundle and os.path.exists(bundle["path"]):
+            # download_button lee el archivo en cada rerun; para zips grandes usar CAREER_RENDER_URL
+            with open(bundle["path"], "rb") as f:
+                st.download_button("⬇️ Descargar zip", f, file_name="career_bundle.zip", mime="application/zip")
 
+st.write("---")
 if st.button("Abrir folder de CVs y cartas"):
-    open_folder(output_path)
+    open_folder(output_path / tenant if tenant else output_path)
@@ -0,0 +1,94 @@
+import threading
+import urllib.request
+
+import pytest
+
+from Library import chrome_helper
+from Library.chrome_helper import CHROME_DRIVER_POOL
+
+
+class FAKE_DRIVER:
+    """Sustituto de webdriver: descarga la página con urllib en lugar de Chrome."""
+    launched = 0
+
+    def __init__(self):
+        FAKE_DRIVER.launched += 1
+        self.alive = True
+        self.page_source = ""
+
+    def get(self, url):
+        with urllib.request.urlopen(url, timeout=5) as response:
+            self.page_source = response.read().decode("utf-8")
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("session deleted")
+        return 1
+
+    def quit(self):
+        self.alive = False
+
+
+@pytest.fixture
+def launches(monkeypatch):
+    """Controla chrome_driver_load: cada elemento de la lista es un driver o None (falla)."""
+    FAKE_DRIVER.launched = 0
+    plan = []
+
+    def load(directory, headless=True):
+        return plan.pop(0) if plan else FAKE_DRIVER()
+
+    monkeypatch.setattr(chrome_helper.CHROME_HELPER, "chrome_driver_load", staticmethod(load))
+    return plan
+
+
+def test_fetch_renders_from_local_server(fixture_server, launches):
+    fixture_server.routes["/job"] = (200, {"Content-Type": "text/html"}, "<h1>Data Lead</h1>")
+    pool = CHROME_DRIVER_POOL(size=2, max_pages=100)
+    assert "Data Lead" in pool.fetch(fixture_server.url("/job"))
+    assert pool._created == 1
+
+
+def test_concurrent_fetches_never_exceed_size(fixture_server, launches):
+    fixture_server.routes["/slow"] = (200, {}, "ok")
+    fixture_server.delay["/slow"] = 0.05
+    pool = CHROME_DRIVER_POOL(size=2, max_pages=100)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.fetch(fixture_server.url("/slow"), timeout=10)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["ok"] * 8
+    assert FAKE_DRIVER.launched == 2
+    assert pool._created == 2
+
+
+def test_failed_recycle_keeps_result_and_frees_slot(fixture_server, launches):
+    fixture_server.routes["/a"] = (200, {}, "page a")
+    pool = CHROME_DRIVER_POOL(size=1, max_pages=1)
+    launches.extend([FAKE_DRIVER(), None])  # la primera sesión arranca; el reciclado falla
+    assert pool.fetch(fixture_server.url("/a")) == "page a"
+    assert pool._created == 0
+    # El lugar liberado se vuelve a ocupar en el siguiente préstamo
+    assert pool.fetch(fixture_server.url("/a")) == "page a"
+
+
+def test_failed_recycle_does_not_mask_caller_error(launches):
+    pool = CHROME_DRIVER_POOL(size=1, max_pages=1)
+    launches.extend([FAKE_DRIVER(), None])
+    with pytest.raises(ValueError):
+        with pool.lease():
+            raise ValueError("caller")
+    assert pool._created == 0
+
+
+def test_unhealthy_session_is_replaced_within_size(fixture_server, launches):
+    fixture_server.routes["/b"] = (200, {}, "page b")
+    pool = CHROME_DRIVER_POOL(size=1, max_pages=100)
+    assert pool.fetch(fixture_server.url("/b")) == "page b"
+    pool._idle.queue[0].driver.alive = False
+    assert pool.fetch(fixture_server.url("/b")) == "page b"
+    assert pool._created == 1
+    assert FAKE_DRIVER.launched == 2
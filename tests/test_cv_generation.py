@@ -0,0 +1,81 @@
+import os
+from contextlib import contextmanager
+
+import pytest
+from docx import Document
+
+from Library.CV_generation import CV_GENERATION
+
+
+class FAKE_DB:
+    """Sólo responde el conteo de companies por job que usa application_stem."""
+
+    def __init__(self, companies):
+        self.companies = companies
+
+    @contextmanager
+    def read_cursor(self):
+        db = self
+
+        class Cursor:
+            def execute(self, query, params=None):
+                self.row = (len(db.companies[params[0]]),)
+
+            def fetchone(self):
+                return self.row
+
+        yield Cursor()
+
+
+class FAKE_REGISTRY:
+    def __init__(self, path):
+        self.path = path
+
+    def open_template(self, template_file):
+        return self.path
+
+
+@pytest.fixture
+def generator(tmp_path):
+    template = tmp_path / "template.docx"
+    doc = Document()
+    doc.add_paragraph("{job} · {company_name} · {lang}")
+    doc.save(template)
+
+    applications = {
+        1: {"application_id": 1, "job": "Data Lead", "lang": "English", "company_name": "Acme"},
+        2: {"application_id": 2, "job": "Data Lead", "lang": "Spanish", "company_name": "Acme"},
+        3: {"application_id": 3, "job": "Data Lead", "lang": "English", "company_name": "Globex"},
+    }
+    generator = CV_GENERATION.__new__(CV_GENERATION)
+    generator.output_path = str(tmp_path / "Output CVs")
+    generator.templates_path = str(tmp_path / "CV Templates")
+    generator.db = FAKE_DB({"Data Lead": {"Acme"}})
+    generator.template_registry = FAKE_REGISTRY(str(template))
+    generator.fetch_application = lambda application_id, input_date=None: (dict(applications[application_id]), None)
+    generator.applications = applications
+    return generator
+
+
+def text_of(path):
+    return "\n".join(p.text for p in Document(path).paragraphs)
+
+
+def test_each_language_variant_gets_its_own_file(generator):
+    english, = generator.render_application(1, documents=("cv",))
+    spanish, = generator.render_application(2, documents=("cv",))
+    assert english != spanish
+    assert os.path.basename(english) == "Data Lead_English_JACJ_CV.docx"
+    assert text_of(english) == "Data Lead · Acme · English"
+    assert text_of(spanish) == "Data Lead · Acme · Spanish"
+    # Mismo lugar que render_all_languages: source=disk lo encuentra
+    assert generator.rendered_file(generator.applications[1]) == english
+
+
+def test_company_is_part_of_the_name_when_the_job_has_several(generator):
+    generator.db.companies["Data Lead"] = {"Acme", "Globex"}
+    acme, = generator.render_application(1, documents=("cv",))
+    globex, = generator.render_application(3, documents=("cv",))
+    assert os.path.basename(acme) == "Data Lead_Acme_English_JACJ_CV.docx"
+    assert os.path.basename(globex) == "Data Lead_Globex_English_JACJ_CV.docx"
+    assert text_of(acme) != text_of(globex)
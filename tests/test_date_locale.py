@@ -0,0 +1,42 @@
+import pandas as pd
+
+from Library.date_locale import DATE_LOCALE
+
+MONTHS = ["enero", "febrero", "marzo", "abril", "mayo", "junio", "julio",
+          "agosto", "septiembre", "octubre", "noviembre", "diciembre"]
+
+
+def test_format_series_formats_and_blanks_invalid_dates():
+    locale = DATE_LOCALE("es", date_pattern="{city}, {day} de {month} de {year}", city="Madrid", month_names=MONTHS)
+    result = locale.format_series(["2024-03-05", None, "not a date"])
+    assert result.tolist() == ["Madrid, 5 de Marzo de 2024", "", ""]
+
+
+def test_format_series_empty_input():
+    result = DATE_LOCALE("es", month_names=MONTHS).format_series([])
+    assert result.empty and result.dtype == object
+    result = DATE_LOCALE("es").format_series(pd.Series([], dtype="datetime64[ns]"))
+    assert result.empty and result.dtype == object
+
+
+ENGLISH_MONTHS = ["january", "february", "march", "april", "may", "june", "july",
+                  "august", "september", "october", "november", "december"]
+
+
+def test_english_ordinals_including_teens():
+    locale = DATE_LOCALE("English", date_pattern="{month} {day}{ordinal}, {year}",
+                         month_names=ENGLISH_MONTHS, ordinal_style="english")
+    days = [1, 2, 3, 4, 11, 12, 13, 21, 22, 23, 31]
+    result = locale.format_series([f"2025-01-{day:02d}" for day in days])
+    assert [text.split(",")[0] for text in result] == [
+        "January 1st", "January 2nd", "January 3rd", "January 4th", "January 11th", "January 12th",
+        "January 13th", "January 21st", "January 22nd", "January 23rd", "January 31st",
+    ]
+
+
+def test_french_first_of_month():
+    french_months = ["janvier", "février", "mars", "avril", "mai", "juin", "juillet",
+                     "août", "septembre", "octobre", "novembre", "décembre"]
+    locale = DATE_LOCALE("French", date_pattern="le {day}{ordinal} {month} {year}", month_names=french_months,
+                         ordinal_style="french", capitalize_month=False)
+    assert locale.format_series(["2025-05-01", "2025-05-02"]).tolist() == ["le 1er mai 2025", "le 2 mai 2025"]
@@ -0,0 +1,103 @@
+import io
+import os
+import struct
+import zipfile
+import zlib
+
+import pytest
+from docx import Document
+from docx.shared import Inches
+
+from Library.CV_generation import render_docx
+from Library.docx_package import SHARED_PARTS_ENV, TEMPLATE_PACKAGE
+
+
+def png(width=4, height=3):
+    def chunk(kind, data):
+        return struct.pack(">L", len(data)) + kind + data + struct.pack(">L", zlib.crc32(kind + data))
+    raw = b"".join(b"\x00" + b"\xff\x80\x00" * width for _ in range(height))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">2L5B", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b""))
+
+
+def make_template(path, heading="CV"):
+    doc = Document()
+    doc.add_heading(heading, level=1)
+    doc.add_paragraph("{job} en {company_name}")
+    doc.add_picture(io.BytesIO(png()), width=Inches(1))
+    doc.save(path)
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    TEMPLATE_PACKAGE._cache.clear()
+    yield
+    TEMPLATE_PACKAGE._cache.clear()
+
+
+def parts(path):
+    with zipfile.ZipFile(path) as archive:
+        assert archive.testzip() is None
+        return {name: archive.read(name) for name in archive.namelist()}
+
+
+def text_of(path):
+    return [p.text for p in Document(path).paragraphs]
+
+
+def test_shared_parts_render_twice_like_python_docx(tmp_path, monkeypatch):
+    template = make_template(tmp_path / "Curriculum_English.docx")
+    first, second = tmp_path / "a.docx", tmp_path / "b.docx"
+    render_docx(template, {"job": "Data Lead", "company_name": "Acme"}, str(first))
+    render_docx(template, {"job": "Analyst", "company_name": "Globex"}, str(second))
+    assert len(TEMPLATE_PACKAGE._cache) == 1
+
+    monkeypatch.setenv(SHARED_PARTS_ENV, "0")
+    reference = tmp_path / "reference.docx"
+    render_docx(template, {"job": "Analyst", "company_name": "Globex"}, str(reference))
+
+    assert "Data Lead en Acme" in text_of(first)
+    assert "Analyst en Globex" in text_of(second)
+    assert len(Document(str(second)).inline_shapes) == 1
+
+    # Mismas partes, byte por byte, que guardar con python-docx
+    shared, expected = parts(second), parts(reference)
+    assert any(name.startswith("word/media/") for name in expected)
+    assert shared == expected
+    # El primer render no quedó pegado en las partes compartidas
+    assert parts(first)["word/document.xml"] != shared["word/document.xml"]
+
+
+def test_template_changed_on_disk_is_reloaded(tmp_path):
+    template = make_template(tmp_path / "Curriculum_English.docx", heading="Old heading")
+    render_docx(template, {"job": "Data Lead", "company_name": "Acme"}, str(tmp_path / "old.docx"))
+
+    make_template(template, heading="New heading with more text")
+    stat = os.stat(template)
+    os.utime(template, (stat.st_atime, stat.st_mtime + 10))
+    render_docx(template, {"job": "Data Lead", "company_name": "Acme"}, str(tmp_path / "new.docx"))
+
+    assert text_of(tmp_path / "old.docx")[0] == "Old heading"
+    assert text_of(tmp_path / "new.docx")[0] == "New heading with more text"
+    assert len(TEMPLATE_PACKAGE._cache) == 2
+
+
+def test_unsupported_template_falls_back_to_python_docx(tmp_path):
+    template = make_template(tmp_path / "Curriculum_English.docx")
+    # Entrada marcada como cifrada en el directorio central: no se puede copiar tal cual
+    data = bytearray(open(template, "rb").read())
+    data[data.index(b"PK\x01\x02") + 8] |= 0x1
+    assert TEMPLATE_PACKAGE.get(io.BytesIO(bytes(data))) is None
+
+    output = tmp_path / "out.docx"
+    render_docx(io.BytesIO(open(template, "rb").read()), {"job": "Data Lead", "company_name": "Acme"}, str(output))
+    assert "Data Lead en Acme" in text_of(output)
+
+
+def test_write_refuses_documents_with_new_parts(tmp_path):
+    package = TEMPLATE_PACKAGE.get(make_template(tmp_path / "Curriculum_English.docx"))
+    doc = package.document()
+    doc.add_picture(io.BytesIO(png(8, 8)), width=Inches(1))  # parte y relación nuevas
+    assert package.write(doc, str(tmp_path / "out.docx")) is False
+    assert not (tmp_path / "out.docx").exists()
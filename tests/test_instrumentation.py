@@ -0,0 +1,27 @@
+from Library.instrumentation import TRACER
+
+
+def test_stop_run_stops_collecting():
+    tracer = TRACER()
+    tracer.configure(enabled=False)
+    tracer.start_run()
+    with tracer.span("query", table="jobs"):
+        pass
+    assert [r["name"] for r in tracer.run_records()] == ["query"]
+
+    tracer.stop_run()
+    assert tracer.run_records() == []
+    assert tracer.span("query") is tracer.span("other")  # vuelve al span vacío
+    with tracer.span("query"):
+        pass
+    assert tracer.run_records() == []
+
+
+def test_start_run_resets_previous_records():
+    tracer = TRACER()
+    tracer.configure(enabled=False)
+    tracer.start_run()
+    with tracer.span("first"):
+        pass
+    tracer.start_run()
+    assert tracer.run_records() == []
@@ -0,0 +1,139 @@
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from Library.local_replica import to_sqlite_query, to_sqlite_value
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE companies (company_id INTEGER, company_name TEXT, created_at TEXT)")
+    conn.executemany("INSERT INTO companies VALUES (?, ?, ?)",
+                     [(1, "Acme", "2025-01-31"), (2, "Globex", "2025-02-01"), (3, "acme labs", "2025-03-01")])
+    return conn
+
+
+def run(conn, query, params=None):
+    sql, values = to_sqlite_query(query, params)
+    return [row[0] for row in conn.execute(sql, values).fetchall()]
+
+
+def test_positional_params_casts_and_ilike(conn):
+    query = "SELECT company_id FROM companies WHERE company_name ILIKE %s AND created_at::date >= %s ORDER BY 1;"
+    sql, values = to_sqlite_query(query, ("%acme%", date(2025, 1, 1)))
+    assert sql == "SELECT company_id FROM companies WHERE company_name LIKE ? AND created_at >= ? ORDER BY 1;"
+    assert values == ["%acme%", "2025-01-01"]
+    assert run(conn, query, ("%acme%", date(2025, 1, 1))) == [1, 3]
+
+
+def test_any_list_becomes_in(conn):
+    query = "SELECT company_name FROM companies WHERE company_id = ANY(%s) AND company_id <> %s ORDER BY 1;"
+    assert run(conn, query, ([1, 2, 3], 2)) == ["Acme", "acme labs"]
+    sql, values = to_sqlite_query(query, ([], 2))
+    assert "IN (NULL)" in sql and values == [2]
+    assert run(conn, query, ([], 2)) == []
+
+
+def test_named_params_and_escaped_percent(conn):
+    query = "SELECT company_id FROM companies WHERE company_name LIKE 'Glo%%' OR company_id = %(id)s ORDER BY 1;"
+    sql, values = to_sqlite_query(query, {"id": 1})
+    assert sql == "SELECT company_id FROM companies WHERE company_name LIKE 'Glo%' OR company_id = :id ORDER BY 1;"
+    assert run(conn, query, {"id": 1}) == [1, 2]
+
+
+def test_values_are_adapted_for_sqlite():
+    assert to_sqlite_value(True) == 1
+    assert to_sqlite_value(datetime(2025, 1, 31, 9, 30)) == "2025-01-31 09:30:00"
+    assert to_sqlite_value(Decimal("1.5")) == 1.5
+    assert to_sqlite_value(["a", "b"]) == '["a", "b"]'
+    assert to_sqlite_query("SELECT 1;") == ("SELECT 1;", [])
+
+
+class FAKE_PG:
+    """Conexión de Postgres de mentira: guarda cada sentencia y no devuelve filas."""
+    encoding = "UTF8"
+
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    def cursor(self):
+        return FAKE_PG_CURSOR(self)
+
+    def commit(self):
+        self.commits += 1
+
+
+class FAKE_PG_CURSOR:
+    description = None
+    rowcount = 0
+
+    def __init__(self, conn):
+        self.connection = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def mogrify(self, query, params=None):
+        return (query % tuple(repr(value) for value in params)).encode("utf-8")
+
+    def execute(self, query, params=None):
+        self.connection.statements.append(query.decode("utf-8") if isinstance(query, bytes) else query)
+
+    def fetchall(self):
+        return []
+
+
+def test_template_registry_sync_with_local_replica(tmp_path, monkeypatch):
+    from contextlib import contextmanager
+
+    from Library.data_layer import DATA_LAYER
+    from Library.local_replica import LOCAL_REPLICA
+    from Library.template_registry import TEMPLATE_REGISTRY
+
+    replica = LOCAL_REPLICA(str(tmp_path / "career.sqlite3"), "career")
+    with replica.connection() as conn:
+        conn.execute('CREATE TABLE "career".languages (lang TEXT PRIMARY KEY);')
+        conn.execute('INSERT INTO "career".languages VALUES (\'English\');')
+        conn.execute("INSERT INTO _sync_state VALUES ('languages', 1, '[[\"lang\", \"text\"]]', NULL);")
+    pg = FAKE_PG()
+    db = DATA_LAYER("postgresql://localhost/career", "career", local=replica)
+    monkeypatch.setattr(db, "connection", contextmanager(lambda dsn=None: (yield pg)))
+
+    templates = tmp_path / "CV Templates"
+    templates.mkdir()
+    (templates / "Curriculum_English.docx").write_bytes(b"docx")
+    (templates / "Curriculum_Klingon.docx").write_bytes(b"docx")
+
+    summary = TEMPLATE_REGISTRY(db, str(templates)).sync(store_content=False)
+    assert summary == {"updated": 1, "unchanged": 0, "removed": 0, "skipped": 1}
+    # languages se leyó de SQLite; template_registry y las escrituras en bloque fueron a Postgres
+    assert not any("FROM languages" in sql for sql in pg.statements)
+    assert any("FROM template_registry" in sql for sql in pg.statements)
+    assert any(sql.lstrip().startswith("INSERT INTO template_registry") and "Curriculum_English.docx" in sql
+               for sql in pg.statements)
+    assert any("INSERT INTO cv_files" in sql for sql in pg.statements)
+    assert pg.commits == 1
+
+
+def test_conflicts_are_listed_by_the_cli(tmp_path, capsys):
+    from Library.local_replica import LOCAL_REPLICA, print_conflicts
+
+    replica = LOCAL_REPLICA(str(tmp_path / "career.sqlite3"), "career")
+    with replica.connection() as conn:
+        conn.execute(
+            "INSERT INTO _conflicts (table_name, op, pk, local_row, server_row, error, detected_at) "
+            "VALUES ('companies', 'UPDATE', '7', '{\"company_name\": \"Acme\"}', '{\"company_name\": \"ACME\"}', "
+            "'la fila cambió en el servidor', '2026-10-19 10:00:00');"
+        )
+    assert replica.status()["conflicts"] == 1
+    print_conflicts(replica)
+    out = capsys.readouterr().out
+    assert "#1 UPDATE companies (7)" in out and "la fila cambió en el servidor" in out
+    assert '"ACME"' in out
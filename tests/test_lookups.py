@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+
+import pytest
+
+from Library.lookups import COMPANY_LOOKUP, OPTION_LIST, search_companies
+
+COMPANIES = [("Acme", "startup"), ("Globex", "corporativo")]
+
+
+class READ_ONLY_DB:
+    """Sólo tiene read_cursor: cualquier consulta por el primario falla."""
+    db_url = "postgresql://replica/career"
+    schema = "career"
+
+    def __init__(self):
+        self.queries = []
+
+    def cursor(self):
+        raise AssertionError("lectura por el primario")
+
+    @contextmanager
+    def read_cursor(self):
+        db = self
+
+        class Cursor:
+            def execute(self, query, params=None):
+                db.queries.append(query)
+
+            def fetchall(self):
+                return list(COMPANIES)
+
+        yield Cursor()
+
+
+def test_option_list_index():
+    choices = OPTION_LIST(["applied", "interviewing", "offered"])
+    assert choices.index("offered") == 2
+    assert choices.index("unknown") == 0
+    assert choices.index(None, default=1) == 1
+
+
+def test_company_lookup_is_built_once_per_version_from_read_cursor():
+    COMPANY_LOOKUP._cache.clear()
+    db = READ_ONLY_DB()
+    lookup = COMPANY_LOOKUP.load(db, 1)
+    assert lookup.type_of == dict(COMPANIES)
+    assert COMPANY_LOOKUP.load(db, 1) is lookup
+    assert COMPANY_LOOKUP.load(db, 2) is not lookup
+    assert len(db.queries) == 2
+
+
+@pytest.mark.parametrize("term", ["", "acm"])
+def test_search_companies_uses_read_cursor(term):
+    db = READ_ONLY_DB()
+    assert search_companies(db, term) == COMPANIES
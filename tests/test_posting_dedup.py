@@ -0,0 +1,42 @@
+import numpy as np
+
+from Library.posting_dedup import (BANDS, NUM_PERM, band_buckets, minhash, shingles, signature_bytes,
+                                   signature_from_bytes, similarity)
+
+POSTING = " ".join(f"word{i}" for i in range(200))
+
+
+def signature(text):
+    return minhash(shingles(text))
+
+
+def test_minhash_of_empty_text_is_none():
+    assert minhash(shingles("")) is None
+    assert len(shingles("dos palabras")) == 1
+
+
+def test_identical_texts_share_every_bucket():
+    a, b = signature(POSTING), signature(POSTING.upper())
+    assert a.shape == (NUM_PERM,)
+    assert similarity(a, b) == 1.0
+    assert band_buckets(a) == band_buckets(b)
+    assert [band for band, _ in band_buckets(a)] == list(range(BANDS))
+
+
+def test_near_duplicates_collide_and_different_texts_do_not():
+    near = POSTING.replace("word100", "changed")  # 5 de 196 shingles cambian
+    other = " ".join(f"other{i}" for i in range(200))
+    base = signature(POSTING)
+    assert similarity(base, signature(near)) > 0.85
+    assert set(band_buckets(base)) & set(band_buckets(signature(near)))
+    assert similarity(base, signature(other)) < 0.1
+    assert not set(band_buckets(base)) & set(band_buckets(signature(other)))
+
+
+def test_signature_roundtrip_and_stable_buckets():
+    base = signature(POSTING)
+    restored = signature_from_bytes(signature_bytes(base))
+    assert np.array_equal(restored, base)
+    # Los buckets se guardan en Postgres: deben ser BIGINT y no depender del proceso
+    assert band_buckets(restored) == band_buckets(base)
+    assert all(-(1 << 63) <= bucket < (1 << 63) for _, bucket in band_buckets(base))
@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+from conftest import FIXTURE_SERVER
+
+from Library.posting_fetcher import POSTING_FETCHER, content_sha256, needs_javascript
+
+POSTING = "<html><body><h1>Data Lead</h1><p>" + "Responsabilidades del puesto. " * 30 + "</p></body></html>"
+
+
+def fetch(fetcher, targets):
+    return asyncio.run(fetcher.fetch_all(targets))
+
+
+def test_conditional_get_uses_etag(fixture_server):
+    def posting(headers):
+        if headers.get("If-None-Match") == '"v1"':
+            return 304, {"ETag": '"v1"'}, b""
+        return 200, {"ETag": '"v1"'}, POSTING
+
+    fixture_server.routes["/job"] = (200, {}, posting)
+    url = fixture_server.url("/job")
+    fetcher = POSTING_FETCHER(rps_per_host=0)
+
+    first, = fetch(fetcher, [{"url": url}])
+    assert first["outcome"] == "updated" and first["etag"] == '"v1"'
+
+    second, = fetch(fetcher, [{"url": url, "etag": first["etag"], "content_sha256": first["content_sha256"]}])
+    assert second["outcome"] == "not_modified"
+    assert fixture_server.requests[-1][1].get("If-None-Match") == '"v1"'
+
+
+def test_markup_only_changes_count_as_unchanged(fixture_server):
+    fixture_server.routes["/job"] = (200, {}, POSTING.replace("<h1>", '<h1 data-nonce="a1">'))
+    url = fixture_server.url("/job")
+    previous = content_sha256(POSTING)
+    result, = fetch(POSTING_FETCHER(rps_per_host=0), [{"url": url, "content_sha256": previous}])
+    assert result["outcome"] == "unchanged"
+
+
+def test_http_errors_are_reported(fixture_server):
+    result, = fetch(POSTING_FETCHER(rps_per_host=0), [{"url": fixture_server.url("/missing")}])
+    assert result["outcome"] == "error" and result["error"] == "HTTP 404"
+
+
+class FAKE_CHROME_POOL:
+    """Render distinto en cada llamada (como Chrome con ids/nonces), mismo texto visible."""
+    size = 1
+
+    def __init__(self):
+        self.calls = 0
+
+    def fetch(self, url):
+        self.calls += 1
+        return POSTING.replace("<body>", f'<body data-render="{self.calls}">')
+
+
+def test_chrome_render_compared_by_visible_text(fixture_server):
+    shell = "<html><body><div id='app'></div><script src='app.js'></script></body></html>"
+    assert needs_javascript(shell)
+    fixture_server.routes["/spa"] = (200, {}, shell)
+    url = fixture_server.url("/spa")
+    chrome = FAKE_CHROME_POOL()
+    fetcher = POSTING_FETCHER(rps_per_host=0, chrome_pool=chrome)
+
+    first, = fetch(fetcher, [{"url": url}])
+    assert first["via"] == "chrome" and first["outcome"] == "updated"
+    second, = fetch(fetcher, [{"url": url, "content_sha256": first["content_sha256"]}])
+    assert chrome.calls == 2
+    assert second["outcome"] == "unchanged"
+
+
+def test_rate_limited_host_does_not_starve_others(fixture_server):
+    fixture_server.routes["/a"] = (200, {}, POSTING)
+    with FIXTURE_SERVER() as other:
+        seen = []
+
+        def posting_b(headers):
+            seen.append(time.monotonic())
+            return 200, {}, POSTING
+
+        other.routes["/b"] = (200, {}, posting_b)
+        # 10 URLs del host lento (5 por segundo) y 2 lugares de concurrencia
+        targets = [{"url": fixture_server.url(f"/a?{i}")} for i in range(10)] + [{"url": other.url("/b")}]
+        fixture_server.routes.update({f"/a?{i}": (200, {}, POSTING) for i in range(10)})
+        start = time.monotonic()
+        results = fetch(POSTING_FETCHER(concurrency=2, rps_per_host=5), targets)
+
+    assert all(r["outcome"] == "updated" for r in results)
+    assert seen and seen[0] - start < 1.0
+    # El host lento sigue espaciado: 10 peticiones a 5/s toman ~1.8 s
+    assert time.monotonic() - start >= 1.6
@@ -0,0 +1,55 @@
+import numpy as np
+
+from Library.relevance import BM25_INDEX, tokenize
+
+BLOCKS = [
+    ("skills", "Python, SQL y PostgreSQL para pipelines de datos"),
+    ("skills", "Excel y PowerPoint"),
+    ("experience", "Analista de datos en banca: modelos de riesgo en Python"),
+]
+
+
+def ranked(index, text):
+    scores = index.scores(text)
+    return [index.keys[row] for row in np.argsort(-scores) if scores[row] > 0]
+
+
+def test_tokenize_folds_accents_and_drops_stopwords():
+    assert tokenize("Expérience en Análisis de Datos", "Spanish") == ["experience", "analisis", "datos"]
+    assert "experience" not in tokenize("Expérience", "English")
+
+
+def test_scores_rank_matching_blocks_first():
+    index = BM25_INDEX("Spanish")
+    assert index.update(BLOCKS) == (3, 0)
+    order = ranked(index, "Buscamos analista con Python y SQL")
+    assert order[0] == BLOCKS[0]
+    assert BLOCKS[1] not in order
+    assert np.all(index.scores("palabras ausentes") == 0)
+
+
+def test_incremental_update_matches_full_rebuild():
+    index = BM25_INDEX("Spanish")
+    index.update(BLOCKS)
+    extra = ("skills", "Python avanzado y pandas")
+    index.update(BLOCKS[1:] + [extra])  # baja de BLOCKS[0], alta de extra
+
+    rebuilt = BM25_INDEX("Spanish")
+    rebuilt.update(BLOCKS[1:] + [extra])
+    query = "Python pandas datos"
+    expected = dict(zip(rebuilt.keys, rebuilt.scores(query)))
+    got = {key: score for key, score in zip(index.keys, index.scores(query)) if key in index.row_of}
+    assert len(index) == 3
+    assert got.keys() == expected.keys()
+    for key, score in expected.items():
+        assert np.isclose(got[key], score)
+    # Una baja de cuatro filas no compacta: la fila muerta sigue ahí con puntaje 0
+    assert index.scores(query)[index.keys.index(BLOCKS[0])] == 0
+
+
+def test_compaction_drops_dead_rows():
+    index = BM25_INDEX("English")
+    index.update([("skills", f"skill number {word}") for word in ("alpha", "beta", "gamma", "delta")])
+    index.update([("skills", "skill number alpha")])
+    assert len(index.keys) == 1 and index.alive.all()
+    assert ranked(index, "alpha") == [("skills", "skill number alpha")]
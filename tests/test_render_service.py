@@ -0,0 +1,69 @@
+import asyncio
+import json
+from urllib.parse import unquote
+
+import pytest
+
+from Library.render_service import RENDER_SERVICE, content_disposition, parse_bundle_request, parse_render_request
+
+
+def test_content_disposition_ascii_name():
+    assert content_disposition("Data Lead_JACJ_CV.docx") == (
+        b"attachment; filename=\"Data Lead_JACJ_CV.docx\"; filename*=UTF-8''Data%20Lead_JACJ_CV.docx")
+
+
+def test_content_disposition_non_ascii_name():
+    header = content_disposition("Ingeniería_Señor_JACJ_CV.docx").decode("ascii")
+    assert 'filename="Ingenieria_Senor_JACJ_CV.docx"' in header
+    assert unquote(header.split("filename*=UTF-8''")[1]) == "Ingeniería_Señor_JACJ_CV.docx"
+
+
+def test_content_disposition_without_ascii_letters():
+    header = content_disposition("履歴書.docx").decode("ascii")
+    assert 'filename="document.docx"' in header
+
+
+@pytest.mark.parametrize("payload", [
+    {"application_ids": [1], "documents": 5},
+    {"application_ids": [1], "documents": [1.5]},
+    {"application_ids": [1], "documents": {"cv": True}},
+    {"application_ids": {"a": 1}},
+    {"application_ids": {"1": 1}},
+    {"application_ids": 2.5},
+    {"application_ids": [[1]]},
+    {"application_ids": True},
+    {"application_ids": [1], "tenant": 7},
+])
+def test_bundle_request_rejects_wrong_json_types(payload):
+    with pytest.raises(ValueError):
+        parse_bundle_request(payload)
+
+
+def test_bundle_request_accepts_lists_and_query_strings():
+    from_json = parse_bundle_request({"application_ids": [12, "15", 12], "documents": ["cv"], "tenant": "ana"})
+    from_query = parse_bundle_request({"application_ids": "12,15", "documents": "cv", "tenant": "ana"})
+    assert from_json == from_query
+    assert from_json["application_ids"] == [12, 15] and from_json["documents"] == ["cv"]
+    assert parse_bundle_request({"application_ids": 7})["application_ids"] == [7]
+
+
+@pytest.mark.parametrize("payload", [{"application_id": 1, "document": []}, {"application_id": 1, "tenant": ["ana"]}])
+def test_render_request_rejects_wrong_json_types(payload):
+    with pytest.raises(ValueError):
+        parse_render_request(json.dumps(payload).encode())
+
+
+def test_bad_bundle_payload_is_a_400_not_a_500():
+    app = RENDER_SERVICE(settings=None, workers=1)
+    messages = [{"type": "http.request", "body": json.dumps({"application_ids": [1], "documents": 5}).encode()}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app({"type": "http", "method": "POST", "path": "/bundle", "query_string": b""}, receive, send))
+    assert sent[0]["status"] == 400
+    assert "documents" in json.loads(sent[1]["body"])["error"]
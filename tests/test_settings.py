@@ -0,0 +1,24 @@
+from pathlib import Path
+
+from Library.settings import DB_KEY, Settings
+
+
+def make_settings():
+    return Settings(
+        env_found=True,
+        working_folder=Path("/tmp/career"),
+        db_url="postgresql://localhost/career",
+        db_structure={"schema_name": "career", "jobs": "{schema_name}.job_tracker"},
+        config_mtime=0.0,
+        env_mtime=0.0,
+    )
+
+
+def test_data_access_is_a_fresh_dict_per_call():
+    settings = make_settings()
+    data_access = settings.data_access
+    data_access[DB_KEY] = "postgresql://elsewhere/career"
+    data_access["db_structure"]["schema_name"] = "other"
+    assert settings.data_access[DB_KEY] == "postgresql://localhost/career"
+    assert settings.data_access["db_structure"]["schema_name"] == "career"
+    assert settings.data_access["resolved_structure"]["jobs"] == "career.job_tracker"
@@ -0,0 +1,137 @@
+import os
+from contextlib import contextmanager
+
+import pytest
+
+streamlit_session = pytest.importorskip("Library.streamlit_session")
+
+
+class FAKE_DB:
+    schema = "ana"
+
+    def __init__(self):
+        self.version = 1
+
+
+@pytest.fixture
+def session_state(monkeypatch):
+    state = {}
+    monkeypatch.setattr(streamlit_session.st, "session_state", state)
+    return state
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FAKE_DB()
+    monkeypatch.setattr(streamlit_session, "table_versions", lambda db, tables: (db.version,))
+    return db
+
+
+def test_snapshot_reuses_until_version_changes(session_state, db):
+    loads = []
+    load = lambda: loads.append(1) or len(loads)
+    assert streamlit_session.snapshot(db, "jobs", ("job_tracker",), load) == 1
+    assert streamlit_session.snapshot(db, "jobs", ("job_tracker",), load) == 1
+    db.version = 2
+    assert streamlit_session.snapshot(db, "jobs", ("job_tracker",), load) == 2
+
+
+def test_snapshot_cache_is_bounded_lru(session_state, db, monkeypatch):
+    monkeypatch.setattr(streamlit_session, "MAX_SESSION_SNAPSHOTS", 3)
+    for name in ("a", "b", "c"):
+        streamlit_session.snapshot(db, name, ("t",), lambda: name)
+    streamlit_session.snapshot(db, "a", ("t",), lambda: "reloaded")  # "a" pasa a ser el más reciente
+    streamlit_session.snapshot(db, "d", ("t",), lambda: "d")
+    snapshots = session_state[streamlit_session.SNAPSHOT_STATE_KEY]
+    assert list(snapshots) == ["c", "a", "d"]
+    assert snapshots["a"][1] == "a"
+
+
+def test_changed_cells_only_reports_real_edits():
+    import pandas as pd
+
+    original = pd.DataFrame({
+        "id": [1, 2, 3],
+        "status": ["applied", "applied", None],
+        "deadline": pd.to_datetime(["2025-01-31", None, "2025-03-01"]),
+        "notes": ["", "call back", "x"],
+    })
+    edited = original.copy()
+    edited.loc[0, "status"] = "interviewing"
+    edited.loc[1, "deadline"] = pd.Timestamp("2025-02-15")
+    edited.loc[2, "status"] = ""          # vacío sigue siendo NULL
+    edited.loc[2, "notes"] = "y"          # columna no editable: se ignora
+    changes = streamlit_session.changed_cells(original, edited, "id", ["status", "deadline"])
+    assert changes == {1: {"status": "interviewing"}, 2: {"deadline": pd.Timestamp("2025-02-15").date()}}
+    assert all(type(key) is int for key in changes)  # numpy -> python para psycopg2
+
+
+def test_changed_cells_ignores_edits_reverted_to_original():
+    import pandas as pd
+
+    original = pd.DataFrame({"id": [7], "status": ["applied"]})
+    edited = original.assign(status=["applied"])
+    assert streamlit_session.changed_cells(original, edited, "id", ["status"]) == {}
+
+
+class FAKE_STREAM_DB:
+    schema = "ana"
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.calls = []
+
+    def iter_frames(self, query, params=None, chunksize=None, label=None):
+        self.calls.append(chunksize)
+        yield from self.frames
+
+
+def test_export_csv_streams_chunks_to_a_file_keyed_by_version(session_state, monkeypatch):
+    import pandas as pd
+
+    clicks, downloads = [True], []
+    monkeypatch.setattr(streamlit_session.st, "button", lambda *a, **k: clicks.pop() if clicks else False, raising=False)
+    monkeypatch.setattr(streamlit_session.st, "download_button",
+                        lambda label, data, **kwargs: downloads.append(data.read()), raising=False)
+    db = FAKE_STREAM_DB([pd.DataFrame({"id": [1, 2], "job": ["a", "b"]}), pd.DataFrame({"id": [3], "job": ["c"]})])
+
+    streamlit_session.export_csv(db, "jobs", "SELECT id, job FROM jobs;", version=(1,))
+    assert db.calls == [streamlit_session.EXPORT_CHUNK_ROWS]
+    assert downloads == [b"id,job\n1,a\n2,b\n3,c\n"]
+    path = session_state[f"{streamlit_session.EXPORT_STATE_PREFIX}jobs"]["path"]
+
+    # Sin clic el archivo se sigue ofreciendo; al cambiar la versión se borra
+    streamlit_session.export_csv(db, "jobs", "SELECT id, job FROM jobs;", version=(1,))
+    assert len(downloads) == 2
+    streamlit_session.export_csv(db, "jobs", "SELECT id, job FROM jobs;", version=(2,))
+    assert len(downloads) == 2
+    assert not os.path.exists(path)
+
+
+class FAKE_REMOTE_DB:
+    def __init__(self, versions):
+        self.versions = versions
+        self.queried = []
+
+    @contextmanager
+    def read_cursor(self):
+        cur = type("CURSOR", (), {})()
+        cur.execute = lambda query, params: self.queried.extend(params[0])
+        cur.fetchall = lambda: [(table, self.versions[table]) for table in self.queried if table in self.versions]
+        yield cur
+
+
+def test_table_versions_reads_unmirrored_tables_from_postgres(tmp_path, monkeypatch):
+    from Library.data_layer import DATA_LAYER
+    from Library.local_replica import LOCAL_REPLICA
+
+    replica = LOCAL_REPLICA(str(tmp_path / "career.sqlite3"), "career")
+    with replica.connection() as conn:
+        conn.execute("INSERT INTO data_versions VALUES ('companies', 4);")
+        conn.execute("INSERT INTO _sync_state VALUES ('companies', 4, '[]', NULL);")
+    db = DATA_LAYER("postgresql://localhost/career", "career", local=replica)
+    remote = FAKE_REMOTE_DB({"posting_snapshots": 9})
+    monkeypatch.setattr(db, "remote", lambda: remote)
+
+    assert streamlit_session.table_versions(db, ("posting_snapshots", "companies")) == (9, 4)
+    assert remote.queried == ["posting_snapshots"]
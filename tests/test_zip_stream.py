@@ -0,0 +1,53 @@
+import io
+import os
+import zipfile
+
+from Library.zip_stream import CHUNK_SIZE, iter_zip
+
+
+def read_zip(chunks):
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.testzip() is None
+    return {name: archive.read(name) for name in archive.namelist()}
+
+
+def test_bytes_files_and_iterables(tmp_path):
+    on_disk = tmp_path / "cv.docx"
+    on_disk.write_bytes(b"docx from disk")
+    entries = [
+        ("12_Data Lead_es/Data Lead_JACJ_CV.docx", b"rendered cv"),
+        ("12_Data Lead_es/on_disk.docx", str(on_disk)),
+        ("15_Analista_en/letter.docx", iter([b"part 1, ", b"part 2"])),
+        ("skipped.docx", None),
+    ]
+    assert read_zip(iter_zip(entries)) == {
+        "12_Data Lead_es/Data Lead_JACJ_CV.docx": b"rendered cv",
+        "12_Data Lead_es/on_disk.docx": b"docx from disk",
+        "15_Analista_en/letter.docx": b"part 1, part 2",
+    }
+
+
+def test_large_entry_is_streamed_in_chunks():
+    payload = os.urandom(CHUNK_SIZE * 3 + 17)  # no comprime: sale tal cual por trozos
+    chunks = list(iter_zip([("big.bin", payload)]))
+    assert len([c for c in chunks if c]) > 2
+    assert max(len(c) for c in chunks) <= CHUNK_SIZE * 2
+    assert read_zip(chunks) == {"big.bin": payload}
+
+
+def test_entries_are_consumed_lazily():
+    consumed = []
+
+    def entries():
+        for name in ("a.txt", "b.txt"):
+            consumed.append(name)
+            yield name, name.encode()
+
+    chunks = iter_zip(entries())
+    first = next(chunks)
+    assert consumed == ["a.txt"]
+    assert read_zip([first, *chunks]) == {"a.txt": b"a.txt", "b.txt": b"b.txt"}
+
+
+def test_empty_bundle_is_a_valid_zip():
+    assert read_zip(iter_zip([])) == {}